@@ -0,0 +1,327 @@
+"""
+SQL-side aggregate views for member counts and capacity.
+
+The `member_count`, `core_count`, `subcon_count` and capacity columns on
+Squad, Tribe and Area are denormalized values written by the Python loaders,
+so they drift whenever `squad_members` is changed outside the loader. This
+module defines database views that compute the same aggregates directly from
+`squad_members` + `team_members` with GROUP BY:
+
+- SQLite: plain views, always up to date.
+- PostgreSQL: materialized views, refreshed once per transaction by deferred
+  triggers on the underlying tables.
+
+The views are optional. Set USE_AGGREGATE_VIEWS=true to create them at startup
+and have the read endpoints take their numbers from the views instead of the
+stored columns.
+"""
+
+import os
+import argparse
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import select, func, case, and_, or_, false, text, bindparam
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+import models
+from database import db_config
+from logger import get_logger, log_and_handle_exception
+
+# Initialize logger
+logger = get_logger('aggregate_views', log_level='INFO')
+
+# Feature flag - views are only created and used when explicitly enabled
+AGGREGATE_VIEWS_ENABLED = os.environ.get("USE_AGGREGATE_VIEWS", "false").lower() in ("1", "true", "yes")
+
+# View names, keyed by the entity type they aggregate
+VIEW_NAMES = {
+    "squad": "squad_member_stats",
+    "tribe": "tribe_member_stats",
+    "area": "area_member_stats",
+}
+
+# Aggregate columns exposed by every view (same names as the model columns)
+STAT_COLUMNS = [
+    "member_count",
+    "core_count",
+    "subcon_count",
+    "total_capacity",
+    "core_capacity",
+    "subcon_capacity",
+]
+
+# Tables whose changes must refresh the materialized views on PostgreSQL
+SOURCE_TABLES = ["squad_members", "team_members", "squads", "tribes", "areas"]
+
+# Above this many entities we read the whole view instead of using an IN list
+_IN_LIST_LIMIT = 500
+
+def _qualified(name: str) -> str:
+    """Get schema-qualified object name if using PostgreSQL with schema"""
+    if db_config.is_postgres and db_config.schema:
+        return f"{db_config.schema}.{name}"
+    return name
+
+def _active_memberships():
+    """Squad memberships of non-vacancy team members, as a subquery"""
+    sm = models.squad_members
+    tm = models.TeamMember.__table__
+    return select(
+        sm.c.squad_id.label("squad_id"),
+        sm.c.capacity.label("capacity"),
+        tm.c.employment_type.label("employment_type"),
+    ).select_from(
+        sm.join(tm, sm.c.member_id == tm.c.id)
+    ).where(
+        func.coalesce(tm.c.is_vacancy, false()) == false()
+    ).subquery("active_members")
+
+def _stat_columns(active):
+    """
+    Aggregate expressions matching the loader's counting rules:
+    vacancies are excluded, 'core' employees count as core and everyone
+    else counts as subcon.
+    """
+    has_member = active.c.squad_id.isnot(None)
+    is_core = and_(has_member, active.c.employment_type == "core")
+    is_subcon = and_(has_member, or_(active.c.employment_type.is_(None), active.c.employment_type != "core"))
+    capacity = func.coalesce(active.c.capacity, 0.0)
+
+    return [
+        func.count(active.c.squad_id).label("member_count"),
+        func.coalesce(func.sum(case((is_core, 1), else_=0)), 0).label("core_count"),
+        func.coalesce(func.sum(case((is_subcon, 1), else_=0)), 0).label("subcon_count"),
+        func.coalesce(func.sum(capacity), 0.0).label("total_capacity"),
+        func.coalesce(func.sum(case((is_core, capacity), else_=0.0)), 0.0).label("core_capacity"),
+        func.coalesce(func.sum(case((is_subcon, capacity), else_=0.0)), 0.0).label("subcon_capacity"),
+    ]
+
+def build_view_queries() -> Dict[str, object]:
+    """Build the SELECT statements behind each aggregate view"""
+    squads = models.Squad.__table__
+    tribes = models.Tribe.__table__
+    areas = models.Area.__table__
+
+    active = _active_memberships()
+    squad_query = select(
+        squads.c.id.label("squad_id"), *_stat_columns(active)
+    ).select_from(
+        squads.outerjoin(active, active.c.squad_id == squads.c.id)
+    ).group_by(squads.c.id)
+
+    active = _active_memberships()
+    tribe_query = select(
+        tribes.c.id.label("tribe_id"), *_stat_columns(active)
+    ).select_from(
+        tribes.outerjoin(squads, squads.c.tribe_id == tribes.c.id)
+        .outerjoin(active, active.c.squad_id == squads.c.id)
+    ).group_by(tribes.c.id)
+
+    active = _active_memberships()
+    area_query = select(
+        areas.c.id.label("area_id"), *_stat_columns(active)
+    ).select_from(
+        areas.outerjoin(tribes, tribes.c.area_id == areas.c.id)
+        .outerjoin(squads, squads.c.tribe_id == tribes.c.id)
+        .outerjoin(active, active.c.squad_id == squads.c.id)
+    ).group_by(areas.c.id)
+
+    return {"squad": squad_query, "tribe": tribe_query, "area": area_query}
+
+def _compile(query, engine) -> str:
+    """Compile a query to a literal SQL string for use in view DDL"""
+    return str(query.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+
+def create_aggregate_views(engine) -> bool:
+    """
+    Create (or re-create) the aggregate views.
+
+    Views are dropped and re-created so their definitions always match the
+    current models. On PostgreSQL this also installs the refresh triggers.
+
+    Returns:
+        bool: True if the views were created successfully, False otherwise
+    """
+    logger.info(f"Creating aggregate views on {db_config.db_type}")
+    try:
+        drop_aggregate_views(engine)
+        queries = build_view_queries()
+
+        with engine.begin() as conn:
+            for entity_type, query in queries.items():
+                view_name = _qualified(VIEW_NAMES[entity_type])
+                select_sql = _compile(query, engine)
+                if db_config.is_postgres:
+                    conn.execute(text(f"CREATE MATERIALIZED VIEW {view_name} AS {select_sql}"))
+                    conn.execute(text(
+                        f"CREATE UNIQUE INDEX {VIEW_NAMES[entity_type]}_pk ON {view_name} ({entity_type}_id)"
+                    ))
+                else:
+                    conn.execute(text(f"CREATE VIEW {view_name} AS {select_sql}"))
+                logger.info(f"Created aggregate view: {view_name}")
+
+            if db_config.is_postgres:
+                _create_refresh_triggers(conn)
+
+        return True
+    except Exception as e:
+        log_and_handle_exception(
+            logger,
+            "Failed to create aggregate views",
+            e,
+            reraise=False,
+            db_type=db_config.db_type
+        )
+        return False
+
+def _create_refresh_triggers(conn):
+    """
+    Install the PostgreSQL refresh function and triggers.
+
+    The triggers are deferred constraint triggers, so they fire at commit
+    time. The first one to fire refreshes all views and sets a
+    transaction-local flag, making the remaining firings no-ops. A bulk load
+    therefore costs a single refresh rather than one per statement.
+    """
+    function_name = _qualified("refresh_member_stats_views")
+    refresh_sql = "\n".join(
+        f"    REFRESH MATERIALIZED VIEW {_qualified(name)};" for name in VIEW_NAMES.values()
+    )
+    conn.execute(text(f"""
+        CREATE OR REPLACE FUNCTION {function_name}() RETURNS trigger AS $$
+        BEGIN
+            IF current_setting('who_what_where.member_stats_refreshed', true) = 'on' THEN
+                RETURN NULL;
+            END IF;
+            PERFORM set_config('who_what_where.member_stats_refreshed', 'on', true);
+        {refresh_sql}
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+
+    for table_name in SOURCE_TABLES:
+        conn.execute(text(f"""
+            CREATE CONSTRAINT TRIGGER trg_{table_name}_member_stats
+            AFTER INSERT OR UPDATE OR DELETE ON {_qualified(table_name)}
+            DEFERRABLE INITIALLY DEFERRED
+            FOR EACH ROW EXECUTE FUNCTION {function_name}()
+        """))
+        logger.info(f"Installed member stats refresh trigger on {table_name}")
+
+def drop_aggregate_views(engine) -> None:
+    """Drop the aggregate views (and PostgreSQL triggers) if they exist"""
+    with engine.begin() as conn:
+        if db_config.is_postgres:
+            for table_name in SOURCE_TABLES:
+                conn.execute(text(
+                    f"DROP TRIGGER IF EXISTS trg_{table_name}_member_stats ON {_qualified(table_name)}"
+                ))
+            conn.execute(text(f"DROP FUNCTION IF EXISTS {_qualified('refresh_member_stats_views')}()"))
+            for view_name in VIEW_NAMES.values():
+                conn.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {_qualified(view_name)}"))
+        else:
+            for view_name in VIEW_NAMES.values():
+                conn.execute(text(f"DROP VIEW IF EXISTS {_qualified(view_name)}"))
+
+def refresh_aggregate_views(engine) -> None:
+    """Refresh the materialized views manually (no-op on SQLite)"""
+    if not db_config.is_postgres:
+        return
+    with engine.begin() as conn:
+        for view_name in VIEW_NAMES.values():
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW {_qualified(view_name)}"))
+    logger.info("Refreshed aggregate views")
+
+def get_member_stats(db: Session, entity_type: str, entity_ids: Optional[Sequence[int]] = None) -> Dict[int, Dict[str, float]]:
+    """
+    Read aggregates for areas, tribes or squads from the views.
+
+    Args:
+        db: Database session
+        entity_type: 'area', 'tribe' or 'squad'
+        entity_ids: Restrict to these IDs (None reads the whole view)
+
+    Returns:
+        dict: Aggregates keyed by entity ID
+    """
+    view_name = _qualified(VIEW_NAMES[entity_type])
+    key_column = f"{entity_type}_id"
+    columns = ", ".join([key_column] + STAT_COLUMNS)
+
+    if entity_ids is not None and len(entity_ids) <= _IN_LIST_LIMIT:
+        stmt = text(f"SELECT {columns} FROM {view_name} WHERE {key_column} IN :ids").bindparams(
+            bindparam("ids", expanding=True)
+        )
+        rows = db.execute(stmt, {"ids": list(entity_ids)}).fetchall()
+    else:
+        rows = db.execute(text(f"SELECT {columns} FROM {view_name}")).fetchall()
+
+    stats = {}
+    for row in rows:
+        mapping = row._mapping
+        stats[mapping[key_column]] = {column: mapping[column] for column in STAT_COLUMNS}
+    return stats
+
+def apply_member_stats(db: Session, entity_type: str, entities: List) -> List:
+    """
+    Overwrite the stored count/capacity columns of ORM objects with the
+    values from the aggregate views.
+
+    The values are set as committed state so the objects are not marked dirty
+    and nothing is written back to the denormalized columns. Does nothing
+    unless USE_AGGREGATE_VIEWS is enabled.
+    """
+    if not AGGREGATE_VIEWS_ENABLED or not entities:
+        return entities
+
+    try:
+        stats = get_member_stats(db, entity_type, [entity.id for entity in entities])
+    except Exception as e:
+        # Fall back to the stored columns rather than failing the request
+        log_and_handle_exception(
+            logger,
+            f"Error reading {entity_type} aggregate view",
+            e,
+            reraise=False,
+            entity_type=entity_type
+        )
+        return entities
+
+    for entity in entities:
+        entity_stats = stats.get(entity.id)
+        if entity_stats is None:
+            continue
+        for column in STAT_COLUMNS:
+            value = entity_stats[column] or 0
+            if column.endswith("_capacity"):
+                value = round(float(value), 2)
+            else:
+                value = int(value)
+            set_committed_value(entity, column, value)
+
+    return entities
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Manage the member count/capacity aggregate views')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--create', action='store_true', help='Create (or re-create) the aggregate views')
+    group.add_argument('--drop', action='store_true', help='Drop the aggregate views')
+    group.add_argument('--refresh', action='store_true', help='Refresh the materialized views (PostgreSQL only)')
+
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    from database import engine
+
+    args = parse_args()
+    if args.create:
+        if not create_aggregate_views(engine):
+            exit(1)
+    elif args.drop:
+        drop_aggregate_views(engine)
+        logger.info("Dropped aggregate views")
+    elif args.refresh:
+        refresh_aggregate_views(engine)
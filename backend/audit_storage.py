@@ -0,0 +1,510 @@
+"""
+Partitioned audit log storage, retention and filtered queries.
+
+Storage layout
+- PostgreSQL: `audit_logs` can be converted (once, with --partition) into a
+  natively partitioned table, one partition per month named
+  `audit_logs_YYYY_MM` plus a DEFAULT partition. Upcoming months are created
+  ahead of time at startup.
+- SQLite: `audit_logs` holds the current month. Older months are rolled
+  over into `audit_logs_YYYY_MM` tables with the same columns and indexes,
+  at startup and with --rollover (run it from cron early each month).
+  audit_logs uses AUTOINCREMENT so ids stay unique across the tables even
+  when a rollover leaves it empty.
+
+Partitioning and rollover are enabled with AUDIT_PARTITIONING=true. The
+composite indexes on audit_logs are created at startup either way.
+
+Retention
+archive_old_entries() exports every month older than AUDIT_RETENTION_DAYS
+to a gzip-compressed JSON lines file in AUDIT_ARCHIVE_DIR, then drops the
+partition / rollover table and deletes leftover rows. The file is fully
+written before any data is removed. Run it from cron with --archive, which
+on SQLite rolls over finished months first.
+
+Queries
+query_audit_logs() filters by user, entity, action and date range, orders
+newest first and supports keyset pagination with `before`. On SQLite it
+transparently includes the rollover tables that overlap the date range.
+"""
+
+import os
+import re
+import json
+import gzip
+import shutil
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import (Column, DateTime, Index, Integer, MetaData, String, Table, delete, func, insert,
+                        select, text, union_all)
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+import models
+from database import db_config
+from logger import get_logger, log_and_handle_exception
+
+# Initialize logger
+logger = get_logger('audit_storage', log_level='INFO')
+
+# Configuration
+AUDIT_PARTITIONING_ENABLED = os.environ.get("AUDIT_PARTITIONING", "false").lower() in ("1", "true", "yes")
+AUDIT_RETENTION_DAYS = int(os.environ.get("AUDIT_RETENTION_DAYS", "365"))
+AUDIT_ARCHIVE_DIR = os.environ.get("AUDIT_ARCHIVE_DIR", "audit_archive")
+AUDIT_PARTITION_MONTHS_AHEAD = int(os.environ.get("AUDIT_PARTITION_MONTHS_AHEAD", "3"))
+
+TABLE_NAME = "audit_logs"
+PARTITION_NAME_RE = re.compile(r"^audit_logs_(\d{4})_(\d{2})$")
+
+# Rows fetched per round trip when exporting
+_EXPORT_BATCH_SIZE = 5000
+
+def _qualified(name: str) -> str:
+    """Get schema-qualified object name if using PostgreSQL with schema"""
+    if db_config.is_postgres and db_config.schema:
+        return f"{db_config.schema}.{name}"
+    return name
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+def _next_month(month: datetime) -> datetime:
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+def partition_name(month: datetime) -> str:
+    """Name of the partition / rollover table holding a month"""
+    return f"{TABLE_NAME}_{month:%Y_%m}"
+
+def _audit_table(name: str) -> Table:
+    """Table object with the audit_logs columns (no foreign keys) for partitions and rollover tables"""
+    return Table(
+        name, MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer),
+        Column("action", String),
+        Column("entity_type", String),
+        Column("entity_id", Integer),
+        Column("details", String),
+        Column("created_at", DateTime),
+        Index(f"ix_{name}_created_at", "created_at"),
+        Index(f"ix_{name}_user_id_created_at", "user_id", "created_at"),
+        Index(f"ix_{name}_entity_created_at", "entity_type", "entity_id", "created_at"),
+        schema=db_config.schema if db_config.is_postgres and db_config.schema else None,
+    )
+
+def list_partitions(conn) -> Dict[datetime, str]:
+    """Monthly partitions (PostgreSQL) or rollover tables (SQLite), keyed by month start"""
+    if db_config.is_postgres:
+        rows = conn.execute(text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+            WHERE parent.relname = :table_name AND ns.nspname = :schema
+        """), {"table_name": TABLE_NAME, "schema": db_config.schema or "public"}).fetchall()
+    else:
+        rows = conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'audit_logs_%'"
+        )).fetchall()
+
+    partitions = {}
+    for (name,) in rows:
+        match = PARTITION_NAME_RE.match(name)
+        if match:
+            partitions[datetime(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+def is_partitioned(conn) -> bool:
+    """Whether audit_logs is a native PostgreSQL partitioned table"""
+    if not db_config.is_postgres:
+        return False
+    return conn.execute(text("""
+        SELECT 1
+        FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        JOIN pg_namespace ns ON ns.oid = c.relnamespace
+        WHERE c.relname = :table_name AND ns.nspname = :schema
+    """), {"table_name": TABLE_NAME, "schema": db_config.schema or "public"}).first() is not None
+
+def ensure_audit_storage(engine):
+    """
+    Create missing audit log indexes and, if partitioning is enabled, the
+    upcoming PostgreSQL partitions or the SQLite rollover tables.
+    """
+    try:
+        for index in models.AuditLog.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+        if not AUDIT_PARTITIONING_ENABLED:
+            return
+
+        if db_config.is_postgres:
+            with engine.connect() as conn:
+                partitioned = is_partitioned(conn)
+            if partitioned:
+                ensure_partitions(engine)
+            else:
+                logger.warning("AUDIT_PARTITIONING is enabled but audit_logs is not partitioned yet. "
+                               "Run: python audit_storage.py --partition")
+        else:
+            rollover(engine)
+    except Exception as e:
+        log_and_handle_exception(
+            logger,
+            "Error preparing audit log storage",
+            e,
+            reraise=False,
+            db_type=db_config.db_type
+        )
+
+def ensure_partitions(engine, months_ahead: int = AUDIT_PARTITION_MONTHS_AHEAD, now: Optional[datetime] = None):
+    """Create PostgreSQL partitions for the current month and the next few months"""
+    month = _month_start(now or datetime.utcnow())
+    with engine.connect() as conn:
+        existing = list_partitions(conn)
+
+    for _ in range(months_ahead + 1):
+        if month not in existing:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(
+                        f"CREATE TABLE {_qualified(partition_name(month))} PARTITION OF {_qualified(TABLE_NAME)} "
+                        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+                    ))
+                logger.info(f"Created audit log partition: {partition_name(month)}")
+            except Exception as e:
+                # Typically rows for this month already sit in the DEFAULT partition
+                log_and_handle_exception(
+                    logger,
+                    f"Could not create audit log partition {partition_name(month)}",
+                    e,
+                    reraise=False
+                )
+        month = _next_month(month)
+
+def convert_to_partitioned(engine, months_ahead: int = AUDIT_PARTITION_MONTHS_AHEAD):
+    """
+    Convert the PostgreSQL audit_logs table into a table partitioned by month.
+
+    Rows are copied into the new table inside a single transaction; the id
+    sequence is kept, so existing ids and new inserts carry on unchanged.
+    """
+    if not db_config.is_postgres:
+        raise ValueError("Native partitioning is only available on PostgreSQL")
+
+    table = _qualified(TABLE_NAME)
+    legacy = f"{TABLE_NAME}_unpartitioned"
+    users_table = _qualified("users")
+
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            logger.info("audit_logs is already partitioned")
+            return
+
+        sequence = conn.execute(text("SELECT pg_get_serial_sequence(:table_name, 'id')"),
+                                {"table_name": table}).scalar()
+        oldest = conn.execute(text(f"SELECT MIN(created_at) FROM {table}")).scalar()
+
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY NONE"))
+        conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+        for index in models.AuditLog.__table__.indexes:
+            conn.execute(text(f"DROP INDEX IF EXISTS {_qualified(index.name)}"))
+
+        conn.execute(text(f"""
+            CREATE TABLE {table} (
+                id INTEGER NOT NULL DEFAULT nextval('{sequence}'),
+                user_id INTEGER REFERENCES {users_table}(id),
+                action VARCHAR,
+                entity_type VARCHAR,
+                entity_id INTEGER,
+                details VARCHAR,
+                created_at TIMESTAMP NOT NULL DEFAULT now(),
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        """))
+        conn.execute(text(f"CREATE TABLE {_qualified(TABLE_NAME + '_default')} PARTITION OF {table} DEFAULT"))
+
+        month = _month_start(oldest or datetime.utcnow())
+        last = _month_start(datetime.utcnow())
+        for _ in range(months_ahead):
+            last = _next_month(last)
+        while month <= last:
+            conn.execute(text(
+                f"CREATE TABLE {_qualified(partition_name(month))} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+            ))
+            month = _next_month(month)
+
+        conn.execute(text(f"""
+            INSERT INTO {table} (id, user_id, action, entity_type, entity_id, details, created_at)
+            SELECT id, user_id, action, entity_type, entity_id, details, COALESCE(created_at, now())
+            FROM {_qualified(legacy)}
+        """))
+        conn.execute(text(f"DROP TABLE {_qualified(legacy)}"))
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+
+    # Indexes on the parent cascade to every partition
+    for index in models.AuditLog.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    logger.info("Converted audit_logs to a partitioned table")
+
+def _ensure_sqlite_autoincrement(conn):
+    """
+    Rebuild an audit_logs table created without AUTOINCREMENT and seed its
+    sequence above every id already in the rollover tables.
+    """
+    live = models.AuditLog.__table__
+    sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :table_name"),
+                       {"table_name": TABLE_NAME}).scalar()
+    if sql is None or "AUTOINCREMENT" in sql.upper():
+        return
+
+    legacy = f"{TABLE_NAME}_legacy"
+    conn.execute(text(f"ALTER TABLE {TABLE_NAME} RENAME TO {legacy}"))
+    for index in live.indexes:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    live.create(bind=conn)
+    columns = ", ".join(column.name for column in live.columns)
+    conn.execute(text(f"INSERT INTO {TABLE_NAME} ({columns}) SELECT {columns} FROM {legacy}"))
+    conn.execute(text(f"DROP TABLE {legacy}"))
+
+    high_water = max([conn.execute(select(func.max(live.c.id))).scalar() or 0] + [
+        conn.execute(select(func.max(_audit_table(name).c.id))).scalar() or 0
+        for name in list_partitions(conn).values()
+    ])
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = :table_name"), {"table_name": TABLE_NAME})
+    conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:table_name, :seq)"),
+                 {"table_name": TABLE_NAME, "seq": high_water})
+    logger.info(f"Rebuilt audit_logs with AUTOINCREMENT, ids continue after {high_water}")
+
+def rollover(engine, now: Optional[datetime] = None) -> List[str]:
+    """
+    Move SQLite audit rows from before the current month into monthly tables.
+
+    Returns:
+        list: Names of the rollover tables that received rows
+    """
+    if db_config.is_postgres:
+        return []
+
+    live = models.AuditLog.__table__
+    current = _month_start(now or datetime.utcnow())
+    moved = []
+
+    with engine.begin() as conn:
+        _ensure_sqlite_autoincrement(conn)
+        oldest = conn.execute(select(func.min(live.c.created_at))).scalar()
+        if oldest is None:
+            return moved
+        if isinstance(oldest, str):
+            oldest = datetime.fromisoformat(oldest)
+
+        month = _month_start(oldest)
+        while month < current:
+            end = _next_month(month)
+            in_month = (live.c.created_at >= month) & (live.c.created_at < end)
+            if conn.execute(select(func.count()).select_from(live).where(in_month)).scalar():
+                target = _audit_table(partition_name(month))
+                target.create(bind=conn, checkfirst=True)
+                columns = [column.name for column in target.columns]
+                conn.execute(insert(target).from_select(columns, select(*[live.c[name] for name in columns]).where(in_month)))
+                conn.execute(delete(live).where(in_month))
+                moved.append(target.name)
+                logger.info(f"Rolled over audit log entries for {month:%Y-%m} into {target.name}")
+            month = end
+
+    return moved
+
+def _write_rows(conn, table, condition, file_obj) -> int:
+    """Stream matching rows into an open JSON lines file"""
+    written = 0
+    result = conn.execution_options(stream_results=True).execute(
+        select(table).where(condition).order_by(table.c.id) if condition is not None
+        else select(table).order_by(table.c.id)
+    )
+    for rows in result.partitions(_EXPORT_BATCH_SIZE):
+        for row in rows:
+            record = dict(row._mapping)
+            if isinstance(record.get("created_at"), datetime):
+                record["created_at"] = record["created_at"].isoformat()
+            file_obj.write(json.dumps(record, default=str) + "\n")
+            written += 1
+    return written
+
+def archive_old_entries(engine, retention_days: int = AUDIT_RETENTION_DAYS, archive_dir: str = AUDIT_ARCHIVE_DIR,
+                        now: Optional[datetime] = None) -> List[str]:
+    """
+    Export whole months older than the retention period to gzip JSON lines
+    files (audit_logs_YYYY_MM.jsonl.gz), then remove them from the database.
+
+    Returns:
+        list: Paths of the archive files written
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    live = models.AuditLog.__table__
+    os.makedirs(archive_dir, exist_ok=True)
+
+    with engine.connect() as conn:
+        partitions = list_partitions(conn)
+        oldest = conn.execute(select(func.min(live.c.created_at))).scalar()
+    if isinstance(oldest, str):
+        oldest = datetime.fromisoformat(oldest)
+
+    months = set(partitions)
+    if oldest is not None:
+        month = _month_start(oldest)
+        while _next_month(month) <= cutoff:
+            months.add(month)
+            month = _next_month(month)
+
+    written_files = []
+    for month in sorted(months):
+        end = _next_month(month)
+        if end > cutoff:
+            continue
+
+        path = os.path.join(archive_dir, f"{partition_name(month)}.jsonl.gz")
+        temp_path = path + ".tmp"
+        in_month = (live.c.created_at >= month) & (live.c.created_at < end)
+        try:
+            with engine.begin() as conn:
+                # Write the archive completely before removing anything
+                with gzip.open(temp_path, "wt", encoding="utf-8") as archive:
+                    count = 0
+                    if month in partitions:
+                        count += _write_rows(conn, _audit_table(partitions[month]), None, archive)
+                    if month in partitions and db_config.is_postgres:
+                        # Detach first so the leftover query below only sees the DEFAULT partition
+                        conn.execute(text(
+                            f"ALTER TABLE {_qualified(TABLE_NAME)} DETACH PARTITION {_qualified(partitions[month])}"
+                        ))
+                    count += _write_rows(conn, live, in_month, archive)
+
+                if month in partitions:
+                    conn.execute(text(f"DROP TABLE {_qualified(partitions[month])}"))
+                conn.execute(delete(live).where(in_month))
+
+            # Append as a further gzip member if the month was archived before
+            if os.path.exists(path):
+                with open(path, "ab") as target, open(temp_path, "rb") as source:
+                    shutil.copyfileobj(source, target)
+                os.unlink(temp_path)
+            else:
+                os.replace(temp_path, path)
+
+            written_files.append(path)
+            logger.info(f"Archived {count} audit log entries for {month:%Y-%m} to {path}")
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            log_and_handle_exception(
+                logger,
+                f"Error archiving audit log entries for {month:%Y-%m}",
+                e,
+                reraise=True,
+                month=f"{month:%Y-%m}"
+            )
+
+    return written_files
+
+def query_audit_logs(db: Session,
+                     user_id: Optional[int] = None,
+                     entity_type: Optional[str] = None,
+                     entity_id: Optional[int] = None,
+                     action: Optional[str] = None,
+                     start_date: Optional[datetime] = None,
+                     end_date: Optional[datetime] = None,
+                     before: Optional[datetime] = None,
+                     skip: int = 0,
+                     limit: int = 100) -> List[models.AuditLog]:
+    """
+    Filtered audit log query, newest first.
+
+    Each filter maps onto one of the composite (…, created_at) indexes. For
+    deep pagination pass the created_at of the last entry seen as `before`
+    instead of a growing `skip`.
+
+    Returns:
+        list: Transient AuditLog objects with `user` populated
+    """
+    tables = [models.AuditLog.__table__]
+    if not db_config.is_postgres:
+        # PostgreSQL partitions are queried through the parent table; SQLite
+        # rollover tables have to be added explicitly
+        first_month = _month_start(start_date) if start_date else None
+        for month, name in sorted(list_partitions(db.connection()).items(), reverse=True):
+            if (first_month is None or month >= first_month) and (end_date is None or month < end_date):
+                tables.append(_audit_table(name))
+
+    selects = []
+    for table in tables:
+        stmt = select(table.c.id, table.c.user_id, table.c.action, table.c.entity_type,
+                      table.c.entity_id, table.c.details, table.c.created_at)
+        if user_id is not None:
+            stmt = stmt.where(table.c.user_id == user_id)
+        if entity_type:
+            stmt = stmt.where(table.c.entity_type == entity_type)
+        if entity_id is not None:
+            stmt = stmt.where(table.c.entity_id == entity_id)
+        if action:
+            stmt = stmt.where(table.c.action == action)
+        if start_date:
+            stmt = stmt.where(table.c.created_at >= start_date)
+        if end_date:
+            stmt = stmt.where(table.c.created_at < end_date)
+        if before:
+            stmt = stmt.where(table.c.created_at < before)
+        selects.append(stmt)
+
+    combined = (selects[0] if len(selects) == 1 else union_all(*selects)).subquery("entries")
+    rows = db.execute(
+        select(combined).order_by(combined.c.created_at.desc(), combined.c.id.desc()).offset(skip).limit(limit)
+    ).fetchall()
+
+    # Build transient objects and load their users in one query
+    logs = [models.AuditLog(**row._mapping) for row in rows]
+    user_ids = {log.user_id for log in logs if log.user_id is not None}
+    users = {}
+    if user_ids:
+        users = {user.id: user for user in db.query(models.User).filter(models.User.id.in_(user_ids)).all()}
+    for log in logs:
+        set_committed_value(log, "user", users.get(log.user_id))
+    return logs
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Manage partitioned audit log storage and retention')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--partition', action='store_true',
+                       help='Convert audit_logs to a monthly partitioned table (PostgreSQL only)')
+    group.add_argument('--ensure', action='store_true',
+                       help='Create missing indexes and upcoming partitions / rollover tables')
+    group.add_argument('--rollover', action='store_true',
+                       help='Move entries from previous months into rollover tables (SQLite only)')
+    group.add_argument('--archive', action='store_true',
+                       help='Export months older than the retention period to compressed files and remove them')
+    parser.add_argument('--retention-days', type=int, default=AUDIT_RETENTION_DAYS,
+                        help=f'Retention period for --archive (default: {AUDIT_RETENTION_DAYS})')
+    parser.add_argument('--archive-dir', type=str, default=AUDIT_ARCHIVE_DIR,
+                        help=f'Directory for archive files (default: {AUDIT_ARCHIVE_DIR})')
+
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    from database import engine
+
+    args = parse_args()
+    if args.partition:
+        convert_to_partitioned(engine)
+    elif args.ensure:
+        ensure_audit_storage(engine)
+    elif args.rollover:
+        for table_name in rollover(engine):
+            logger.info(f"Rolled over into {table_name}")
+    elif args.archive:
+        rollover(engine)
+        for path in archive_old_entries(engine, args.retention_days, args.archive_dir):
+            logger.info(f"Wrote archive: {path}")
@@ -0,0 +1,185 @@
+"""
+Asynchronous, batched audit log writer.
+
+user_auth.log_user_action used to add and commit one AuditLog row per
+audited action, costing every write endpoint an extra transaction. When the
+writer is running, entries are put on an in-memory queue instead and a
+background thread writes them with multi-row INSERTs:
+
+- a batch is flushed once it holds AUDIT_BATCH_SIZE entries, or
+- AUDIT_FLUSH_INTERVAL_SECONDS after its first entry arrived.
+
+stop() stops accepting entries and drains everything already queued before
+returning; it is also registered with atexit. If the queue is full, or the
+writer is not running (CLI scripts, tests, shutdown), log_user_action falls
+back to a synchronous write.
+"""
+
+import os
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+
+import models
+from database import SessionLocal
+from logger import get_logger, log_and_handle_exception
+
+# Initialize logger
+logger = get_logger('audit_writer', log_level='INFO')
+
+# Configuration
+AUDIT_ASYNC_ENABLED = os.environ.get("AUDIT_ASYNC", "true").lower() in ("1", "true", "yes")
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.environ.get("AUDIT_FLUSH_INTERVAL_SECONDS", "1.0"))
+AUDIT_QUEUE_MAX_SIZE = int(os.environ.get("AUDIT_QUEUE_MAX_SIZE", "10000"))
+
+# Attempts per batch before its entries are written to the application log instead
+_MAX_WRITE_ATTEMPTS = 3
+
+# Queue marker telling the worker to flush and exit
+_STOP = object()
+
+class AuditLogWriter:
+    """Background thread that writes queued audit entries in batches"""
+
+    def __init__(self, session_factory=SessionLocal, batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_interval: float = AUDIT_FLUSH_INTERVAL_SECONDS, max_queue_size: int = AUDIT_QUEUE_MAX_SIZE):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        # Cleared by stop(); checked under _lock so no entry is queued behind the stop marker
+        self._accepting = False
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the background worker (no-op if already running)"""
+        with self._lock:
+            if self.running:
+                return
+            self._accepting = True
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+        logger.info(f"Audit writer started: batch_size={self.batch_size}, flush_interval={self.flush_interval}s")
+
+    def stop(self, timeout: Optional[float] = 30.0):
+        """Flush every queued entry, then stop the worker"""
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return
+            self._accepting = False
+        # Blocks if the queue is full, so the marker is never dropped
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.error(f"Audit writer did not drain within {timeout}s, {self._queue.qsize()} entries pending")
+        else:
+            logger.info("Audit writer stopped")
+        self._thread = None
+
+    def enqueue(self, entry: Dict) -> bool:
+        """
+        Queue an audit entry (AuditLog column values).
+
+        Returns:
+            bool: False if the writer is not running, is stopping or the
+            queue is full, in which case the caller should write the entry itself
+        """
+        with self._lock:
+            if not self._accepting or not self.running:
+                return False
+            entry.setdefault("created_at", datetime.utcnow())
+            try:
+                self._queue.put_nowait(entry)
+                return True
+            except queue.Full:
+                pass
+        logger.warning("Audit queue is full, writing entry synchronously")
+        return False
+
+    def _run(self):
+        batch: List[Dict] = []
+        deadline = None
+        stopping = False
+
+        while not stopping:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write_batch(batch)
+                batch = []
+                deadline = None
+
+        # Entries are no longer accepted, but a concurrent stop() may have queued a second marker
+        remaining = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                remaining.append(item)
+        for start in range(0, len(remaining), self.batch_size):
+            self._write_batch(remaining[start:start + self.batch_size])
+
+    def _write_batch(self, batch: List[Dict]):
+        """Write a batch with one multi-row INSERT, retrying transient failures"""
+        for attempt in range(1, _MAX_WRITE_ATTEMPTS + 1):
+            db = self.session_factory()
+            try:
+                db.execute(insert(models.AuditLog), batch)
+                db.commit()
+                logger.debug(f"Wrote {len(batch)} audit log entries")
+                return
+            except Exception as e:
+                db.rollback()
+                log_and_handle_exception(
+                    logger,
+                    f"Error writing audit log batch (attempt {attempt}/{_MAX_WRITE_ATTEMPTS})",
+                    e,
+                    reraise=False,
+                    batch_size=len(batch)
+                )
+                time.sleep(min(2 ** attempt * 0.1, 2.0))
+            finally:
+                db.close()
+
+        # Keep a record of the lost entries in the application log
+        for entry in batch:
+            logger.error(f"Unwritten audit entry: {entry}")
+
+# Shared writer used by user_auth.log_user_action
+audit_writer = AuditLogWriter()
+
+def start_audit_writer():
+    """Start the shared writer if asynchronous audit logging is enabled"""
+    if AUDIT_ASYNC_ENABLED:
+        audit_writer.start()
+
+def stop_audit_writer():
+    """Drain and stop the shared writer"""
+    audit_writer.stop()
+
+atexit.register(stop_audit_writer)
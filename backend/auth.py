@@ -1,7 +1,12 @@
 from datetime import datetime, timedelta
 from typing import Optional
+from collections import OrderedDict
 import os
 import sys
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -27,16 +32,95 @@ ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "120"))
 
 # Password hashing
+# bcrypt work factor; raising it upgrades existing hashes on their next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Maximum number of concurrent bcrypt operations
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
 # Use a try-except block to handle bcrypt version compatibility issues
 try:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 except Exception:
     # Fallback to a specific bcrypt variant that works without version check
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__ident="2b")
+    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__ident="2b",
+                               bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt releases the GIL while hashing, so a bounded thread pool keeps it off
+# the event loop and request threads without the overhead of worker processes
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
 
 # OAuth2 scheme for token handling
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Principal cache configuration (TTL of 0 disables the cache)
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "1024"))
+
+class PrincipalCache:
+    """
+    Short-lived cache of authenticated users, keyed by access token.
+
+    Saves the user lookup that get_current_user would otherwise run on every
+    authenticated request. Entries live for at most ttl_seconds and never
+    beyond the token's own expiry. Call invalidate_user() whenever a user's
+    role, active flag, credentials or identity change; the TTL bounds
+    staleness for changes made by other processes.
+
+    Column values are stored rather than ORM objects, and every hit returns a
+    fresh transient User, so cached principals are never shared between
+    requests or sessions.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries = OrderedDict()  # token -> (expires_at, user_id, column values)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, token: str) -> Optional[models.User]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, _, values = entry
+            if expires_at <= time.monotonic():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+        return models.User(**values)
+
+    def set(self, token: str, user: models.User, token_expires_at: Optional[float] = None):
+        if not self.enabled:
+            return
+        values = {column.name: getattr(user, column.name) for column in models.User.__table__.columns}
+        expires_at = time.monotonic() + self.ttl_seconds
+        if token_expires_at is not None:
+            # Never outlive the token itself
+            expires_at = min(expires_at, time.monotonic() + max(0.0, token_expires_at - time.time()))
+        with self._lock:
+            self._entries[token] = (expires_at, user.id, values)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int):
+        """Drop every cached token belonging to a user"""
+        with self._lock:
+            for token in [token for token, entry in self._entries.items() if entry[1] == user_id]:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_SIZE)
+
 def verify_password(plain_password, hashed_password):
     try:
         return pwd_context.verify(plain_password, hashed_password)
@@ -49,18 +133,41 @@ def verify_password(plain_password, hashed_password):
             print(f"Password verification error: {inner_e}")
             return False
 
+def verify_and_update_password(plain_password, hashed_password):
+    """
+    Verify a password and return a replacement hash if the stored one uses an
+    outdated scheme or work factor.
+
+    Returns:
+        tuple: (verified, new_hash or None)
+    """
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except Exception:
+        return verify_password(plain_password, hashed_password), None
+
 def get_password_hash(password):
     return pwd_context.hash(password)
 
-def authenticate_user(db: Session, username: str, password: str):
+async def run_password_task(func, *args):
+    """Run a bcrypt operation on the password pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, func, *args)
+
+def hash_password_pooled(password):
+    """Same as get_password_hash, run on the password pool so request threads share its bound"""
+    return _password_executor.submit(get_password_hash, password).result()
+
+def _find_user_for_login(db: Session, username: str):
     # Find user by username or email
-    user = db.query(models.User).filter(
+    return db.query(models.User).filter(
         (models.User.username == username) | (models.User.email == username)
     ).first()
-    if not user:
-        return False
-    if not verify_password(password, user.hashed_password):
-        return False
+
+def _complete_login(db: Session, user: models.User, new_hash: Optional[str]):
+    # Store the upgraded hash if the work factor has changed
+    if new_hash:
+        user.hashed_password = new_hash
 
     # Update last login time
     user.last_login = datetime.utcnow()
@@ -68,6 +175,33 @@ def authenticate_user(db: Session, username: str, password: str):
 
     return user
 
+def authenticate_user(db: Session, username: str, password: str):
+    user = _find_user_for_login(db, username)
+    if not user:
+        return False
+    verified, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not verified:
+        return False
+
+    return _complete_login(db, user, new_hash)
+
+async def authenticate_user_async(db: Session, username: str, password: str):
+    """Same as authenticate_user, with bcrypt run on the password pool"""
+    user = _find_user_for_login(db, username)
+    if not user:
+        return False
+    hashed_password = user.hashed_password
+
+    # Return the connection to the pool while bcrypt runs; otherwise a login storm
+    # holds every pooled connection and the next lookup blocks the event loop
+    db.rollback()
+
+    verified, new_hash = await run_password_task(verify_and_update_password, password, hashed_password)
+    if not verified:
+        return False
+
+    return _complete_login(db, user, new_hash)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -93,6 +227,11 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
 
+    # The token has been verified, so a cached principal for it can be reused
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+
     # Try to find the user by username or email
     user = db.query(models.User).filter(
         (models.User.username == token_data.username) | (models.User.email == token_data.username)
@@ -101,6 +240,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     if user is None:
         raise credentials_exception
 
+    principal_cache.set(token, user, payload.get("exp"))
     return user
 
 def get_current_active_user(current_user: schemas.User = Depends(get_current_user)):
@@ -0,0 +1,248 @@
+"""
+Read endpoint benchmark against a synthetic organisation.
+
+Generates an organisation of the chosen scale into a scratch SQLite database
+(see synthetic_org.py), then drives the real FastAPI app in-process through
+TestClient and reports throughput, p50/p95/p99 latency and SQL queries per
+request (from the Server-Timing header) for every read endpoint.
+
+Results can be stored as a JSON baseline and compared with a later run; the
+comparison exits with status 1 when an endpoint's p50 regressed by more than
+--threshold percent.
+
+Usage:
+    python benchmarks/endpoint_benchmark.py --scale medium --output baseline.json
+    python benchmarks/endpoint_benchmark.py --scale medium --baseline baseline.json
+    python benchmarks/endpoint_benchmark.py --db-path /tmp/large_org.db --endpoints squads squad_detail
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARK_DIR)
+
+# Endpoint name -> path template; {placeholders} are filled with random existing ids
+ENDPOINTS = {
+    "areas": "/areas",
+    "area_detail": "/areas/{area_id}",
+    "tribes": "/tribes",
+    "tribes_by_area": "/tribes?area_id={area_id}",
+    "tribe_detail": "/tribes/{tribe_id}",
+    "squads": "/squads",
+    "squads_by_tribe": "/squads?tribe_id={tribe_id}",
+    "squad_detail": "/squads/{squad_id}",
+    "team_members": "/team-members",
+    "team_members_by_squad": "/team-members?squad_id={squad_id}",
+    "team_member_detail": "/team-members/{member_id}",
+    "services": "/services",
+    "services_by_squad": "/services?squad_id={squad_id}",
+    "service_detail": "/services/{service_id}",
+    "dependencies": "/dependencies",
+    "dependencies_by_squad": "/dependencies/{squad_id}",
+    "objectives": "/objectives",
+    "search": "/search?q={search_term}",
+}
+
+_SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+def parse_args():
+    """Parse command line arguments"""
+    sys.path.insert(0, BENCHMARK_DIR)
+    from synthetic_org import SCALES
+
+    parser = argparse.ArgumentParser(description='Benchmark the read endpoints against a synthetic organisation')
+    parser.add_argument('--scale', choices=list(SCALES), default='small', help='Organisation size (default: small)')
+    parser.add_argument('--db-path', type=str, default=None,
+                        help='Existing database generated by synthetic_org.py (skips generation)')
+    parser.add_argument('--requests', type=int, default=20, help='Measured requests per endpoint (default: 20)')
+    parser.add_argument('--warmup', type=int, default=2, help='Unmeasured requests per endpoint (default: 2)')
+    parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=None,
+                        help='Only benchmark these endpoints')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for data and ids (default: 42)')
+    parser.add_argument('--output', type=str, default=None, help='Write results as JSON to this file')
+    parser.add_argument('--baseline', type=str, default=None, help='Compare results with a previous JSON file')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='p50 regression (percent) that fails the comparison (default: 10)')
+
+    return parser.parse_args()
+
+def _configure_environment(db_path):
+    """Point the app at the benchmark database before any backend module is imported"""
+    os.environ["DB_TYPE"] = "sqlite"
+    os.environ["DB_PATH"] = db_path
+    os.environ.setdefault("JWT_SECRET_KEY", "endpoint-benchmark-secret")
+    # Keep log files and generated credentials out of the repository
+    scratch_dir = tempfile.mkdtemp(prefix="endpoint_benchmark_")
+    os.environ.setdefault("LOG_DIR", os.path.join(scratch_dir, "logs"))
+    os.environ.setdefault("CREDENTIALS_DIR", os.path.join(scratch_dir, "credentials"))
+    # Keep slow-request warnings out of the measurements
+    os.environ.setdefault("SLOW_REQUEST_THRESHOLD_MS", "600000")
+    os.environ.setdefault("QUERY_COUNT_WARNING_THRESHOLD", "1000000000")
+    sys.path.insert(0, BACKEND_DIR)
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+def _sample_ids(db):
+    """Existing ids to substitute into the path templates"""
+    import models
+
+    return {
+        "area_id": [row[0] for row in db.query(models.Area.id).all()],
+        "tribe_id": [row[0] for row in db.query(models.Tribe.id).all()],
+        "squad_id": [row[0] for row in db.query(models.Squad.id).all()],
+        "member_id": [row[0] for row in db.query(models.TeamMember.id).limit(10000).all()],
+        "service_id": [row[0] for row in db.query(models.Service.id).limit(10000).all()],
+        "search_term": ["Squad 1", "Person 12", "Service 3", "Tribe", "Area"],
+    }
+
+def benchmark_endpoint(client, template, ids, rng, requests, warmup):
+    """
+    Time `requests` GETs of one endpoint.
+
+    Returns:
+        dict: count, errors, throughput and latency/query statistics
+    """
+    def next_path():
+        return template.format(**{key: rng.choice(values) for key, values in ids.items() if values})
+
+    for _ in range(warmup):
+        client.get(next_path())
+
+    latencies = []
+    query_counts = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        path = next_path()
+        request_started = time.perf_counter()
+        response = client.get(path)
+        latencies.append(time.perf_counter() - request_started)
+        if response.status_code >= 400:
+            errors += 1
+        match = _SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+        if match:
+            query_counts.append(int(match.group(1)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "count": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+        "mean_queries": round(statistics.mean(query_counts), 1) if query_counts else None,
+    }
+
+def compare_with_baseline(results, baseline, threshold):
+    """
+    Print per-endpoint changes against a baseline.
+
+    Returns:
+        list: Names of endpoints whose p50 regressed by more than `threshold` percent
+    """
+    regressions = []
+    print(f"\n{'endpoint':<24} {'base p50':>10} {'p50':>10} {'change':>8} {'base q':>7} {'q':>7}")
+    for name, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous:
+            print(f"{name:<24} {'-':>10} {current['p50_ms']:>10.2f} {'new':>8}")
+            continue
+        change = (current["p50_ms"] - previous["p50_ms"]) / previous["p50_ms"] * 100 if previous["p50_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<24} {previous['p50_ms']:>10.2f} {current['p50_ms']:>10.2f} {change:>+7.1f}% "
+              f"{str(previous.get('mean_queries')):>7} {str(current.get('mean_queries')):>7}{flag}")
+    return regressions
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    generate = args.db_path is None
+    db_path = args.db_path or os.path.join(tempfile.mkdtemp(prefix="endpoint_benchmark_"), "benchmark.db")
+    _configure_environment(os.path.abspath(db_path))
+
+    import models
+    import db_initializer
+    from database import engine, SessionLocal
+    from synthetic_org import SCALES, generate_org
+
+    # Initialize up front so importing main does not generate admin credentials
+    models.Base.metadata.create_all(bind=engine)
+    db_initializer.initialize_database(admin_password="Benchmark1!")
+
+    db = SessionLocal()
+    try:
+        counts = None
+        if generate:
+            started = time.perf_counter()
+            counts = generate_org(db, seed=args.seed, **SCALES[args.scale])
+            print(f"Generated {args.scale} organisation in {time.perf_counter() - started:.1f}s: {counts}")
+        ids = _sample_ids(db)
+    finally:
+        db.close()
+
+    from fastapi.testclient import TestClient
+    import main
+
+    rng = random.Random(args.seed)
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": args.scale if generate else None,
+            "database": None if generate else os.path.abspath(db_path),
+            "counts": counts,
+            "requests": args.requests,
+            "warmup": args.warmup,
+        },
+        "endpoints": {},
+    }
+
+    # Server errors are counted per endpoint instead of aborting the run
+    with TestClient(main.app, raise_server_exceptions=False) as client:
+        for name in args.endpoints or list(ENDPOINTS):
+            stats = benchmark_endpoint(client, ENDPOINTS[name], ids, rng, args.requests, args.warmup)
+            results["endpoints"][name] = stats
+            print(f"{name:<24} {stats['throughput_rps']:>8.1f} req/s  p50={stats['p50_ms']:.1f}ms "
+                  f"p95={stats['p95_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms queries={stats['mean_queries']}"
+                  f"{'  errors=' + str(stats['errors']) if stats['errors'] else ''}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\np50 regressed by more than {args.threshold:g}%: {', '.join(regressions)}")
+            exit(1)
@@ -0,0 +1,133 @@
+"""
+Login throughput benchmark.
+
+Fires concurrent POST /token requests at the app in-process and reports login
+throughput, latency percentiles and the longest event loop stall observed
+while the logins were running. Use --mode inline to reproduce the previous
+behaviour of verifying bcrypt hashes directly on the event loop.
+
+Usage:
+    python benchmarks/login_benchmark.py --requests 200 --concurrency 50
+    python benchmarks/login_benchmark.py --mode inline --rounds 10
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark concurrent logins against POST /token')
+    parser.add_argument('--users', type=int, default=20, help='Number of distinct users to create (default: 20)')
+    parser.add_argument('--requests', type=int, default=200, help='Total number of logins (default: 200)')
+    parser.add_argument('--concurrency', type=int, default=50, help='Concurrent logins in flight (default: 50)')
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt work factor (default: 12)')
+    parser.add_argument('--workers', type=int, default=None, help='Password hashing workers (default: auth default)')
+    parser.add_argument('--mode', choices=['offload', 'inline'], default='offload',
+                        help='offload: bcrypt on the password pool; inline: bcrypt on the event loop')
+
+    return parser.parse_args()
+
+def _configure_environment(args, db_path):
+    """Point the app at a scratch database before any backend module is imported"""
+    os.environ["DB_TYPE"] = "sqlite"
+    os.environ["DB_PATH"] = db_path
+    os.environ.setdefault("JWT_SECRET_KEY", "login-benchmark-secret")
+    # Keep log files and generated credentials out of the repository
+    scratch_dir = tempfile.mkdtemp(prefix="login_benchmark_")
+    os.environ.setdefault("LOG_DIR", os.path.join(scratch_dir, "logs"))
+    os.environ.setdefault("CREDENTIALS_DIR", os.path.join(scratch_dir, "credentials"))
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["PRINCIPAL_CACHE_TTL_SECONDS"] = "0"
+    if args.workers:
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    sys.path.insert(0, BACKEND_DIR)
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def _monitor_event_loop(stop: asyncio.Event, interval: float = 0.01):
+    """Return the longest delay beyond `interval` seen between wake-ups"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+async def _run(args, usernames):
+    import httpx
+    import main
+
+    latencies = []
+    failures = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def login(client, username):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post("/token", data={"username": username, "password": "Benchmark1!"})
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                failures += 1
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(_monitor_event_loop(stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(login(client, usernames[i % len(usernames)]) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        worst_stall = await monitor
+
+    return latencies, failures, elapsed, worst_stall
+
+if __name__ == "__main__":
+    args = parse_args()
+    db_path = os.path.join(tempfile.mkdtemp(prefix="login_benchmark_"), "benchmark.db")
+    _configure_environment(args, db_path)
+
+    import auth
+    import models
+    import db_initializer
+    from database import SessionLocal
+
+    # Initialize up front so importing main does not generate admin credentials
+    db_initializer.initialize_database(admin_password="Benchmark1!")
+
+    db = SessionLocal()
+    try:
+        password_hash = auth.get_password_hash("Benchmark1!")
+        usernames = [f"bench{i}" for i in range(args.users)]
+        for username in usernames:
+            db.add(models.User(username=username, email=f"{username}@example.com",
+                               hashed_password=password_hash, role="guest", is_active=True))
+        db.commit()
+    finally:
+        db.close()
+
+    if args.mode == 'inline':
+        async def _authenticate_inline(db, username, password):
+            return auth.authenticate_user(db, username, password)
+        auth.authenticate_user_async = _authenticate_inline
+
+    latencies, failures, elapsed, worst_stall = asyncio.run(_run(args, usernames))
+
+    print(f"Mode: {args.mode}, bcrypt rounds: {args.rounds}, password workers: {auth.PASSWORD_HASH_WORKERS}")
+    print(f"Logins: {args.requests} ({failures} failed), concurrency: {args.concurrency}")
+    print(f"Throughput: {args.requests / elapsed:.1f} logins/s over {elapsed:.2f}s")
+    print(f"Latency: p50={_percentile(latencies, 50) * 1000:.0f}ms "
+          f"p95={_percentile(latencies, 95) * 1000:.0f}ms "
+          f"p99={_percentile(latencies, 99) * 1000:.0f}ms "
+          f"mean={statistics.mean(latencies) * 1000:.0f}ms")
+    print(f"Longest event loop stall: {worst_stall * 1000:.0f}ms")
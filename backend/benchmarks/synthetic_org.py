@@ -0,0 +1,253 @@
+"""
+Synthetic organisation generator for benchmarks.
+
+Builds areas, tribes, squads, team members (with squad memberships and
+supervisors), services and dependencies through the existing models, using
+multi-row INSERTs so the large scale takes seconds rather than minutes.
+Stored member counts and capacities are filled in the same way the loaders
+do, so list and detail endpoints behave as with real data. Generation is
+deterministic for a given seed.
+
+Usage (standalone, into a fresh SQLite file):
+    python benchmarks/synthetic_org.py --db-path /tmp/large_org.db --scale large
+
+From another benchmark (after the database environment is configured):
+    from synthetic_org import SCALES, generate_org
+    counts = generate_org(db, **SCALES["medium"])
+"""
+
+import os
+import sys
+import random
+import tempfile
+import argparse
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Preset sizes
+SCALES = {
+    "small": {"areas": 3, "tribes": 15, "squads": 75, "members": 1000, "services": 300, "dependencies": 500},
+    "medium": {"areas": 10, "tribes": 100, "squads": 1000, "members": 20000, "services": 4000, "dependencies": 10000},
+    "large": {"areas": 50, "tribes": 500, "squads": 5000, "members": 100000, "services": 20000, "dependencies": 50000},
+}
+
+ROLES = ["Engineer", "Senior Engineer", "Tech Lead", "Product Owner", "Designer", "QA Engineer", "Engineering Manager"]
+FUNCTIONS = ["Engineering", "Product", "Design", "Quality", "Data"]
+GEOGRAPHIES = ["UK", "Europe", "AMEA"]
+LOCATIONS = ["London", "Newbury", "Dusseldorf", "Madrid", "Pune", "Cairo"]
+VENDORS = ["Vendor A", "Vendor B", "Vendor C"]
+TEAM_TYPES = ["stream_aligned", "platform", "enabling", "complicated_subsystem"]
+SERVICE_TYPES = ["api", "repo", "platform", "webpage", "app_module"]
+SERVICE_STATUSES = ["healthy"] * 8 + ["degraded", "down"]
+INTERACTION_MODES = ["x_as_a_service", "collaboration", "facilitating"]
+FREQUENCIES = ["Regular", "As needed", "Scheduled"]
+AREA_LABELS = ["CFU_ALIGNED", "PLATFORM_GROUP", "DIGITAL"]  # stored as enum names
+
+# Rows per INSERT statement
+_BATCH_SIZE = 5000
+
+def _insert(db, table, rows):
+    from sqlalchemy import insert
+    for start in range(0, len(rows), _BATCH_SIZE):
+        db.execute(insert(table), rows[start:start + _BATCH_SIZE])
+
+def _next_id(db, table):
+    from sqlalchemy import func, select
+    return (db.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+def generate_org(db, areas: int, tribes: int, squads: int, members: int, services: int, dependencies: int,
+                 seed: int = 42, vacancy_rate: float = 0.03, subcon_rate: float = 0.25,
+                 multi_squad_rate: float = 0.1):
+    """
+    Insert a synthetic organisation and commit.
+
+    Explicit ids are assigned (continuing after existing rows) so related rows
+    can be inserted in bulk without reading ids back.
+
+    Returns:
+        dict: Number of rows created per table
+    """
+    import models
+    from snapshots import reset_sequence
+
+    rng = random.Random(seed)
+    tribes = max(tribes, areas)
+    squads = max(squads, tribes)
+
+    area_start = _next_id(db, models.Area.__table__)
+    tribe_start = _next_id(db, models.Tribe.__table__)
+    squad_start = _next_id(db, models.Squad.__table__)
+    member_start = _next_id(db, models.TeamMember.__table__)
+    service_start = _next_id(db, models.Service.__table__)
+
+    area_ids = list(range(area_start, area_start + areas))
+    tribe_ids = list(range(tribe_start, tribe_start + tribes))
+    squad_ids = list(range(squad_start, squad_start + squads))
+    member_ids = list(range(member_start, member_start + members))
+
+    # Spread children evenly, so every area has tribes and every tribe squads
+    tribe_area = {tribe_id: area_ids[index % areas] for index, tribe_id in enumerate(tribe_ids)}
+    squad_tribe = {squad_id: tribe_ids[index % tribes] for index, squad_id in enumerate(squad_ids)}
+
+    # Members and memberships, tracking the stored aggregates per squad
+    member_rows = []
+    membership_rows = []
+    stats = defaultdict(lambda: defaultdict(float))
+    leads_by_squad = {}
+    for index, member_id in enumerate(member_ids):
+        is_vacancy = rng.random() < vacancy_rate
+        employment_type = "subcon" if rng.random() < subcon_rate else "core"
+        home_squad = squad_ids[index % squads]
+        supervisor_id = leads_by_squad.get(home_squad)
+        is_lead = supervisor_id is None and not is_vacancy
+        if is_lead:
+            leads_by_squad[home_squad] = member_id
+
+        member_rows.append({
+            "id": member_id,
+            "name": f"Vacancy {member_id}" if is_vacancy else f"Person {member_id}",
+            "email": None if is_vacancy else f"person{member_id}@example.com",
+            "role": "Tech Lead" if is_lead else rng.choice(ROLES),
+            "function": rng.choice(FUNCTIONS),
+            "supervisor_id": supervisor_id,
+            "location": rng.choice(LOCATIONS),
+            "geography": rng.choice(GEOGRAPHIES),
+            "employment_type": employment_type,
+            "vendor_name": rng.choice(VENDORS) if employment_type == "subcon" else None,
+            "is_external": False,
+            "is_vacancy": is_vacancy,
+        })
+
+        assignments = [(home_squad, 1.0)]
+        if rng.random() < multi_squad_rate and squads > 1:
+            other_squad = rng.choice(squad_ids)
+            if other_squad != home_squad:
+                assignments = [(home_squad, 0.5), (other_squad, 0.5)]
+
+        for squad_id, capacity in assignments:
+            membership_rows.append({"member_id": member_id, "squad_id": squad_id, "capacity": capacity,
+                                    "role": member_rows[-1]["role"]})
+            if not is_vacancy:
+                squad_stats = stats[squad_id]
+                squad_stats["member_count"] += 1
+                squad_stats["total_capacity"] += capacity
+                squad_stats[f"{employment_type}_count"] += 1
+                squad_stats[f"{employment_type}_capacity"] += capacity
+
+    def aggregate_row(totals):
+        return {
+            "member_count": int(totals["member_count"]),
+            "core_count": int(totals["core_count"]),
+            "subcon_count": int(totals["subcon_count"]),
+            "total_capacity": round(totals["total_capacity"], 2),
+            "core_capacity": round(totals["core_capacity"], 2),
+            "subcon_capacity": round(totals["subcon_capacity"], 2),
+        }
+
+    tribe_stats = defaultdict(lambda: defaultdict(float))
+    for squad_id, squad_stats in stats.items():
+        for key, value in squad_stats.items():
+            tribe_stats[squad_tribe[squad_id]][key] += value
+    area_stats = defaultdict(lambda: defaultdict(float))
+    for tribe_id, totals in tribe_stats.items():
+        for key, value in totals.items():
+            area_stats[tribe_area[tribe_id]][key] += value
+
+    _insert(db, models.Area.__table__, [
+        {"id": area_id, "name": f"Area {area_id}", "description": f"Synthetic area {area_id}",
+         "label": rng.choice(AREA_LABELS), **aggregate_row(area_stats[area_id])}
+        for area_id in area_ids
+    ])
+    _insert(db, models.Tribe.__table__, [
+        {"id": tribe_id, "name": f"Tribe {tribe_id}", "description": f"Synthetic tribe {tribe_id}",
+         "area_id": tribe_area[tribe_id], "label": rng.choice(AREA_LABELS), **aggregate_row(tribe_stats[tribe_id])}
+        for tribe_id in tribe_ids
+    ])
+    _insert(db, models.Squad.__table__, [
+        {"id": squad_id, "name": f"Squad {squad_id}", "description": f"Synthetic squad {squad_id}",
+         "status": "Active", "timezone": "UTC", "team_type": rng.choice(TEAM_TYPES),
+         "tribe_id": squad_tribe[squad_id], "slack_channel": f"#squad-{squad_id}",
+         "email_contact": f"squad{squad_id}@example.com", **aggregate_row(stats[squad_id])}
+        for squad_id in squad_ids
+    ])
+    _insert(db, models.TeamMember.__table__, member_rows)
+    _insert(db, models.squad_members, membership_rows)
+
+    _insert(db, models.Service.__table__, [
+        {"id": service_id, "name": f"Service {service_id}", "description": f"Synthetic service {service_id}",
+         "status": rng.choice(SERVICE_STATUSES), "uptime": round(rng.uniform(95, 100), 2),
+         "version": f"{rng.randint(1, 5)}.{rng.randint(0, 20)}.{rng.randint(0, 50)}",
+         "squad_id": rng.choice(squad_ids), "service_type": rng.choice(SERVICE_TYPES),
+         "url": f"https://service-{service_id}.example.com"}
+        for service_id in range(service_start, service_start + services)
+    ])
+
+    # Dependencies between distinct squads, without duplicate pairs
+    pairs = set()
+    max_pairs = squads * (squads - 1)
+    while len(pairs) < min(dependencies, max_pairs):
+        dependent, dependency = rng.sample(squad_ids, 2)
+        pairs.add((dependent, dependency))
+    _insert(db, models.Dependency.__table__, [
+        {"dependent_squad_id": dependent, "dependency_squad_id": dependency,
+         "dependency_name": f"Squad {dependency} APIs", "interaction_mode": rng.choice(INTERACTION_MODES),
+         "interaction_frequency": rng.choice(FREQUENCIES)}
+        for dependent, dependency in sorted(pairs)
+    ])
+
+    # Explicit ids bypass PostgreSQL sequences; move them past the new rows
+    for table in (models.Area.__table__, models.Tribe.__table__, models.Squad.__table__,
+                  models.TeamMember.__table__, models.Service.__table__):
+        reset_sequence(db, table)
+
+    db.commit()
+    return {
+        "areas": areas,
+        "tribes": tribes,
+        "squads": squads,
+        "members": members,
+        "memberships": len(membership_rows),
+        "services": services,
+        "dependencies": len(pairs),
+    }
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Generate a synthetic organisation into a fresh SQLite database')
+    parser.add_argument('--db-path', type=str, required=True, help='SQLite database file to create')
+    parser.add_argument('--scale', choices=list(SCALES), default='small', help='Preset size (default: small)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    for name in SCALES['small']:
+        parser.add_argument(f'--{name}', type=int, default=None, help=f'Override the number of {name}')
+
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    import time
+
+    args = parse_args()
+    if os.path.exists(args.db_path):
+        print(f"{args.db_path} already exists; choose a new file")
+        exit(1)
+
+    os.environ["DB_TYPE"] = "sqlite"
+    os.environ["DB_PATH"] = os.path.abspath(args.db_path)
+    # Keep log files out of the repository
+    os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="synthetic_org_logs_"))
+    sys.path.insert(0, BACKEND_DIR)
+
+    import models
+    from database import engine, SessionLocal
+
+    models.Base.metadata.create_all(bind=engine)
+    sizes = {name: getattr(args, name) if getattr(args, name) is not None else value
+             for name, value in SCALES[args.scale].items()}
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        counts = generate_org(db, seed=args.seed, **sizes)
+        print(f"Generated {counts} in {time.perf_counter() - started:.1f}s into {args.db_path}")
+    finally:
+        db.close()
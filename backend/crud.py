@@ -7,6 +7,8 @@ from datetime import datetime
 import models
 import schemas
 import user_crud
+import aggregate_views
+import dependency_graph
 from database import db_config
 from logger import get_logger, log_and_handle_exception
 
@@ -120,6 +122,9 @@ def get_areas(db: Session) -> List[models.Area]:
                     area_id=area.id,
                     area_name=getattr(area, 'name', 'unknown')
                 )
+
+        # Use SQL-side aggregates for counts and capacity if enabled
+        aggregate_views.apply_member_stats(db, "area", areas)
         return areas
     except Exception as e:
         log_and_handle_exception(
@@ -152,6 +157,11 @@ def get_area(db: Session, area_id: int) -> Optional[models.Area]:
                     area_id=area_id,
                     area_name=getattr(area, 'name', 'unknown')
                 )
+
+            # Use SQL-side aggregates for counts and capacity if enabled
+            if aggregate_views.AGGREGATE_VIEWS_ENABLED:
+                aggregate_views.apply_member_stats(db, "area", [area])
+                aggregate_views.apply_member_stats(db, "tribe", list(area.tribes))
         else:
             logger.warning(f"Area with ID={area_id} not found")
 
@@ -175,6 +185,9 @@ def get_tribes(db: Session) -> List[models.Tribe]:
         if edited_description is not None:
             tribe.description = edited_description
 
+    # Use SQL-side aggregates for counts and capacity if enabled
+    aggregate_views.apply_member_stats(db, "tribe", tribes)
+
     return tribes
 
 def get_tribes_by_area(db: Session, area_id: int) -> List[models.Tribe]:
@@ -186,6 +199,9 @@ def get_tribes_by_area(db: Session, area_id: int) -> List[models.Tribe]:
         if edited_description is not None:
             tribe.description = edited_description
 
+    # Use SQL-side aggregates for counts and capacity if enabled
+    aggregate_views.apply_member_stats(db, "tribe", tribes)
+
     return tribes
 
 def get_tribe(db: Session, tribe_id: int) -> Optional[models.Tribe]:
@@ -197,6 +213,11 @@ def get_tribe(db: Session, tribe_id: int) -> Optional[models.Tribe]:
         if edited_description is not None:
             tribe.description = edited_description
 
+        # Use SQL-side aggregates for counts and capacity if enabled
+        if aggregate_views.AGGREGATE_VIEWS_ENABLED:
+            aggregate_views.apply_member_stats(db, "tribe", [tribe])
+            aggregate_views.apply_member_stats(db, "squad", list(tribe.squads))
+
     return tribe
 
 # Squad operations
@@ -209,6 +230,9 @@ def get_squads(db: Session) -> List[models.Squad]:
         if edited_description is not None:
             squad.description = edited_description
 
+    # Use SQL-side aggregates for counts and capacity if enabled
+    aggregate_views.apply_member_stats(db, "squad", squads)
+
     return squads
 
 def get_squads_by_tribe(db: Session, tribe_id: int) -> List[models.Squad]:
@@ -220,6 +244,9 @@ def get_squads_by_tribe(db: Session, tribe_id: int) -> List[models.Squad]:
         if edited_description is not None:
             squad.description = edited_description
 
+    # Use SQL-side aggregates for counts and capacity if enabled
+    aggregate_views.apply_member_stats(db, "squad", squads)
+
     return squads
 
 def get_squad(db: Session, squad_id: int) -> Optional[models.Squad]:
@@ -234,6 +261,9 @@ def get_squad(db: Session, squad_id: int) -> Optional[models.Squad]:
     if edited_description is not None:
         squad.description = edited_description
 
+    # Use SQL-side aggregates for counts and capacity if enabled
+    aggregate_views.apply_member_stats(db, "squad", [squad])
+
     # We'll store capacity and role information separately as metadata
     # Query the squad members junction table
     squad_members_table = get_table_name("squad_members")
@@ -642,6 +672,7 @@ def create_dependency(db: Session, dependent_id: int, dependency_id: int, depend
 
     # Add and commit to database
     db.add(db_dependency)
+    dependency_graph.mark_changed(db)
     db.commit()
 
     # Instead of using refresh (which causes issues with enum conversion),
@@ -685,6 +716,7 @@ def update_dependency(db: Session, dependency_id: int, dependency_data: schemas.
     for key, value in update_data.items():
         setattr(db_dependency, key, value)
 
+    dependency_graph.mark_changed(db)
     db.commit()
 
     # Get a fresh instance to avoid refresh issues
@@ -697,6 +729,7 @@ def delete_dependency(db: Session, dependency_id: int) -> bool:
         return False
 
     db.delete(db_dependency)
+    dependency_graph.mark_changed(db)
     db.commit()
     return True
 
@@ -49,8 +49,8 @@ except ImportError:
 # Initialize logger for early logging
 logger = get_db_logger()
 
-# Base declarative for all models
-Base = declarative_base()
+# Base declarative for all models (Any, as mypy cannot use the returned class as a base)
+Base: Any = declarative_base()
 
 # Fixed application schema name for PostgreSQL
 APP_SCHEMA_NAME = "who_what_where"
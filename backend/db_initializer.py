@@ -505,8 +505,8 @@ def save_admin_credentials(username, email, password):
     """
     try:
         # Create credentials directory if it doesn't exist
-        creds_dir = Path("../credentials")
-        creds_dir.mkdir(exist_ok=True, mode=0o700)  # Secure permissions
+        creds_dir = Path(os.environ.get("CREDENTIALS_DIR", "../credentials"))
+        creds_dir.mkdir(parents=True, exist_ok=True, mode=0o700)  # Secure permissions
 
         # Create credentials file
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
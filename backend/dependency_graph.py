@@ -0,0 +1,363 @@
+"""
+In-memory graph of squad dependencies.
+
+The `dependencies` table is read once (one query for the squads, one for the
+edges) and turned into compact integer-indexed adjacency arrays: squads are
+numbered 0..n-1 in id order and both edge directions are stored in CSR form
+(`indptr`/`indices` numpy arrays), so traversals never touch the database.
+
+An edge points from the dependent squad to the squad it depends on:
+
+- upstream of a squad: everything it depends on, transitively
+- downstream of a squad: everything that depends on it, transitively
+
+The graph is rebuilt lazily. Writers call mark_changed() before committing
+a change to dependencies, squads, tribes or areas (impact analysis and the
+layout are keyed by graph version); the local graph is dropped after the
+commit. Other workers rebuild once their copy is older than
+DEPENDENCY_GRAPH_MAX_AGE_SECONDS.
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+import models
+from logger import get_logger
+
+# Initialize logger
+logger = get_logger('dependency_graph', log_level='INFO')
+
+# Configuration
+DEPENDENCY_GRAPH_MAX_AGE_SECONDS = float(os.environ.get("DEPENDENCY_GRAPH_MAX_AGE_SECONDS", "60"))
+
+_INTERACTION_MODES = ("x_as_a_service", "collaboration", "facilitating")
+
+def normalize_interaction_mode(value: Optional[str]) -> Optional[str]:
+    """Lowercase known interaction modes (older rows hold the enum names)"""
+    if value and value.lower() in _INTERACTION_MODES:
+        return value.lower()
+    return value
+
+def _csr(rows: np.ndarray, columns: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(indptr, indices, edge positions) of the edges rows -> columns, grouped by row"""
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+    return indptr, columns[order], order
+
+def _expand(indptr: np.ndarray, indices: np.ndarray, frontier: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Neighbours of every frontier node, with the frontier node each one was reached from"""
+    starts = indptr[frontier]
+    counts = indptr[frontier + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+    return indices[offsets], np.repeat(frontier, counts)
+
+class DependencyGraph:
+    """Immutable snapshot of the dependency table"""
+
+    def __init__(self, squads: List[Tuple[int, str]], dependencies: List[Dict[str, Any]], version: int = 0):
+        squads = sorted(squads)
+        self.squad_ids = np.array([squad_id for squad_id, _ in squads], dtype=np.int64)
+        self.squad_names = [name for _, name in squads]
+        self.position = {squad_id: i for i, (squad_id, _) in enumerate(squads)}
+        # API rows in id order, as returned by GET /dependencies
+        self.dependencies = dependencies
+        # Increases with every build, so results derived from a graph can be cached per version
+        self.version = version
+        self.built_at = time.monotonic()
+
+        # Only edges between two known squads take part in traversals
+        edges = [(d["id"], self.position[d["dependent_squad_id"]], self.position[d["dependency_squad_id"]])
+                 for d in dependencies
+                 if d["dependent_squad_id"] in self.position and d["dependency_squad_id"] in self.position]
+        size = len(squads)
+        self.edge_ids = np.array([edge[0] for edge in edges], dtype=np.int64)
+        sources = np.array([edge[1] for edge in edges], dtype=np.int64)
+        targets = np.array([edge[2] for edge in edges], dtype=np.int64)
+        self.out_indptr, self.out_indices, self.out_edges = _csr(sources, targets, size)
+        self.in_indptr, self.in_indices, self.in_edges = _csr(targets, sources, size)
+        self.sources = sources
+        self.targets = targets
+        self._components: Optional[List[List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.squad_names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_ids)
+
+    def has_squad(self, squad_id: int) -> bool:
+        return squad_id in self.position
+
+    def squad(self, position: int, **extra) -> Dict[str, Any]:
+        return {"squad_id": int(self.squad_ids[position]), "squad_name": self.squad_names[position], **extra}
+
+    def _levels(self, start: int, upstream: bool, max_depth: Optional[int]) -> np.ndarray:
+        """Breadth-first distance of every squad from `start` (-1 when unreachable)"""
+        indptr, indices = (self.out_indptr, self.out_indices) if upstream else (self.in_indptr, self.in_indices)
+        depth = np.full(len(self), -1, dtype=np.int64)
+        depth[start] = 0
+        frontier = np.array([start], dtype=np.int64)
+        level = 0
+        while frontier.size and (max_depth is None or level < max_depth):
+            level += 1
+            neighbours, _ = _expand(indptr, indices, frontier)
+            neighbours = np.unique(neighbours)
+            frontier = neighbours[depth[neighbours] < 0]
+            depth[frontier] = level
+        return depth
+
+    def reach(self, squad_id: int, upstream: bool = True, max_depth: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Positions and depths of the squads reachable from `squad_id` (not
+        including it), nearest first.
+
+        Args:
+            upstream: Follow dependencies (True) or dependents (False)
+            max_depth: Stop after this many hops (None for the full closure)
+        """
+        depth = self._levels(self.position[squad_id], upstream, max_depth)
+        reached = np.flatnonzero(depth > 0)
+        reached = reached[np.lexsort((reached, depth[reached]))]
+        return reached, depth[reached]
+
+    def closure(self, squad_id: int, upstream: bool = True, max_depth: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Squads reachable from `squad_id` with their depth (see reach())"""
+        reached, depths = self.reach(squad_id, upstream, max_depth)
+        return [self.squad(i, depth=depth) for i, depth in zip(reached.tolist(), depths.tolist())]
+
+    def shortest_path(self, from_squad_id: int, to_squad_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Fewest-hop chain of dependencies from one squad to another.
+
+        Returns:
+            dict: squads along the path (both ends included) and the ids of the
+            dependencies followed, or None if `to` is not upstream of `from`
+        """
+        start, goal = self.position[from_squad_id], self.position[to_squad_id]
+        parent = np.full(len(self), -1, dtype=np.int64)
+        parent[start] = start
+        frontier = np.array([start], dtype=np.int64)
+        while frontier.size and parent[goal] < 0:
+            neighbours, origins = _expand(self.out_indptr, self.out_indices, frontier)
+            unseen = parent[neighbours] < 0
+            neighbours, origins = neighbours[unseen], origins[unseen]
+            # First origin wins, so the result does not depend on duplicate edges
+            neighbours, first = np.unique(neighbours, return_index=True)
+            parent[neighbours] = origins[first]
+            frontier = neighbours
+        if parent[goal] < 0:
+            return None
+
+        path = [goal]
+        while path[-1] != start:
+            path.append(int(parent[path[-1]]))
+        path.reverse()
+
+        dependency_ids = []
+        for source, target in zip(path, path[1:]):
+            edges = self.out_edges[self.out_indptr[source]:self.out_indptr[source + 1]]
+            edge = edges[self.targets[edges] == target][0]
+            dependency_ids.append(int(self.edge_ids[edge]))
+        return {
+            "from_squad_id": from_squad_id,
+            "to_squad_id": to_squad_id,
+            "length": len(path) - 1,
+            "squads": [self.squad(i) for i in path],
+            "dependency_ids": dependency_ids,
+        }
+
+    def strongly_connected_components(self) -> List[List[int]]:
+        """All strongly connected components as lists of positions (iterative Tarjan)"""
+        if self._components is not None:
+            return self._components
+
+        indptr = self.out_indptr.tolist()
+        indices = self.out_indices.tolist()
+        size = len(self)
+        index = [-1] * size
+        lowlink = [0] * size
+        on_stack = [False] * size
+        stack: List[int] = []
+        components: List[List[int]] = []
+        counter = 0
+
+        for root in range(size):
+            if index[root] >= 0:
+                continue
+            # (node, next neighbour offset) frames instead of recursion
+            work = [(root, indptr[root])]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            while work:
+                node, offset = work[-1]
+                if offset < indptr[node + 1]:
+                    work[-1] = (node, offset + 1)
+                    neighbour = indices[offset]
+                    if index[neighbour] < 0:
+                        index[neighbour] = lowlink[neighbour] = counter
+                        counter += 1
+                        stack.append(neighbour)
+                        on_stack[neighbour] = True
+                        work.append((neighbour, indptr[neighbour]))
+                    elif on_stack[neighbour]:
+                        lowlink[node] = min(lowlink[node], index[neighbour])
+                    continue
+
+                work.pop()
+                if work:
+                    caller = work[-1][0]
+                    lowlink[caller] = min(lowlink[caller], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+        self._components = components
+        return components
+
+    def cycles(self) -> List[Dict[str, Any]]:
+        """
+        Groups of squads that depend on each other in a cycle.
+
+        Strongly connected components with more than one squad, plus squads
+        that depend on themselves, largest first.
+        """
+        self_loops = set(self.sources[self.sources == self.targets].tolist())
+        component_of = np.full(len(self), -1, dtype=np.int64)
+        cycles = []
+        for component in self.strongly_connected_components():
+            if len(component) < 2 and component[0] not in self_loops:
+                continue
+            component_of[component] = len(cycles)
+            cycles.append(sorted(component, key=lambda i: (self.squad_names[i].lower(), i)))
+
+        # Dependencies that stay inside a cycle
+        inside = (component_of[self.sources] >= 0) & (component_of[self.sources] == component_of[self.targets])
+        dependency_ids: List[List[int]] = [[] for _ in cycles]
+        for edge in np.flatnonzero(inside):
+            dependency_ids[component_of[self.sources[edge]]].append(int(self.edge_ids[edge]))
+
+        result = [
+            {"squads": [self.squad(i) for i in members], "dependency_ids": sorted(edge_ids)}
+            for members, edge_ids in zip(cycles, dependency_ids)
+        ]
+        result.sort(key=lambda cycle: (-len(cycle["squads"]), cycle["squads"][0]["squad_name"].lower()))
+        return result
+
+def load_graph(db: Session, version: int = 0) -> DependencyGraph:
+    """Build a graph from the squads and dependencies tables"""
+    squads = [(row.id, row.name) for row in db.execute(select(models.Squad.id, models.Squad.name))]
+    names = dict(squads)
+
+    dependencies = []
+    for row in db.execute(select(models.Dependency.__table__).order_by(models.Dependency.id)):
+        # Same rows as crud.get_all_dependencies: the depended-on squad must exist
+        if row.dependency_squad_id not in names:
+            continue
+        dependencies.append({
+            "id": row.id,
+            "dependent_squad_id": row.dependent_squad_id,
+            "dependency_squad_id": row.dependency_squad_id,
+            "dependency_name": row.dependency_name,
+            "interaction_mode": normalize_interaction_mode(row.interaction_mode),
+            "interaction_frequency": row.interaction_frequency,
+            "dependency_squad_name": names[row.dependency_squad_id],
+        })
+    return DependencyGraph(squads, dependencies, version)
+
+class DependencyGraphCache:
+    """Lazily built graph, dropped on local changes and rebuilt after max_age seconds"""
+
+    def __init__(self, max_age: float = DEPENDENCY_GRAPH_MAX_AGE_SECONDS):
+        self.max_age = max_age
+        self._graph: Optional[DependencyGraph] = None
+        # Bumped by invalidate() so a build that raced with a change is not kept
+        self._generation = 0
+        self._builds = 0
+        # The build in progress, shared by every caller that needs the graph meanwhile
+        self._build: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def _current(self) -> Optional[DependencyGraph]:
+        graph = self._graph
+        if graph is not None and time.monotonic() - graph.built_at < self.max_age:
+            return graph
+        return None
+
+    def get(self, db: Session) -> DependencyGraph:
+        graph = self._current()
+        if graph is not None:
+            return graph
+
+        # One build at a time; later callers wait for its result. The queries
+        # run without the lock, which is only taken to join or publish a build.
+        with self._lock:
+            graph = self._current()
+            if graph is not None:
+                return graph
+            build = self._build
+            if build is None:
+                build = self._build = Future()
+                generation = self._generation
+                self._builds += 1
+                version = self._builds
+            else:
+                generation = None
+        if generation is None:
+            return build.result()
+
+        started = time.perf_counter()
+        try:
+            graph = load_graph(db, version)
+        except BaseException as e:
+            with self._lock:
+                if self._build is build:
+                    self._build = None
+            build.set_exception(e)
+            raise
+        with self._lock:
+            if generation == self._generation:
+                self._graph = graph
+            if self._build is build:
+                self._build = None
+        build.set_result(graph)
+        logger.info(f"Dependency graph built: {len(graph)} squads, {graph.edge_count} dependencies "
+                    f"in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return graph
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._graph = None
+            # Callers arriving after a change must not join a build that may predate it
+            self._build = None
+
+dependency_graph_cache = DependencyGraphCache()
+
+def get_graph(db: Session) -> DependencyGraph:
+    return dependency_graph_cache.get(db)
+
+def mark_changed(db: Session):
+    """Drop the local graph once the caller's transaction commits"""
+    # Dropping it before the commit would let a concurrent read rebuild from the old rows
+    event.listen(db, "after_commit", lambda session: dependency_graph_cache.invalidate(), once=True)
@@ -0,0 +1,341 @@
+"""
+Precomputed layout of the squad dependency map.
+
+Positions are computed on the server from the cached dependency graph (see
+dependency_graph.py) and the tribe/area membership loaded for impact analysis,
+so the browser only draws them. Squads are clustered by tribe and tribes by
+area:
+
+- squads of a tribe sit on a sunflower spiral around the tribe centre, most
+  connected first (closest to the centre)
+- tribes of an area, and then the areas themselves, are packed greedily
+  along an outward spiral, largest first, without overlapping
+
+Squads without a tribe form one extra cluster, as do tribes without an area.
+The layout is deterministic and cached per graph version.
+
+Levels of detail:
+
+- squad: one node per squad and one edge per dependency
+- tribe / area: one super-node per cluster (at the cluster centre, sized by
+  its squad count) and one edge per pair of clusters, weighted by the number
+  of dependencies between them; dependencies inside a cluster are counted
+  in the node's `internal` column
+
+Payloads are columnar JSON. With format=binary the same layout is sent as
+little-endian arrays, without names:
+
+    header   4s magic b"DMAP", uint32 graph version, uint32 level (0 squad,
+             1 tribe, 2 area), uint32 node count n, uint32 edge count m
+    nodes    float32 x[n], y[n], radius[n]; int32 id[n], tribe_id[n],
+             area_id[n], size[n], internal[n] (-1 for missing ids)
+    edges    int32 source[m], target[m], weight[m]; uint8 interaction_mode[m]
+             (index into INTERACTION_MODES, 255 for none or aggregated edges)
+"""
+
+import os
+import math
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+import dependency_graph
+import impact_analysis
+from logger import get_logger
+
+# Initialize logger
+logger = get_logger('dependency_layout', log_level='INFO')
+
+# Configuration
+# Distance between neighbouring squads of a tribe, in layout units
+DEPENDENCY_LAYOUT_NODE_SPACING = float(os.environ.get("DEPENDENCY_LAYOUT_NODE_SPACING", "50"))
+
+LEVELS = ("squad", "tribe", "area")
+INTERACTION_MODES = ["x_as_a_service", "collaboration", "facilitating"]
+
+_BINARY_MAGIC = b"DMAP"
+_NO_MODE = 255
+_GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+# Layouts kept per (graph version, include_isolated); squad, tribe and area payloads share one layout
+_MAX_CACHED_LAYOUTS = 8
+
+def _sunflower(count: int, spacing: float) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Offsets of `count` evenly spread points around a centre, and the radius they cover"""
+    k = np.arange(count, dtype=np.float64)
+    r = spacing * np.sqrt(k + 0.5)
+    theta = k * _GOLDEN_ANGLE
+    radius = (float(r[-1]) if count else 0.0) + spacing / 2
+    return r * np.cos(theta), r * np.sin(theta), radius
+
+def _pack(radii: np.ndarray, padding: float) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    Centres for circles of the given radii, packed around the origin.
+
+    Circles are placed largest first at the first point of an Archimedean
+    spiral where they do not overlap any placed circle. Returns the centres
+    (in input order) and the radius of a circle around all of them.
+    """
+    count = len(radii)
+    xs = np.zeros(count)
+    ys = np.zeros(count)
+    if count == 0:
+        return xs, ys, 0.0
+
+    order = np.argsort(-radii, kind="stable")
+    # Spiral turns are one small circle apart; candidates are a few units apart along it
+    step = max(float(radii.min()) / 2, 1.0)
+    growth = (float(radii.min()) + padding) / (2 * math.pi)
+    placed = [order[0]]
+    for i in order[1:]:
+        required = radii[placed] + radii[i] + padding
+        start = 0
+        while True:
+            k = np.arange(start, start + 1024, dtype=np.float64)
+            theta = np.sqrt(2 * step * k / growth)
+            cx, cy = growth * theta * np.cos(theta), growth * theta * np.sin(theta)
+            distance = np.hypot(cx[:, None] - xs[placed][None, :], cy[:, None] - ys[placed][None, :])
+            fits = np.flatnonzero((distance >= required[None, :]).all(axis=1))
+            if fits.size:
+                xs[i], ys[i] = cx[fits[0]], cy[fits[0]]
+                break
+            start += 1024
+        placed.append(i)
+
+    return xs, ys, float((np.hypot(xs, ys) + radii).max())
+
+def _clusters(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct keys and, for every entry, the index of its key"""
+    return np.unique(keys, return_inverse=True)
+
+class DependencyLayout:
+    """Squad positions for one graph version, with tribe and area clusters"""
+
+    def __init__(self, graph: dependency_graph.DependencyGraph, rollups: impact_analysis.Rollups,
+                 include_isolated: bool = False, spacing: float = DEPENDENCY_LAYOUT_NODE_SPACING):
+        self.graph = graph
+        self.rollups = rollups
+        self.version = graph.version
+
+        degree = np.diff(graph.out_indptr) + np.diff(graph.in_indptr)
+        self.squads = np.arange(len(graph)) if include_isolated else np.flatnonzero(degree > 0)
+        # Position in self.squads of every graph position (-1 when left out)
+        self.index = np.full(len(graph), -1, dtype=np.int64)
+        self.index[self.squads] = np.arange(len(self.squads))
+
+        squad_tribe = rollups.squad_tribe[self.squads]
+        self.x = np.zeros(len(self.squads))
+        self.y = np.zeros(len(self.squads))
+        self.node_radius = spacing / 2
+
+        # Squads of a tribe around its centre, most connected first
+        self.tribes, self.squad_cluster = _clusters(squad_tribe)
+        tribe_radius = np.zeros(len(self.tribes))
+        for cluster in range(len(self.tribes)):
+            members = sorted(np.flatnonzero(self.squad_cluster == cluster).tolist(), key=lambda m: (
+                -degree[self.squads[m]], (graph.squad_names[self.squads[m]] or "").lower()
+            ))
+            self.x[members], self.y[members], tribe_radius[cluster] = _sunflower(len(members), spacing)
+
+        # Tribes of an area around its centre
+        tribe_area = np.array([rollups.tribe_area[t] if t >= 0 else -1 for t in self.tribes.tolist()], dtype=np.int64)
+        self.areas, self.tribe_cluster = _clusters(tribe_area)
+        tribe_x = np.zeros(len(self.tribes))
+        tribe_y = np.zeros(len(self.tribes))
+        area_radius = np.zeros(len(self.areas))
+        for cluster in range(len(self.areas)):
+            members = np.flatnonzero(self.tribe_cluster == cluster)
+            tribe_x[members], tribe_y[members], area_radius[cluster] = _pack(tribe_radius[members], spacing)
+
+        # Areas around the origin
+        area_x, area_y, _ = _pack(area_radius, spacing * 2)
+        tribe_x += area_x[self.tribe_cluster]
+        tribe_y += area_y[self.tribe_cluster]
+        self.x += tribe_x[self.squad_cluster]
+        self.y += tribe_y[self.squad_cluster]
+
+        self.tribe_x, self.tribe_y, self.tribe_radius = tribe_x, tribe_y, tribe_radius
+        self.area_x, self.area_y, self.area_radius = area_x, area_y, area_radius
+        self.squad_area_cluster = self.tribe_cluster[self.squad_cluster]
+
+        # Edges between laid out squads
+        keep = (self.index[graph.sources] >= 0) & (self.index[graph.targets] >= 0)
+        self.edge_sources = self.index[graph.sources[keep]]
+        self.edge_targets = self.index[graph.targets[keep]]
+        self.edge_ids = graph.edge_ids[keep]
+        modes = {row["id"]: row["interaction_mode"] for row in graph.dependencies}
+        self.edge_modes = np.array(
+            [INTERACTION_MODES.index(modes.get(i)) if modes.get(i) in INTERACTION_MODES else _NO_MODE
+             for i in self.edge_ids.tolist()],
+            dtype=np.uint8,
+        )
+
+    def _ids(self, positions: np.ndarray, ids: List[int]) -> List[Optional[int]]:
+        return [ids[p] if p >= 0 else None for p in positions.tolist()]
+
+    def _aggregate_edges(self, cluster: np.ndarray, size: int) -> Tuple[Dict[str, List], np.ndarray]:
+        """Edges between clusters weighted by dependency count, and per-cluster internal counts"""
+        sources, targets = cluster[self.edge_sources], cluster[self.edge_targets]
+        inside = sources == targets
+        internal = np.bincount(sources[inside], minlength=size)
+        pairs, weights = np.unique(sources[~inside] * size + targets[~inside], return_counts=True)
+        edges = {
+            "source": (pairs // size).tolist() if size else [],
+            "target": (pairs % size).tolist() if size else [],
+            "weight": weights.tolist(),
+            "id": None,
+            "interaction_mode": None,
+        }
+        return edges, internal
+
+    def payload(self, level: str = "squad") -> Dict[str, Any]:
+        """Columnar nodes and edges for one level of detail"""
+        rollups = self.rollups
+        if level == "squad":
+            nodes = {
+                "id": self.graph.squad_ids[self.squads].tolist(),
+                "name": [self.graph.squad_names[p] for p in self.squads.tolist()],
+                "x": self.x, "y": self.y,
+                "radius": np.full(len(self.squads), self.node_radius),
+                "tribe_id": self._ids(self.tribes[self.squad_cluster], rollups.tribe_ids),
+                "area_id": self._ids(self.areas[self.squad_area_cluster], rollups.area_ids),
+                "size": [1] * len(self.squads),
+                "internal": [0] * len(self.squads),
+            }
+            edges = {
+                "source": self.edge_sources.tolist(),
+                "target": self.edge_targets.tolist(),
+                "weight": [1] * len(self.edge_ids),
+                "id": self.edge_ids.tolist(),
+                "interaction_mode": [None if mode == _NO_MODE else mode for mode in self.edge_modes.tolist()],
+            }
+        elif level == "tribe":
+            edges, internal = self._aggregate_edges(self.squad_cluster, len(self.tribes))
+            nodes = {
+                "id": self._ids(self.tribes, rollups.tribe_ids),
+                "name": [rollups.tribe_names[t] if t >= 0 else "No tribe" for t in self.tribes.tolist()],
+                "x": self.tribe_x, "y": self.tribe_y, "radius": self.tribe_radius,
+                "tribe_id": self._ids(self.tribes, rollups.tribe_ids),
+                "area_id": self._ids(self.areas[self.tribe_cluster], rollups.area_ids),
+                "size": np.bincount(self.squad_cluster, minlength=len(self.tribes)).tolist(),
+                "internal": internal.tolist(),
+            }
+        elif level == "area":
+            edges, internal = self._aggregate_edges(self.squad_area_cluster, len(self.areas))
+            nodes = {
+                "id": self._ids(self.areas, rollups.area_ids),
+                "name": [rollups.area_names[a] if a >= 0 else "No area" for a in self.areas.tolist()],
+                "x": self.area_x, "y": self.area_y, "radius": self.area_radius,
+                "tribe_id": [None] * len(self.areas),
+                "area_id": self._ids(self.areas, rollups.area_ids),
+                "size": np.bincount(self.squad_area_cluster, minlength=len(self.areas)).tolist(),
+                "internal": internal.tolist(),
+            }
+        else:
+            raise ValueError(f"Unknown layout level: {level}")
+
+        x, y, radius = (np.round(np.asarray(nodes[column], dtype=np.float64), 1) for column in ("x", "y", "radius"))
+        nodes.update(x=x.tolist(), y=y.tolist(), radius=radius.tolist())
+        bounds = [round(float(value), 1) for value in ((x - radius).min(), (y - radius).min(),
+                                                       (x + radius).max(), (y + radius).max())] if len(x) else [0.0] * 4
+        return {
+            "graph_version": self.version,
+            "level": level,
+            "bounds": bounds,
+            "interaction_modes": INTERACTION_MODES,
+            "nodes": nodes,
+            "edges": edges,
+        }
+
+def encode_binary(payload: Dict[str, Any]) -> bytes:
+    """Pack a layout payload into the binary format described in the module docstring"""
+    nodes, edges = payload["nodes"], payload["edges"]
+
+    def ints(values):
+        return np.array([-1 if value is None else value for value in values], dtype="<i4").tobytes()
+
+    modes = edges["interaction_mode"] or [None] * len(edges["source"])
+    return b"".join([
+        struct.pack("<4sIIII", _BINARY_MAGIC, payload["graph_version"], LEVELS.index(payload["level"]),
+                    len(nodes["id"]), len(edges["source"])),
+        np.array(nodes["x"], dtype="<f4").tobytes(),
+        np.array(nodes["y"], dtype="<f4").tobytes(),
+        np.array(nodes["radius"], dtype="<f4").tobytes(),
+        ints(nodes["id"]), ints(nodes["tribe_id"]), ints(nodes["area_id"]), ints(nodes["size"]),
+        ints(nodes["internal"]),
+        ints(edges["source"]), ints(edges["target"]), ints(edges["weight"]),
+        np.array([_NO_MODE if mode is None else mode for mode in modes], dtype=np.uint8).tobytes(),
+    ])
+
+class LayoutCache:
+    """Layouts and encoded payloads cached per graph version"""
+
+    def __init__(self, max_layouts: int = _MAX_CACHED_LAYOUTS):
+        self.max_layouts = max_layouts
+        self._layouts = OrderedDict()  # (graph version, include_isolated) -> DependencyLayout
+        self._payloads: Dict[Tuple, Any] = {}  # (graph version, include_isolated, level, format) -> payload
+        self._builds: Dict[Tuple, Future] = {}  # (graph version, include_isolated) -> layout in progress
+        self._lock = threading.Lock()
+
+    def layout(self, db: Session, include_isolated: bool = False) -> DependencyLayout:
+        graph = dependency_graph.get_graph(db)
+        key = (graph.version, include_isolated)
+        # One build per key; later callers wait for its result. The rollup
+        # query and the layout run without the lock.
+        with self._lock:
+            layout = self._layouts.get(key)
+            if layout is not None:
+                return layout
+            build = self._builds.get(key)
+            leader = build is None
+            if leader:
+                build = self._builds[key] = Future()
+        if not leader:
+            return build.result()
+
+        try:
+            rollups = impact_analysis.impact_analyzer.rollups(db, graph)
+            layout = DependencyLayout(graph, rollups, include_isolated)
+        except BaseException as e:
+            with self._lock:
+                del self._builds[key]
+            build.set_exception(e)
+            raise
+        logger.info(f"Dependency layout computed for graph version {graph.version}: "
+                    f"{len(layout.squads)} squads, {len(layout.tribes)} tribes, {len(layout.areas)} areas")
+        with self._lock:
+            del self._builds[key]
+            self._layouts[key] = layout
+            while len(self._layouts) > self.max_layouts:
+                dropped = self._layouts.popitem(last=False)[0]
+                self._payloads = {k: v for k, v in self._payloads.items() if k[:2] != dropped}
+        build.set_result(layout)
+        return layout
+
+    def payload(self, db: Session, level: str = "squad", include_isolated: bool = False,
+                binary: bool = False) -> Any:
+        """JSON payload (dict) or binary payload (bytes) for a level of detail"""
+        layout = self.layout(db, include_isolated)
+        key = (layout.version, include_isolated, level, binary)
+        with self._lock:
+            payload = self._payloads.get(key)
+        if payload is None:
+            payload = layout.payload(level)
+            if binary:
+                payload = encode_binary(payload)
+            with self._lock:
+                if (layout.version, include_isolated) in self._layouts:
+                    self._payloads[key] = payload
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._layouts.clear()
+            self._payloads.clear()
+
+layout_cache = LayoutCache()
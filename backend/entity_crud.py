@@ -3,6 +3,7 @@ from typing import Optional
 import models
 import schemas
 import user_auth
+import dependency_graph
 
 
 def create_area(db: Session, area_data: schemas.AreaBase, user_id: int) -> models.Area:
@@ -33,6 +34,7 @@ def create_area(db: Session, area_data: schemas.AreaBase, user_id: int) -> model
     )
 
     db.add(db_area)
+    dependency_graph.mark_changed(db)
     db.commit()
     db.refresh(db_area)
 
@@ -82,6 +84,7 @@ def update_area(db: Session, area_id: int, area_data: schemas.AreaBase, user_id:
     if label_value is not None or 'label' in area_data.dict(exclude_unset=True):
         db_area.label = label_value
 
+    dependency_graph.mark_changed(db)
     db.commit()
     db.refresh(db_area)
 
@@ -134,6 +137,7 @@ def create_tribe(db: Session, tribe_data: schemas.TribeBase, area_id: int, user_
     )
 
     db.add(db_tribe)
+    dependency_graph.mark_changed(db)
     db.commit()
     db.refresh(db_tribe)
 
@@ -188,6 +192,7 @@ def update_tribe(db: Session, tribe_id: int, tribe_data: schemas.TribeBase, user
     if label_value is not None or 'label' in tribe_data.dict(exclude_unset=True):
         db_tribe.label = label_value
 
+    dependency_graph.mark_changed(db)
     db.commit()
     db.refresh(db_tribe)
 
@@ -220,6 +225,7 @@ def update_tribe_area(db: Session, tribe_id: int, area_id: int, user_id: int) ->
     # Update area_id
     db_tribe.area_id = area_id
 
+    dependency_graph.mark_changed(db)
     db.commit()
     db.refresh(db_tribe)
 
@@ -275,6 +281,7 @@ def create_squad(db: Session, squad_data: schemas.SquadBase, tribe_id: int, user
     )
 
     db.add(db_squad)
+    dependency_graph.mark_changed(db)
     db.commit()
     db.refresh(db_squad)
 
@@ -319,6 +326,7 @@ def update_squad(db: Session, squad_id: int, squad_data: schemas.SquadBase, user
     for key, value in update_data.items():
         setattr(db_squad, key, value)
 
+    dependency_graph.mark_changed(db)
     db.commit()
     db.refresh(db_squad)
 
@@ -351,6 +359,7 @@ def update_squad_tribe(db: Session, squad_id: int, tribe_id: int, user_id: int)
     # Update tribe_id
     db_squad.tribe_id = tribe_id
 
+    dependency_graph.mark_changed(db)
     db.commit()
     db.refresh(db_squad)
 
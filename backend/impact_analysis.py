@@ -0,0 +1,249 @@
+"""
+Blast radius of a squad or service outage.
+
+When a squad, or a service it owns, is down or degraded, every squad that
+depends on it directly or transitively is affected: the reverse transitive
+closure over the dependency graph (see dependency_graph.py). The headcount
+and capacity rollup columns of the affected squads (member_count, core and
+subcon counts and capacities, taken from the aggregate views when
+USE_AGGREGATE_VIEWS is enabled) are summed per tribe and per area.
+
+Rollups are loaded once per graph version into arrays aligned with the graph
+positions, so an analysis is one vectorized traversal plus a few bincounts.
+Results are cached per graph version (up to IMPACT_CACHE_MAX_ENTRIES).
+
+Members of several affected squads are counted in each of them, as in the
+squad rollups themselves.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import models
+import aggregate_views
+import dependency_graph
+from logger import get_logger, log_and_handle_exception
+
+# Initialize logger
+logger = get_logger('impact_analysis', log_level='INFO')
+
+# Configuration
+IMPACT_CACHE_MAX_ENTRIES = int(os.environ.get("IMPACT_CACHE_MAX_ENTRIES", "1000"))
+
+# Rollup columns summed per tribe and area (same names as the model columns)
+STAT_COLUMNS = aggregate_views.STAT_COLUMNS
+
+class Rollups:
+    """Squad rollups and tribe/area membership as arrays aligned with one graph version"""
+
+    def __init__(self, graph: dependency_graph.DependencyGraph, squads: List, tribes: List, areas: List,
+                 view_stats: Optional[Dict[int, Dict[str, float]]] = None):
+        self.version = graph.version
+        self.area_ids = [area.id for area in areas]
+        self.area_names = [area.name for area in areas]
+        area_position = {area_id: i for i, area_id in enumerate(self.area_ids)}
+
+        self.tribe_ids = [tribe.id for tribe in tribes]
+        self.tribe_names = [tribe.name for tribe in tribes]
+        self.tribe_area = np.array([area_position.get(tribe.area_id, -1) for tribe in tribes], dtype=np.int64)
+        tribe_position = {tribe_id: i for i, tribe_id in enumerate(self.tribe_ids)}
+
+        # -1 for squads without a (known) tribe
+        self.squad_tribe = np.full(len(graph), -1, dtype=np.int64)
+        self.stats = np.zeros((len(graph), len(STAT_COLUMNS)), dtype=np.float64)
+        view_stats = view_stats or {}
+        for squad in squads:
+            position = graph.position.get(squad.id)
+            if position is None:
+                continue
+            self.squad_tribe[position] = tribe_position.get(squad.tribe_id, -1)
+            values = view_stats.get(squad.id) or squad._mapping
+            self.stats[position] = [values[column] or 0 for column in STAT_COLUMNS]
+
+        self.squad_area = np.full(len(graph), -1, dtype=np.int64)
+        has_tribe = self.squad_tribe >= 0
+        self.squad_area[has_tribe] = self.tribe_area[self.squad_tribe[has_tribe]]
+
+def _view_stats(db: Session) -> Dict[int, Dict[str, float]]:
+    """Squad aggregates from the views, or nothing to use the stored columns"""
+    if not aggregate_views.AGGREGATE_VIEWS_ENABLED:
+        return {}
+    try:
+        return aggregate_views.get_member_stats(db, "squad")
+    except Exception as e:
+        # Fall back to the stored columns rather than failing the request
+        log_and_handle_exception(logger, "Error reading squad aggregate view", e, reraise=False)
+        return {}
+
+def load_rollups(db: Session, graph: dependency_graph.DependencyGraph) -> Rollups:
+    squads = db.execute(
+        select(models.Squad.id, models.Squad.tribe_id, *[getattr(models.Squad, column) for column in STAT_COLUMNS])
+    ).all()
+    tribes = db.execute(select(models.Tribe.id, models.Tribe.name, models.Tribe.area_id).order_by(models.Tribe.id)).all()
+    areas = db.execute(select(models.Area.id, models.Area.name).order_by(models.Area.id)).all()
+    return Rollups(graph, squads, tribes, areas, _view_stats(db))
+
+def _format_stats(values) -> Dict[str, Any]:
+    """Counts as integers and capacities rounded to two decimals, as in the rollup columns"""
+    return {
+        column: round(float(value), 2) if column.endswith("_capacity") else int(round(value))
+        for column, value in zip(STAT_COLUMNS, values)
+    }
+
+def _group(index: np.ndarray, stats: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Positions, squad counts and summed stats of the groups in `index` (-1 entries are skipped)"""
+    valid = index >= 0
+    index, stats = index[valid], stats[valid]
+    counts = np.bincount(index, minlength=size)
+    sums = np.stack([np.bincount(index, weights=stats[:, k], minlength=size) for k in range(stats.shape[1])], axis=1)
+    present = np.flatnonzero(counts)
+    return present, counts[present], sums[present]
+
+def _by_size(groups: List[Dict[str, Any]], name_key: str) -> List[Dict[str, Any]]:
+    return sorted(groups, key=lambda group: (-group["member_count"], (group[name_key] or "").lower()))
+
+def analyze(graph: dependency_graph.DependencyGraph, rollups: Rollups, squad_id: int,
+            max_depth: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Impact of `squad_id` being unavailable.
+
+    The squad itself is included at depth 0, followed by its dependents,
+    nearest first. Tribes and areas are ordered by affected headcount.
+    """
+    dependents, depths = graph.reach(squad_id, upstream=False, max_depth=max_depth)
+    positions = np.concatenate(([graph.position[squad_id]], dependents))
+    depths = np.concatenate(([0], depths))
+    stats = rollups.stats[positions]
+    squad_tribe = rollups.squad_tribe[positions]
+
+    squads = [
+        {
+            "squad_id": int(graph.squad_ids[position]),
+            "squad_name": graph.squad_names[position],
+            "depth": depth,
+            "tribe_id": rollups.tribe_ids[tribe] if tribe >= 0 else None,
+            "member_count": int(round(member_count)),
+            "total_capacity": round(total_capacity, 2),
+        }
+        for position, depth, tribe, member_count, total_capacity in zip(
+            positions.tolist(), depths.tolist(), squad_tribe.tolist(),
+            stats[:, STAT_COLUMNS.index("member_count")].tolist(),
+            stats[:, STAT_COLUMNS.index("total_capacity")].tolist(),
+        )
+    ]
+
+    tribe_positions, tribe_counts, tribe_sums = _group(squad_tribe, stats, len(rollups.tribe_ids))
+    tribes = [
+        {
+            "tribe_id": rollups.tribe_ids[tribe],
+            "tribe_name": rollups.tribe_names[tribe],
+            "area_id": rollups.area_ids[rollups.tribe_area[tribe]] if rollups.tribe_area[tribe] >= 0 else None,
+            "squad_count": count,
+            **_format_stats(sums),
+        }
+        for tribe, count, sums in zip(tribe_positions.tolist(), tribe_counts.tolist(), tribe_sums.tolist())
+    ]
+
+    area_positions, area_counts, area_sums = _group(rollups.squad_area[positions], stats, len(rollups.area_ids))
+    areas = [
+        {
+            "area_id": rollups.area_ids[area],
+            "area_name": rollups.area_names[area],
+            "squad_count": count,
+            **_format_stats(sums),
+        }
+        for area, count, sums in zip(area_positions.tolist(), area_counts.tolist(), area_sums.tolist())
+    ]
+
+    return {
+        "squad_id": squad_id,
+        "squad_name": graph.squad_names[positions[0]],
+        "graph_version": graph.version,
+        "max_depth": max_depth,
+        "totals": {"squad_count": len(squads), **_format_stats(stats.sum(axis=0).tolist())},
+        "squads": squads,
+        "tribes": _by_size(tribes, "tribe_name"),
+        "areas": _by_size(areas, "area_name"),
+    }
+
+class ImpactAnalyzer:
+    """Impact results and rollups cached per dependency graph version"""
+
+    def __init__(self, max_entries: int = IMPACT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._rollups: Optional[Rollups] = None
+        self._results = OrderedDict()  # (graph version, squad id, max depth) -> result
+        self._lock = threading.Lock()
+
+    def rollups(self, db: Session, graph: dependency_graph.DependencyGraph) -> Rollups:
+        with self._lock:
+            if self._rollups is not None and self._rollups.version == graph.version:
+                return self._rollups
+        rollups = load_rollups(db, graph)
+        with self._lock:
+            if self._rollups is None or self._rollups.version < graph.version:
+                self._rollups = rollups
+                # Results of older versions can no longer be hit
+                self._results.clear()
+        return rollups
+
+    def squad_impact(self, db: Session, squad_id: int, max_depth: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Impact of a squad being unavailable, or None if the squad does not exist"""
+        graph = dependency_graph.get_graph(db)
+        if not graph.has_squad(squad_id):
+            return None
+
+        key = (graph.version, squad_id, max_depth)
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                return result
+
+        result = analyze(graph, self.rollups(db, graph), squad_id, max_depth)
+        with self._lock:
+            if self._rollups is not None and self._rollups.version == graph.version:
+                self._results[key] = result
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+        return result
+
+    def service_impact(self, db: Session, service_id: int, max_depth: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Impact of a service's owning squad, or None if the service or squad does not exist"""
+        service = db.execute(
+            select(models.Service.id, models.Service.name, models.Service.status, models.Service.squad_id)
+            .where(models.Service.id == service_id)
+        ).first()
+        if service is None or service.squad_id is None:
+            return None
+
+        impact = self.squad_impact(db, service.squad_id, max_depth)
+        if impact is None:
+            return None
+        return {"service_id": service.id, "service_name": service.name, "service_status": service.status, **impact}
+
+    def clear(self):
+        with self._lock:
+            self._rollups = None
+            self._results.clear()
+
+impact_analyzer = ImpactAnalyzer()
+
+def log_service_impact(db: Session, service_id: int) -> Optional[Dict[str, Any]]:
+    """Log who is affected by a service that went down or degraded"""
+    impact = impact_analyzer.service_impact(db, service_id)
+    if impact is None:
+        return None
+    totals = impact["totals"]
+    logger.warning(
+        f"Service '{impact['service_name']}' is {impact['service_status']}: "
+        f"{totals['squad_count']} squads ({totals['member_count']} members, capacity {totals['total_capacity']}) "
+        f"in {len(impact['tribes'])} tribes and {len(impact['areas'])} areas affected"
+    )
+    return impact
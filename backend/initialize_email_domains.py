@@ -4,6 +4,7 @@ Script to initialize the allowed email domains setting if it doesn't exist
 """
 from database import SessionLocal
 import models
+from settings_cache import mark_changed
 
 def initialize_email_domains():
     """Initialize the allowed_email_domains setting if it doesn't exist"""
@@ -20,6 +21,7 @@ def initialize_email_domains():
                 description="List of allowed email domains for user registration. Add one domain per line or separate with commas. Users can only register with email addresses from these domains."
             )
             db.add(setting)
+            mark_changed(db)
             db.commit()
             print("Initialized allowed_email_domains setting")
         else:
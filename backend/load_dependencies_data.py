@@ -1,14 +1,23 @@
 import pandas as pd
 import os
 import argparse
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session, aliased
 from database import SessionLocal, engine, Base
 import models
+import dependency_graph
 from models import InteractionMode
 
 # Create tables if they don't exist
 Base.metadata.create_all(bind=engine)
 
+# Interaction modes are stored as their lowercase string values
+INTERACTION_MODE_VALUES = {mode.value for mode in InteractionMode}
+
+# Columns of the dependencies template
+REQUIRED_COLUMNS = ['Dependent Squad', 'Dependency Squad', 'Dependency Name', 'Interaction Mode']
+DEPENDENCY_COLUMNS = REQUIRED_COLUMNS + ['Interaction Frequency']
+
 def load_dependencies_from_csv(file_path: str, db: Session, append_mode: bool = False):
     """
     Load dependency data from CSV file into the database
@@ -18,6 +27,18 @@ def load_dependencies_from_csv(file_path: str, db: Session, append_mode: bool =
     - db: Database session
     - append_mode: If True, will update existing records rather than creating duplicates
     """
+    df = read_dependencies_file(file_path)
+    if df is None:
+        return
+
+    apply_dependencies_data(df, db, append_mode=append_mode, source=file_path)
+
+def read_dependencies_file(file_path: str):
+    """
+    Read and validate a dependencies CSV file without touching the database
+
+    Returns None if the file cannot be read or is missing required columns.
+    """
     print(f"Loading dependency data from {file_path}")
 
     # Read the CSV file
@@ -26,102 +47,113 @@ def load_dependencies_from_csv(file_path: str, db: Session, append_mode: bool =
         print(f"Successfully read CSV file with {len(df)} rows")
     except Exception as e:
         print(f"Error reading CSV file: {e}")
-        return
-
-    # Get existing squads by name for reference
-    squads_by_name = {squad.name: squad for squad in db.query(models.Squad).all()}
-
-    # Get existing dependencies if in append mode
-    existing_dependencies = {}
-    if append_mode:
-        for dependency in db.query(models.Dependency).all():
-            dependent_squad = db.query(models.Squad).filter(models.Squad.id == dependency.dependent_squad_id).first()
-            dependency_squad = db.query(models.Squad).filter(models.Squad.id == dependency.dependency_squad_id).first()
-            if dependent_squad and dependency_squad:
-                key = f"{dependent_squad.name}_{dependency_squad.name}"
-                existing_dependencies[key] = dependency
+        return None
 
     # Validate required columns
-    required_columns = ['Dependent Squad', 'Dependency Squad', 'Dependency Name', 'Interaction Mode']
-    missing_columns = [col for col in required_columns if col not in df.columns]
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
     if missing_columns:
         print(f"Error: CSV is missing required columns: {', '.join(missing_columns)}")
-        return
+        return None
 
-    # Process each dependency
-    dependencies_created = 0
-    dependencies_updated = 0
-    dependencies_skipped = 0
+    return df
+
+def apply_dependencies_data(df: pd.DataFrame, db: Session, append_mode: bool = False, source: str = "DataFrame"):
+    """
+    Apply dependency rows to the database with bulk statements
+
+    Parameters:
+    - df: DataFrame as returned by read_dependencies_file
+    - db: Database session
+    - append_mode: If True, will update existing records rather than creating duplicates
+    - source: Description of where the rows came from, used for logging
+
+    Returns:
+    - Index labels of the rows that were skipped
+    """
+    # Resolve squad names to IDs in memory
+    squad_ids_by_name = dict(db.query(models.Squad.name, models.Squad.id).all())
+
+    # Get existing dependencies if in append mode, keyed by (dependent, dependency) squad names
+    existing_dependencies = {}
+    if append_mode:
+        dependent_squad = aliased(models.Squad)
+        dependency_squad = aliased(models.Squad)
+        existing_rows = db.query(models.Dependency.id, dependent_squad.name, dependency_squad.name).join(
+            dependent_squad, models.Dependency.dependent_squad_id == dependent_squad.id
+        ).join(
+            dependency_squad, models.Dependency.dependency_squad_id == dependency_squad.id
+        ).all()
+        existing_dependencies = {(dependent_name, dependency_name): dependency_id
+                                 for dependency_id, dependent_name, dependency_name in existing_rows}
+
+    # Process each dependency, collecting rows for the bulk statements.
+    # Rows are keyed by squad pair so a pair repeated in the file is written once, last row winning.
+    inserts = {}
+    updates = {}
+    skipped_rows = []
+
+    has_frequency = 'Interaction Frequency' in df.columns
+    columns = REQUIRED_COLUMNS + (['Interaction Frequency'] if has_frequency else [])
+
+    for row_index, row in zip(df.index, df[columns].itertuples(index=False, name=None)):
+        dependent_squad_name, dependency_squad_name, dependency_name, interaction_mode_str = row[:4]
 
-    for _, row in df.iterrows():
         # Skip rows with missing required fields
-        if (pd.isna(row['Dependent Squad']) or pd.isna(row['Dependency Squad'])
-                or pd.isna(row['Dependency Name']) or pd.isna(row['Interaction Mode'])):
+        if (pd.isna(dependent_squad_name) or pd.isna(dependency_squad_name)
+                or pd.isna(dependency_name) or pd.isna(interaction_mode_str)):
             print(f"Skipping row with missing required fields: {row}")
-            dependencies_skipped += 1
+            skipped_rows.append(row_index)
             continue
 
         # Get the squad IDs from names
-        dependent_squad_name = row['Dependent Squad']
-        dependency_squad_name = row['Dependency Squad']
-
-        if dependent_squad_name not in squads_by_name:
+        if dependent_squad_name not in squad_ids_by_name:
             print(f"Warning: Dependent squad '{dependent_squad_name}' not found. Skipping.")
-            dependencies_skipped += 1
+            skipped_rows.append(row_index)
             continue
 
-        if dependency_squad_name not in squads_by_name:
+        if dependency_squad_name not in squad_ids_by_name:
             print(f"Warning: Dependency squad '{dependency_squad_name}' not found. Skipping.")
-            dependencies_skipped += 1
+            skipped_rows.append(row_index)
             continue
 
-        dependent_squad_id = squads_by_name[dependent_squad_name].id
-        dependency_squad_id = squads_by_name[dependency_squad_name].id
+        # Use the lowercase enum value, defaulting to x_as_a_service
+        interaction_mode = str(interaction_mode_str).lower()
+        if interaction_mode not in INTERACTION_MODE_VALUES:
+            interaction_mode = InteractionMode.X_AS_A_SERVICE.value
 
-        # Determine interaction mode
-        interaction_mode_str = row['Interaction Mode'].lower() if not pd.isna(row['Interaction Mode']) else "x_as_a_service"
+        # Get interaction frequency if present
+        interaction_frequency = row[4] if has_frequency and not pd.isna(row[4]) else None
 
-        # Map interaction mode strings to enum values
-        interaction_mode_mapping = {
-            'x_as_a_service': InteractionMode.X_AS_A_SERVICE,
-            'collaboration': InteractionMode.COLLABORATION,
-            'facilitating': InteractionMode.FACILITATING
+        values = {
+            'dependency_name': dependency_name,
+            'interaction_mode': interaction_mode,
+            'interaction_frequency': interaction_frequency
         }
 
-        # Use the mapped value or default to X_AS_A_SERVICE
-        interaction_mode = interaction_mode_mapping.get(interaction_mode_str, InteractionMode.X_AS_A_SERVICE)
-
-        # Get interaction frequency if present
-        interaction_frequency = row['Interaction Frequency'] if 'Interaction Frequency' in row and not pd.isna(row['Interaction Frequency']) else None
-
         # Check if this dependency already exists
-        dependency_key = f"{dependent_squad_name}_{dependency_squad_name}"
-        if append_mode and dependency_key in existing_dependencies:
-            # Update existing dependency
-            dependency = existing_dependencies[dependency_key]
-            dependency.dependency_name = row['Dependency Name']
-            dependency.interaction_mode = interaction_mode
-            dependency.interaction_frequency = interaction_frequency
-
-            print(f"Updated existing dependency: {dependent_squad_name} -> {dependency_squad_name}")
-            dependencies_updated += 1
+        dependency_key = (dependent_squad_name, dependency_squad_name)
+        if dependency_key in existing_dependencies:
+            updates[dependency_key] = {'id': existing_dependencies[dependency_key], **values}
         else:
-            # Create new dependency
-            dependency = models.Dependency(
-                dependent_squad_id=dependent_squad_id,
-                dependency_squad_id=dependency_squad_id,
-                dependency_name=row['Dependency Name'],
-                interaction_mode=interaction_mode,
-                interaction_frequency=interaction_frequency
-            )
-            db.add(dependency)
-            print(f"Created new dependency: {dependent_squad_name} -> {dependency_squad_name}")
-            dependencies_created += 1
+            inserts[dependency_key] = {
+                'dependent_squad_id': squad_ids_by_name[dependent_squad_name],
+                'dependency_squad_id': squad_ids_by_name[dependency_squad_name],
+                **values
+            }
+
+    # Write everything with one bulk INSERT and one bulk UPDATE (by primary key)
+    if inserts:
+        db.execute(insert(models.Dependency), list(inserts.values()))
+    if updates:
+        db.execute(update(models.Dependency), list(updates.values()))
 
     # Commit all changes
+    dependency_graph.mark_changed(db)
     db.commit()
-    print(f"Dependency data successfully loaded from {file_path}!")
-    print(f"Summary: {dependencies_created} created, {dependencies_updated} updated, {dependencies_skipped} skipped")
+    print(f"Dependency data successfully loaded from {source}!")
+    print(f"Summary: {len(inserts)} created, {len(updates)} updated, {len(skipped_rows)} skipped")
+
+    return skipped_rows
 
 def parse_args():
     """Parse command line arguments"""
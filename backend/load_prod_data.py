@@ -1,14 +1,23 @@
 import pandas as pd
 import os
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from sqlalchemy.orm import Session
 from database import SessionLocal
 import models
+import dependency_graph
 from logger import get_logger, log_and_handle_exception
 
 # Configure logging
 logger = get_logger('load_prod_data')
 
+# Columns of the organization template used by apply_organization_data
+ORGANIZATION_COLUMNS = ['Area', 'Tribe', 'Squad', 'Name', 'Business Email Address', 'Position', 'Current Phasing',
+                        'Work Geography', 'Work City', 'Regular / Temporary', 'Supervisor Name', 'Vendor Name', 'Function']
+
+# Columns of the services template used by apply_services_data
+SERVICE_COLUMNS = ['Service Name', 'Squad Name', 'Type', 'Description', 'URL', 'Version']
+
 def ensure_db_compatibility():
     """Placeholder function for backward compatibility"""
     # This function previously triggered migrations
@@ -30,6 +39,18 @@ def load_services_data(file_path: str, db: Session, append_mode: bool = False, s
     if run_compatibility_check:
         ensure_db_compatibility()
 
+    df = read_services_file(file_path, sheet_name=sheet_name)
+    if df is None:
+        return
+
+    apply_services_data(df, db, append_mode=append_mode, source=file_path)
+
+def read_services_file(file_path: str, sheet_name: str = "Services"):
+    """
+    Read a services file without touching the database
+
+    Safe to run in a worker process. Returns None if the file cannot be read.
+    """
     print(f"Loading services data from {file_path}")
 
     # Determine if file is CSV based on extension
@@ -50,7 +71,24 @@ def load_services_data(file_path: str, db: Session, append_mode: bool = False, s
             print(f"Error reading CSV file: {e}")
         else:
             print(f"Error reading Excel file or sheet '{sheet_name}': {e}")
-        return
+        return None
+
+    return df
+
+def apply_services_data(df: pd.DataFrame, db: Session, append_mode: bool = False, source: str = "DataFrame"):
+    """
+    Apply service rows to the database in a single transaction
+
+    Parameters:
+    - df: DataFrame as returned by read_services_file (or several of them merged)
+    - db: Database session
+    - append_mode: If True, will update existing records rather than creating duplicates
+    - source: Description of where the rows came from, used for logging
+
+    Returns:
+    - Index labels of the rows that were skipped
+    """
+    skipped_rows = []
 
     # Get existing squads by name for reference
     squads_by_name = {squad.name: squad for squad in db.query(models.Squad).all()}
@@ -63,16 +101,18 @@ def load_services_data(file_path: str, db: Session, append_mode: bool = False, s
             existing_services[key] = service
 
     # Process each service
-    for _, row in df.iterrows():
+    for row_index, row in df.iterrows():
         # Skip rows with missing required fields
         if pd.isna(row['Service Name']) or pd.isna(row['Squad Name']):
             print(f"Skipping row with missing required fields: {row}")
+            skipped_rows.append(row_index)
             continue
 
         # Get the squad_id from the squad name
         squad_name = row['Squad Name']
         if squad_name not in squads_by_name:
             print(f"Warning: Squad '{squad_name}' not found for service '{row['Service Name']}'. Skipping.")
+            skipped_rows.append(row_index)
             continue
 
         squad_id = squads_by_name[squad_name].id
@@ -124,23 +164,24 @@ def load_services_data(file_path: str, db: Session, append_mode: bool = False, s
 
     # Commit all changes
     db.commit()
-    print(f"Services data successfully loaded from {file_path}!")
+    print(f"Services data successfully loaded from {source}!")
 
-def load_data_from_excel(file_path: str, db: Session, append_mode: bool = False, sheet_name: str = "Sheet1", run_compatibility_check: bool = True):
+    return skipped_rows
+
+def read_organization_file(file_path: str, sheet_name: str = "Sheet1") -> pd.DataFrame:
     """
-    Load production data from Excel or CSV file into the database
+    Read and validate an organization file without touching the database
+
+    This is the parsing half of load_data_from_excel. It only depends on its
+    arguments, so it can run in a worker process when loading files in parallel.
 
     Parameters:
     - file_path: Path to the Excel or CSV file
-    - db: Database session
-    - append_mode: If True, will update existing records rather than creating duplicates
     - sheet_name: Name of the Excel sheet to load (default: "Sheet1") - not used for CSV
-    - run_compatibility_check: If True, will run database compatibility checks
-    """
-    # Run compatibility check if requested
-    if run_compatibility_check:
-        ensure_db_compatibility()
 
+    Returns:
+    - DataFrame trimmed to the columns used by apply_organization_data
+    """
     # Determine if file is CSV based on extension
     is_csv = file_path.lower().endswith('.csv')
 
@@ -187,6 +228,37 @@ def load_data_from_excel(file_path: str, db: Session, append_mode: bool = False,
             sheet_name=None if is_csv else sheet_name
         )
 
+    # Drop the columns we never use so less data is passed back from workers
+    return df[[col for col in ORGANIZATION_COLUMNS if col in df.columns]]
+
+def load_data_from_excel(file_path: str, db: Session, append_mode: bool = False, sheet_name: str = "Sheet1", run_compatibility_check: bool = True):
+    """
+    Load production data from Excel or CSV file into the database
+
+    Parameters:
+    - file_path: Path to the Excel or CSV file
+    - db: Database session
+    - append_mode: If True, will update existing records rather than creating duplicates
+    - sheet_name: Name of the Excel sheet to load (default: "Sheet1") - not used for CSV
+    - run_compatibility_check: If True, will run database compatibility checks
+    """
+    # Run compatibility check if requested
+    if run_compatibility_check:
+        ensure_db_compatibility()
+
+    df = read_organization_file(file_path, sheet_name=sheet_name)
+    apply_organization_data(df, db, append_mode=append_mode, source=file_path)
+
+def apply_organization_data(df: pd.DataFrame, db: Session, append_mode: bool = False, source: str = "DataFrame"):
+    """
+    Apply validated organization rows to the database in a single transaction
+
+    Parameters:
+    - df: DataFrame as returned by read_organization_file (or several of them merged)
+    - db: Database session
+    - append_mode: If True, will update existing records rather than creating duplicates
+    - source: Description of where the rows came from, used for logging
+    """
     # Extract unique areas, tribes, and squads
     logger.debug("Extracting unique organizational units")
     areas = df['Area'].dropna().unique()
@@ -564,9 +636,10 @@ def load_data_from_excel(file_path: str, db: Session, append_mode: bool = False,
         # Calculate tribe totals for just the tribes in this file
         calculate_tribe_and_area_counts(db, list(tribe_objects.values()))
 
-    # Commit all changes
+    # Commit all changes (squad names and rollups feed the dependency graph and impact analysis)
+    dependency_graph.mark_changed(db)
     db.commit()
-    logger.info(f"Database successfully updated with organizational data from {file_path}")
+    logger.info(f"Database successfully updated with organizational data from {source}")
 
 def calculate_tribe_and_area_counts(db: Session, tribes_to_update):
     """Calculate and update member counts and capacities for specific tribes and their areas"""
@@ -705,6 +778,71 @@ def update_all_tribe_and_area_counts(db: Session):
 
     logger.info("All tribe and area metrics have been recalculated")
 
+def merge_organization_frames(frames):
+    """
+    Merge organization DataFrames from several files into one changeset
+
+    Files are applied in order, so the first file to mention a tribe decides its
+    area and the first file to mention a squad decides its tribe - the same
+    result as loading the files one after another in append mode.
+    """
+    merged = pd.concat(frames, ignore_index=True)
+
+    tribe_areas = merged[['Tribe', 'Area']].dropna().drop_duplicates(subset=['Tribe']).set_index('Tribe')['Area']
+    squad_tribes = merged[['Squad', 'Tribe']].dropna().drop_duplicates(subset=['Squad']).set_index('Squad')['Tribe']
+
+    merged['Tribe'] = merged['Squad'].map(squad_tribes).fillna(merged['Tribe'])
+    merged['Area'] = merged['Tribe'].map(tribe_areas).fillna(merged['Area'])
+
+    # Keep tribes whose only rows were re-homed, so they are still created
+    orphaned_tribes = tribe_areas[~tribe_areas.index.isin(merged['Tribe'])]
+    if not orphaned_tribes.empty:
+        merged = pd.concat([merged, orphaned_tribes.rename('Area').rename_axis('Tribe').reset_index()],
+                           ignore_index=True)
+
+    return merged
+
+def merge_services_frames(frames):
+    """Merge services DataFrames from several files, later files winning on duplicates"""
+    merged = pd.concat(frames, ignore_index=True)
+    return merged.drop_duplicates(subset=['Service Name', 'Squad Name'], keep='last')
+
+def load_files_parallel(file_paths, db: Session, append_mode: bool = False, sheet_name: str = "Sheet1",
+                        services: bool = False, workers: int = None):
+    """
+    Load several files by parsing them in a process pool and applying them together
+
+    Reading and validating Excel files is CPU bound and independent per file, so
+    it runs in worker processes. The results are merged into a single changeset
+    and applied in one transaction, with one pass of the tribe/area rollups.
+
+    Parameters:
+    - file_paths: Files to load, in priority order
+    - db: Database session
+    - append_mode: If True, will update existing records rather than creating duplicates
+    - sheet_name: Name of the Excel sheet to load - not used for CSV
+    - services: If True, load services data instead of organization data
+    - workers: Number of worker processes (default: one per CPU, at most one per file)
+    """
+    reader = read_services_file if services else read_organization_file
+    workers = max(1, min(workers or os.cpu_count() or 1, len(file_paths)))
+    logger.info(f"Reading {len(file_paths)} files with {workers} worker processes")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        frames = list(executor.map(reader, file_paths, [sheet_name] * len(file_paths)))
+
+    # Unreadable services files are skipped, as in the sequential loader
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        logger.warning("No files could be read, nothing to load")
+        return
+
+    source = f"{len(frames)} files"
+    if services:
+        apply_services_data(merge_services_frames(frames), db, append_mode=append_mode, source=source)
+    else:
+        apply_organization_data(merge_organization_frames(frames), db, append_mode=append_mode, source=source)
+
 def parse_args():
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(description='Load production data from Excel files into the database')
@@ -715,6 +853,10 @@ def parse_args():
                         help='Name of the Excel sheet to load (default: "Sheet1")')
     parser.add_argument('--services', action='store_true', help='Load services data from the Excel file')
     parser.add_argument('--run-migrations', action='store_true', help='Run database compatibility migrations before loading data')
+    parser.add_argument('--parallel', '-p', action='store_true',
+                        help='Parse multiple files in parallel and load them in a single transaction')
+    parser.add_argument('--workers', '-w', type=int, default=None,
+                        help='Number of worker processes for --parallel (default: number of CPUs)')
 
     return parser.parse_args()
 
@@ -752,19 +894,24 @@ if __name__ == "__main__":
     # Get DB session
     db = SessionLocal()
     try:
-        for i, file_path in enumerate(files_to_process):
-            # First file uses append mode only if specified
-            # Subsequent files always use append mode
-            should_append = args.append or i > 0
-
-            if args.services:
-                # Load services data
-                service_sheet = "Sheet1" if args.sheet_name == "Sheet1" else args.sheet_name
-                load_services_data(file_path, db, append_mode=should_append,
-                                   sheet_name=service_sheet, run_compatibility_check=False)
-            else:
-                # Load regular team data
-                load_data_from_excel(file_path, db, append_mode=should_append,
-                                     sheet_name=args.sheet_name, run_compatibility_check=False)
+        if args.parallel and len(files_to_process) > 1:
+            # Parse all files in worker processes and apply them in one transaction
+            load_files_parallel(files_to_process, db, append_mode=args.append, sheet_name=args.sheet_name,
+                                services=args.services, workers=args.workers)
+        else:
+            for i, file_path in enumerate(files_to_process):
+                # First file uses append mode only if specified
+                # Subsequent files always use append mode
+                should_append = args.append or i > 0
+
+                if args.services:
+                    # Load services data
+                    service_sheet = "Sheet1" if args.sheet_name == "Sheet1" else args.sheet_name
+                    load_services_data(file_path, db, append_mode=should_append,
+                                       sheet_name=service_sheet, run_compatibility_check=False)
+                else:
+                    # Load regular team data
+                    load_data_from_excel(file_path, db, append_mode=should_append,
+                                         sheet_name=args.sheet_name, run_compatibility_check=False)
     finally:
         db.close()
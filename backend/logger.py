@@ -4,15 +4,20 @@ import sys
 import traceback
 import json
 import time
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
+import queue
+import atexit
+import threading
+from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler, QueueHandler, QueueListener
 import datetime
 import socket
 import platform
 import inspect
+from typing import Type
 
 # Import centralized logging configuration
 from logging_config import (
-    LOG_DIR, MAIN_LOG_FILE, get_log_level_for_module
+    LOG_DIR, MAIN_LOG_FILE, JSON_LOG_FILE, LOG_ASYNC, LOG_BUFFER_SIZE, LOG_FLUSH_INTERVAL_SECONDS,
+    get_log_level_for_module
 )
 
 # Constants
@@ -28,9 +33,6 @@ LOG_LEVELS = {
 if not LOG_DIR.exists():
     LOG_DIR.mkdir(parents=True, exist_ok=True)
 
-# Global dictionary to store metrics and counters
-_metrics = {}
-
 # Custom formatter for microseconds
 class MicrosecondFormatter(logging.Formatter):
     """Custom formatter that correctly handles microsecond formatting."""
@@ -45,6 +47,266 @@ class MicrosecondFormatter(logging.Formatter):
         else:
             return time.strftime(self.default_time_format, ct)
 
+class LevelFormatter(logging.Formatter):
+    """
+    Formatter that delegates to a different formatter for warnings and above.
+
+    Replaces swapping the handler's formatter per record, which is not safe
+    when several threads log through the same handler.
+    """
+    def __init__(self, standard_formatter, error_formatter, error_level=logging.WARNING):
+        super().__init__()
+        self.standard_formatter = standard_formatter
+        self.error_formatter = error_formatter
+        self.error_level = error_level
+
+    def format(self, record):
+        if record.levelno >= self.error_level:
+            return self.error_formatter.format(record)
+        return self.standard_formatter.format(record)
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats each record as a single-line JSON object"""
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.datetime.fromtimestamp(record.created).isoformat(timespec='microseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        # Context passed to Logger.structured()
+        context = getattr(record, 'context', None)
+        if context:
+            entry['context'] = context
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class _BufferedFileMixin(logging.FileHandler):
+    """
+    File handler whose writes stay in a userspace buffer until flush_buffer()
+    is called, instead of being flushed after every record. Only used behind
+    the queue listener, which flushes when the queue runs empty.
+
+    Mixed in ahead of a FileHandler subclass, whose stream and file attributes
+    it uses.
+    """
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE,
+                    encoding=self.encoding, errors=self.errors)
+
+    def flush(self) -> None:
+        # Called by StreamHandler.emit() for every record; deferred to flush_buffer()
+        pass
+
+    def flush_buffer(self) -> None:
+        super().flush()
+
+class BufferedRotatingFileHandler(_BufferedFileMixin, RotatingFileHandler):
+    pass
+
+class BufferedTimedRotatingFileHandler(_BufferedFileMixin, TimedRotatingFileHandler):
+    pass
+
+class _DispatchHandler(logging.Handler):
+    """
+    Listener-side handler that routes each record to the handlers registered
+    for its logger, plus the handlers shared by every logger (main and JSON logs).
+    """
+    def __init__(self):
+        super().__init__()
+        self._routes = {}
+        self._shared = []
+
+    def register(self, logger_name, handlers):
+        self._routes[logger_name] = list(handlers)
+
+    def add_shared(self, handler):
+        self._shared = self._shared + [handler]
+
+    def all_handlers(self):
+        seen = []
+        for handler in [h for handlers in list(self._routes.values()) for h in handlers] + self._shared:
+            if handler not in seen:
+                seen.append(handler)
+        return seen
+
+    def handle(self, record):
+        flushed = getattr(record, 'flush_event', None)
+        if flushed is not None:
+            # Marker queued by LoggingPipeline.flush()
+            self.flush()
+            flushed.set()
+            return True
+        for handler in self._routes.get(record.name, []) + self._shared:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+    def emit(self, record):
+        self.handle(record)
+
+    def flush(self):
+        for handler in self.all_handlers():
+            try:
+                if hasattr(handler, 'flush_buffer'):
+                    handler.flush_buffer()
+                else:
+                    handler.flush()
+            except (OSError, ValueError):
+                # Stream already closed (same as logging.shutdown)
+                pass
+
+class _FlushingQueueListener(QueueListener):
+    """QueueListener that flushes buffered handlers whenever the queue runs empty"""
+    def __init__(self, log_queue: "queue.SimpleQueue[logging.LogRecord]", dispatcher: _DispatchHandler,
+                 flush_interval: float):
+        super().__init__(log_queue, dispatcher)
+        # QueueListener.queue is typed without get_nowait(); keep the concrete queue
+        self.log_queue = log_queue
+        self.dispatcher = dispatcher
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        try:
+            record = self.log_queue.get_nowait()
+        except queue.Empty:
+            self._flush()
+            return self.log_queue.get(block)
+        # Keep files reasonably current under sustained load
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self._flush()
+        return record
+
+    def _flush(self):
+        self.dispatcher.flush()
+        self._last_flush = time.monotonic()
+
+class LoggingPipeline:
+    """
+    Shared logging backend.
+
+    With LOG_ASYNC (default) every application logger gets a single
+    QueueHandler; one listener thread formats the records and writes the
+    module log, the main log, the JSON lines log and the console, so the
+    calling thread only pays for putting the record on a queue. Without it,
+    handlers are attached to the loggers and write synchronously.
+    """
+    def __init__(self, asynchronous=LOG_ASYNC):
+        self.asynchronous = asynchronous
+        self._lock = threading.Lock()
+        self._module_handlers = {}  # module name -> file handler
+        self._console_handler = None
+        self._dispatcher = _DispatchHandler()
+        self._queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self._queue_handler = QueueHandler(self._queue)
+        self._listener = None
+
+        self.main_handler = self._file_handler(MAIN_LOG_FILE, rotating=True, max_size_mb=10, backup_count=5)
+        self.main_handler.setFormatter(MicrosecondFormatter(
+            '%(asctime)s - %(levelname)s - %(name)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S.%f'
+        ))
+        self.main_handler.setLevel(logging.INFO)  # Only INFO and above for the main log
+
+        self.json_handler = self._file_handler(JSON_LOG_FILE, rotating=True, max_size_mb=10, backup_count=5)
+        self.json_handler.setFormatter(JsonLinesFormatter())
+        self.json_handler.setLevel(logging.INFO)
+
+        self._dispatcher.add_shared(self.main_handler)
+        self._dispatcher.add_shared(self.json_handler)
+
+    def _file_handler(self, path, rotating, max_size_mb, backup_count) -> logging.FileHandler:
+        if rotating:
+            rotating_class: Type[RotatingFileHandler] = (
+                BufferedRotatingFileHandler if self.asynchronous else RotatingFileHandler)
+            # Size-based rotation (e.g., 10MB per file)
+            return rotating_class(path, maxBytes=max_size_mb * 1024 * 1024, backupCount=backup_count)
+        # Time-based rotation (daily)
+        timed_class: Type[TimedRotatingFileHandler] = (
+            BufferedTimedRotatingFileHandler if self.asynchronous else TimedRotatingFileHandler)
+        return timed_class(path, when='midnight', interval=1, backupCount=backup_count)
+
+    def _formatter(self):
+        return LevelFormatter(
+            # Timestamp, level and module, without filename or line number
+            MicrosecondFormatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s',
+                                 datefmt='%Y-%m-%d %H:%M:%S.%f'),
+            # Warnings and errors also include the thread name
+            MicrosecondFormatter('%(asctime)s - %(levelname)s - %(name)s - %(threadName)s - %(message)s',
+                                 datefmt='%Y-%m-%d %H:%M:%S.%f')
+        )
+
+    def module_handlers(self, module_name, log_to_console, rotating_logs, max_size_mb, backup_count):
+        """
+        File (and console) handlers for a module, created once and reused.
+
+        There is one file handler per module log file (the rotation settings
+        of the first call win) and one console handler shared by all modules,
+        so loggers created with different flags never open a file twice.
+        """
+        with self._lock:
+            if module_name not in self._module_handlers:
+                file_handler = self._file_handler(LOG_DIR / f"{module_name}.log", rotating_logs,
+                                                  max_size_mb, backup_count)
+                file_handler.setFormatter(self._formatter())
+                self._module_handlers[module_name] = file_handler
+            handlers = [self._module_handlers[module_name]]
+            if log_to_console:
+                if self._console_handler is None:
+                    self._console_handler = logging.StreamHandler()
+                    self._console_handler.setFormatter(self._formatter())
+                handlers.append(self._console_handler)
+            return handlers
+
+    def attach(self, logger, handlers):
+        """Connect a logger to its module handlers and the shared handlers"""
+        # Clear existing handlers to avoid duplicate logs
+        if logger.hasHandlers():
+            logger.handlers.clear()
+
+        if self.asynchronous:
+            self._dispatcher.register(logger.name, handlers)
+            logger.addHandler(self._queue_handler)
+            self.start()
+        else:
+            for handler in handlers + [self.main_handler, self.json_handler]:
+                logger.addHandler(handler)
+
+    def start(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = _FlushingQueueListener(self._queue, self._dispatcher, LOG_FLUSH_INTERVAL_SECONDS)
+                self._listener.start()
+
+    def flush(self, timeout=5.0):
+        """Write out every record queued so far and flush the log files"""
+        if self.asynchronous and self._listener is not None:
+            flushed = threading.Event()
+            marker = logging.makeLogRecord({'flush_event': flushed})
+            self._queue.put(marker)
+            flushed.wait(timeout)
+        else:
+            self._dispatcher.flush()
+
+    def stop(self):
+        """Process every queued record, then stop the listener"""
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+        self._dispatcher.flush()
+
+# Shared backend for all loggers created with get_logger()
+_pipeline = LoggingPipeline()
+atexit.register(_pipeline.stop)
+
+def flush_logs():
+    """Flush buffered log output, e.g. before reading log files in tests"""
+    _pipeline.flush()
+
 class Logger:
     """
     Logger class to provide standardized logging functionality across the application.
@@ -53,24 +315,6 @@ class Logger:
     and ensures logs are written to appropriately named files with timestamps.
     """
 
-    class LevelFilter(logging.Filter):
-        """
-        Filter that applies different formatters based on log level.
-        """
-        def __init__(self, handler, standard_formatter, error_formatter):
-            super().__init__()
-            self.handler = handler
-            self.standard_formatter = standard_formatter
-            self.error_formatter = error_formatter
-
-        def filter(self, record):
-            # No filtering, just formatter switching
-            if record.levelno >= logging.WARNING:
-                self.handler.setFormatter(self.error_formatter)
-            else:
-                self.handler.setFormatter(self.standard_formatter)
-            return True
-
     def __init__(self, module_name, log_level='INFO', log_to_console=True,
                  rotating_logs=True, max_size_mb=10, backup_count=5):
         """
@@ -91,54 +335,9 @@ class Logger:
         self.logger = logging.getLogger(f'who_what_where.{module_name}')
         self.logger.setLevel(self.log_level)
 
-        # Clear existing handlers to avoid duplicate logs
-        if self.logger.hasHandlers():
-            self.logger.handlers.clear()
-
-        # Create enhanced formatter with timestamp, level, module, but without filename or line number
-        formatter = MicrosecondFormatter(
-            '%(asctime)s - %(levelname)s - %(name)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S.%f'
-        )
-
-        # Create a special formatter for warnings and errors that includes thread name but not filename/line
-        error_formatter = MicrosecondFormatter(
-            '%(asctime)s - %(levelname)s - %(name)s - %(threadName)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S.%f'
-        )
-
-        # Add file handler
-        log_file = LOG_DIR / f"{module_name}.log"
-
-        if rotating_logs:
-            # Size-based rotation (e.g., 10MB per file)
-            file_handler = RotatingFileHandler(
-                log_file,
-                maxBytes=max_size_mb * 1024 * 1024,  # Convert MB to bytes
-                backupCount=backup_count
-            )
-        else:
-            # Time-based rotation (daily)
-            file_handler = TimedRotatingFileHandler(
-                log_file,
-                when='midnight',
-                interval=1,
-                backupCount=backup_count
-            )
-
-        # Add file_handler to logger with level filter
-        file_handler.setFormatter(formatter)  # Default formatter
-        self.logger.addHandler(file_handler)
-        file_filter = self.LevelFilter(file_handler, formatter, error_formatter)
-        file_handler.addFilter(file_filter)
-
-        # Add console handler if requested
-        if log_to_console:
-            console_handler = logging.StreamHandler()
-            console_handler.setFormatter(formatter)  # Default formatter
-            self.logger.addHandler(console_handler)
-            console_filter = self.LevelFilter(console_handler, formatter, error_formatter)
-            console_handler.addFilter(console_filter)
+        # Module log file and console, written through the shared pipeline
+        handlers = _pipeline.module_handlers(module_name, log_to_console, rotating_logs, max_size_mb, backup_count)
+        _pipeline.attach(self.logger, handlers)
 
     def debug(self, message):
         """Log debug message."""
@@ -201,14 +400,9 @@ class Logger:
         else:
             full_message = message
 
-        self.logger.log(log_level, full_message)
-
-        # All errors and criticals are also sent to the main log file
-        if log_level >= logging.ERROR:
-            with open(MAIN_LOG_FILE, 'a') as f:
-                dt = datetime.datetime.now()
-                timestamp = dt.strftime('%Y-%m-%d %H:%M:%S.%f')
-                f.write(f"{timestamp} - {logging.getLevelName(log_level)} - {self.module_name} - {full_message}\n")
+        # Errors reach the main log through its handler; the context is also
+        # kept as a field for the JSON lines log
+        self.logger.log(log_level, full_message, extra={'context': kwargs} if kwargs else None)
 
     def exception(self, message, exc_info=True, **kwargs):
         """
@@ -257,22 +451,25 @@ class Logger:
 
     def metric(self, name, value=1, **kwargs):
         """
-        Log a metric or counter that can be used for monitoring or statistics.
+        Record a metric sample in the shared metrics registry (served at /metrics).
+
+        Samples go into a histogram labelled by module. The extra dimensions
+        are only included in the DEBUG log line, since values such as callers
+        or paths would make the number of series unbounded; use the metrics
+        registry directly for labelled metrics.
 
         Args:
             name (str): Name of the metric
             value (int/float): Value to record
             **kwargs: Additional dimensions/tags for the metric
         """
-        if name not in _metrics:
-            _metrics[name] = {'count': 0, 'sum': 0, 'values': []}
+        from metrics import registry
 
-        _metrics[name]['count'] += 1
-        _metrics[name]['sum'] += value
-        _metrics[name]['values'].append(value)
+        registry.histogram(name, f"Samples recorded with Logger.metric('{name}')", ["module"]) \
+            .labels(module=self.module_name).observe(value)
 
-        # Log the metric
-        self.structured('INFO', f"METRIC: {name}", value=value, metric=True, **kwargs)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.structured('DEBUG', f"METRIC: {name}", value=value, metric=True, **kwargs)
 
 # Function to get a configured logger instance
 def get_logger(module_name, log_level=None, log_to_console=True):
@@ -293,37 +490,8 @@ def get_logger(module_name, log_level=None, log_to_console=True):
     else:
         env_log_level = os.environ.get('LOG_LEVEL', log_level)
 
-    logger_instance = Logger(module_name, env_log_level, log_to_console)
-
-    # Add a handler for the main application log file as well (for capturing all modules in one place)
-    # Configure a handler for the main log file
-    # Use a static reference to avoid creating multiple handlers
-    main_handler = getattr(get_logger, '_main_handler', None)
-
-    if main_handler is None:
-        # Create a formatter for the main log with new format (level before module, no filename)
-        main_formatter = MicrosecondFormatter(
-            '%(asctime)s - %(levelname)s - %(name)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S.%f'
-        )
-
-        # Use rotating file handler for the main log file
-        main_handler = RotatingFileHandler(
-            MAIN_LOG_FILE,
-            maxBytes=10 * 1024 * 1024,  # 10 MB
-            backupCount=5
-        )
-        main_handler.setFormatter(main_formatter)
-        main_handler.setLevel(logging.INFO)  # Only INFO and above for the main log
-
-        # Store the handler for reuse
-        setattr(get_logger, '_main_handler', main_handler)
-
-    # Add the main handler if it's not already present
-    if main_handler not in logger_instance.logger.handlers:
-        logger_instance.logger.addHandler(main_handler)
-
-    return logger_instance
+    # Module, main application and JSON lines handlers are attached by the shared pipeline
+    return Logger(module_name, env_log_level, log_to_console)
 
 # Error handling utility function
 def log_and_handle_exception(logger, message, exception=None, reraise=True, **kwargs):
@@ -11,8 +11,8 @@ from pathlib import Path
 # Default log level - can be overridden with environment variable
 DEFAULT_LOG_LEVEL = "INFO"
 
-# Log directory - relative to project root
-LOG_DIR = Path(__file__).resolve().parent.parent / "logs"
+# Log directory - relative to project root unless LOG_DIR is set
+LOG_DIR = Path(os.environ.get("LOG_DIR") or Path(__file__).resolve().parent.parent / "logs")
 
 # Ensure log directory exists
 if not LOG_DIR.exists():
@@ -21,6 +21,18 @@ if not LOG_DIR.exists():
 # Main application log file path
 MAIN_LOG_FILE = LOG_DIR / "application.log"
 
+# Structured log with one JSON object per line (all modules, INFO and above)
+JSON_LOG_FILE = LOG_DIR / "application.jsonl"
+
+# Hand log records to a single background listener thread instead of writing
+# files and the console on the calling thread
+LOG_ASYNC = os.environ.get("LOG_ASYNC", "true").lower() in ("1", "true", "yes")
+
+# Write buffer for log files when LOG_ASYNC is enabled; buffers are flushed
+# whenever the queue runs empty and at least every LOG_FLUSH_INTERVAL_SECONDS
+LOG_BUFFER_SIZE = int(os.environ.get("LOG_BUFFER_SIZE", str(64 * 1024)))
+LOG_FLUSH_INTERVAL_SECONDS = float(os.environ.get("LOG_FLUSH_INTERVAL_SECONDS", "1.0"))
+
 # Default number of backup log files to keep
 DEFAULT_BACKUP_COUNT = 5
 
@@ -15,10 +15,30 @@ import datetime
 from typing import Any, Callable, Dict, Optional, TypeVar, cast, List
 from fastapi import Request
 from logger import get_logger, log_and_handle_exception
+from metrics import registry
 
 # Get module logger
 logger = get_logger('logging_utilities')
 
+# Metrics fed by the decorators below (served at /metrics)
+OPERATION_DURATION = registry.histogram(
+    "operation_duration_seconds", "Execution time of functions decorated with log_execution_time",
+    ["module", "operation"])
+OPERATION_ERRORS = registry.counter(
+    "operation_errors_total", "Exceptions raised by functions decorated with log_execution_time",
+    ["module", "operation"])
+DB_TRANSACTION_DURATION = registry.histogram(
+    "db_transaction_duration_seconds", "Execution time of functions decorated with log_db_transaction",
+    ["module", "operation"])
+DB_TRANSACTION_ERRORS = registry.counter(
+    "db_transaction_errors_total", "Failed (rolled back) transactions in functions decorated with log_db_transaction",
+    ["module", "operation"])
+API_CALL_DURATION = registry.histogram(
+    "api_call_duration_seconds", "Execution time of endpoints decorated with log_api_call",
+    ["method", "endpoint", "status_code"])
+SECURITY_EVENTS = registry.counter(
+    "security_events_total", "Security events logged with log_security_event", ["event_type"])
+
 # Type variable for function return type
 F = TypeVar('F', bound=Callable[..., Any])
 
@@ -57,18 +77,14 @@ def log_execution_time(operation_name: str = None):
                 # Log completion
                 func_logger.info(f"Completed {func_name} in {execution_time:.4f} seconds")
 
-                # Also log as a metric for tracking performance over time
-                func_logger.metric(
-                    "execution_time",
-                    execution_time,
-                    operation=func_name,
-                    module=module_name
-                )
+                # Also record as a metric for tracking performance over time
+                OPERATION_DURATION.labels(module=module_name, operation=func_name).observe(execution_time)
 
                 return result
             except Exception as e:
                 # Log execution failure
                 execution_time = time.time() - start_time
+                OPERATION_ERRORS.labels(module=module_name, operation=func_name).inc()
                 log_and_handle_exception(
                     func_logger,
                     f"Error in {func_name}",
@@ -154,14 +170,8 @@ def log_api_call(include_request_body: bool = False, sensitive_params: List[str]
 
                 endpoint_logger.info(f"API response {status_code} in {execution_time:.4f}s - {method} {path}")
 
-                # Log as metric
-                endpoint_logger.metric(
-                    "api_response_time",
-                    execution_time,
-                    endpoint=path,
-                    method=method,
-                    status_code=status_code
-                )
+                # Record as metric
+                API_CALL_DURATION.labels(method=method, endpoint=path, status_code=status_code).observe(execution_time)
 
                 return response
             except Exception as e:
@@ -231,16 +241,13 @@ def log_db_transaction():
                 execution_time = time.time() - start_time
                 db_logger.info(f"DB transaction completed in {execution_time:.4f}s - {func_name}")
 
-                # Log as metric
-                db_logger.metric(
-                    "db_transaction_time",
-                    execution_time,
-                    operation=func_name,
-                    caller=caller_info
-                )
+                # Record as metric (the caller is only logged, it would make the series unbounded)
+                DB_TRANSACTION_DURATION.labels(module=module_name, operation=func_name).observe(execution_time)
 
                 return result
             except Exception as e:
+                DB_TRANSACTION_ERRORS.labels(module=module_name, operation=func_name).inc()
+
                 # Log execution failure and rollback if possible
                 if db_session and hasattr(db_session, 'rollback'):
                     try:
@@ -314,8 +321,8 @@ def log_security_event(event_type: str, user_id: Optional[int] = None, **details
     else:
         security_logger.info(f"Security event: {event_type}", **event_details)
 
-    # Also log to the structured metrics for analysis
-    security_logger.metric("security_event", 1, event_type=event_type, **details)
+    # Also count it in the metrics registry for analysis
+    SECURITY_EVENTS.labels(event_type=event_type).inc()
 
 def contextualize_exception(e: Exception, **context) -> Exception:
     """
@@ -1,30 +1,50 @@
-from fastapi import FastAPI, HTTPException, Depends, status, BackgroundTasks, File, UploadFile, Form, Response
+from fastapi import FastAPI, HTTPException, Depends, status, BackgroundTasks, File, UploadFile, Form, Response, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 import uvicorn
 from datetime import timedelta, datetime
 import sys
 import argparse
+import json
 
 from database import get_db, engine, Base
 import models
 import schemas
 import crud
+import dependency_graph
+import dependency_layout
+import impact_analysis
 import entity_crud
 import search_crud
 import user_crud
 import user_auth
+import settings_cache
 import auth
 import audit_logger
+import audit_writer
+import audit_storage
+import aggregate_views
+import upload_hashing
+import snapshots
+import metrics
+import query_stats
+import request_metrics
+import sampling_profiler
 from logger import get_logger
 import shutil
+import secrets
 import tempfile
 import pandas as pd
 import os
 from search_schemas import SearchResults
+from repository.cache import repository_cache
+from repository import index as repository_index
+from repository import sync as repository_sync
+from repository import providers as repository_providers
 from repository.repository_service import RepositoryService
 
 # Import database initializer
@@ -72,6 +92,22 @@ if initialize_db:
 # For backward compatibility, ensure all tables exist
 Base.metadata.create_all(bind=engine)
 
+# Single row bumped on every admin setting change (see settings_cache)
+settings_cache.ensure_version_row(engine)
+
+# Audit log indexes and monthly partitions / rollover tables
+audit_storage.ensure_audit_storage(engine)
+
+# Full-text index for the local repository index
+repository_index.ensure_search_index(engine)
+
+# Create SQL-side aggregate views for member counts and capacity if enabled
+if aggregate_views.AGGREGATE_VIEWS_ENABLED:
+    aggregate_views.create_aggregate_views(engine)
+
+# Count and time SQL statements per request
+query_stats.install_query_hooks(engine)
+
 app = FastAPI(title="Team API Portal")
 
 logger.info("FastAPI application initialized")
@@ -87,13 +123,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Per-route latency, status and size metrics (added first so it runs inside
+# QueryStatsMiddleware and can read the request's query count)
+app.add_middleware(request_metrics.RequestMetricsMiddleware)
+
+# Server-Timing header and slow-request log with per-request query stats
+app.add_middleware(query_stats.QueryStatsMiddleware)
+
+# Background audit log writer
+@app.on_event("startup")
+def start_background_workers():
+    audit_writer.start_audit_writer()
+    repository_sync.start_repository_sync()
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    # Drain queued audit entries before the process exits
+    audit_writer.stop_audit_writer()
+    repository_sync.stop_repository_sync()
+    repository_providers.close_clients()
+    if repository_cache is not None:
+        repository_cache.close()
+
 # Authentication endpoints
 @app.post("/token", response_model=schemas.Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     logger.info(f"Login attempt for user: {form_data.username}")
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
+    user = await auth.authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -154,7 +213,7 @@ def create_user(user: schemas.UserCreate,
 
     # Create user with full details (use email as username if not provided)
     username = user.username if user.username else user.email
-    hashed_password = auth.get_password_hash(user.password)
+    hashed_password = auth.hash_password_pooled(user.password)
     db_user = models.User(
         username=username,
         email=user.email,
@@ -389,11 +448,18 @@ async def upload_data(
     data_type: str = Form(...),
     sheet_name: str = Form(None),
     dry_run: bool = Form(False),
+    force: bool = Form(False),
     current_user: schemas.User = Depends(auth.get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    logger.info(f"Data upload initiated: type={data_type}, file={file.filename}, sheet={sheet_name}, dry_run={dry_run}, user_id={current_user.id}")
-    """Upload organizational data from Excel file"""
+    logger.info(f"Data upload initiated: type={data_type}, file={file.filename}, sheet={sheet_name}, dry_run={dry_run}, force={force}, user_id={current_user.id}")
+    """
+    Upload organizational data from Excel file
+
+    Files and rows are hashed per data_type. A file identical to the last one
+    imported is skipped, and only new or changed rows are applied, unless
+    force is set.
+    """
     # Check if the user is an admin
     if not user_auth.is_admin(current_user):
         raise HTTPException(status_code=403, detail="Not authorized to upload data")
@@ -413,40 +479,56 @@ async def upload_data(
     try:
         suffix = '.csv' if is_csv else '.xlsx'
         with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-            # Read the uploaded file and save it to a temporary file
-            shutil.copyfileobj(file.file, temp_file)
+            # Save the uploaded file to a temporary file, hashing it on the way
+            file_hash = upload_hashing.copy_and_hash(file.file, temp_file)
             temp_file_path = temp_file.name
 
+        # Skip files identical to the last import of this data type and sheet
+        hash_sheet = None if is_csv else sheet_name
+        if not force and upload_hashing.is_unchanged_file(db, data_type, hash_sheet, file_hash):
+            logger.info(f"Uploaded {data_type} file is unchanged since the last import, skipping: {file.filename}")
+            os.unlink(temp_file_path)
+            return {
+                "success": True,
+                "summary": {"message": "File is unchanged since the last upload. Nothing to import.", "skipped": True}
+            }
+
         # Process the Excel file based on data_type
         summary = {}
+        skipped_rows = []
         if data_type == "organization":
             # For organization structure (areas, tribes, squads, team members)
             try:
-                from load_prod_data import load_data_from_excel
+                from load_prod_data import read_organization_file, apply_organization_data, ORGANIZATION_COLUMNS
 
-                db_session = db
                 # Use the provided sheet_name or default to "Sheet1"
                 selected_sheet = sheet_name or "Sheet1"
-                # Process the file with append_mode=True to update existing data
-                load_data_from_excel(temp_file_path, db_session, append_mode=True,
-                                     sheet_name=selected_sheet, run_compatibility_check=False)
+                df = read_organization_file(temp_file_path, sheet_name=selected_sheet)
+                total_rows = len(df)
+                df, row_hashes = upload_hashing.filter_changed_rows(db, data_type, df, ORGANIZATION_COLUMNS, force=force)
+                # Process the changed rows with append_mode=True to update existing data
+                if not df.empty:
+                    apply_organization_data(df, db, append_mode=True, source=file.filename)
                 sheet_info = f" from sheet '{selected_sheet}'" if not is_csv else ""
                 summary = {"message": f"Organization data processed successfully{sheet_info}."}
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"Error processing organization data: {str(e)}")
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Error processing organization data: {str(e)}")
         elif data_type == "services":
             # For services data
             try:
-                from load_prod_data import load_services_data
+                from load_prod_data import read_services_file, apply_services_data, SERVICE_COLUMNS
 
-                db_session = db
                 # Use the provided sheet_name or default to "Services"
                 selected_sheet = sheet_name or "Services"
-                # Process the file with append_mode=True to update existing data
-                load_services_data(temp_file_path, db_session, append_mode=True,
-                                   sheet_name=selected_sheet, run_compatibility_check=False)
+                df = read_services_file(temp_file_path, sheet_name=selected_sheet)
+                if df is None:
+                    raise ValueError(f"Could not read services data from {file.filename}")
+                total_rows = len(df)
+                df, row_hashes = upload_hashing.filter_changed_rows(db, data_type, df, SERVICE_COLUMNS, force=force)
+                # Process the changed rows with append_mode=True to update existing data
+                if not df.empty:
+                    skipped_rows = apply_services_data(df, db, append_mode=True, source=file.filename)
+                    row_hashes = upload_hashing.drop_skipped_rows(row_hashes, skipped_rows)
                 sheet_info = f" from sheet '{selected_sheet}'" if not is_csv else ""
                 summary = {"message": f"Services data processed successfully{sheet_info}."}
             except Exception as e:
@@ -456,17 +538,31 @@ async def upload_data(
             if not is_csv:
                 raise HTTPException(status_code=400, detail="Dependencies data must be uploaded in CSV format")
             try:
-                from load_dependencies_data import load_dependencies_from_csv
-
-                db_session = db
-                # Process the file with append_mode=True to update existing data
-                load_dependencies_from_csv(temp_file_path, db_session, append_mode=True)
+                from load_dependencies_data import read_dependencies_file, apply_dependencies_data, DEPENDENCY_COLUMNS
+
+                df = read_dependencies_file(temp_file_path)
+                if df is None:
+                    raise ValueError(f"Could not read dependencies data from {file.filename}")
+                total_rows = len(df)
+                df, row_hashes = upload_hashing.filter_changed_rows(db, data_type, df, DEPENDENCY_COLUMNS, force=force)
+                # Process the changed rows with append_mode=True to update existing data
+                if not df.empty:
+                    skipped_rows = apply_dependencies_data(df, db, append_mode=True, source=file.filename)
+                    row_hashes = upload_hashing.drop_skipped_rows(row_hashes, skipped_rows)
                 summary = {"message": "Dependencies data processed successfully."}
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"Error processing dependencies data: {str(e)}")
         else:
             raise HTTPException(status_code=400, detail=f"Unsupported data type: {data_type}")
 
+        # Remember what was imported so the next upload can skip it
+        if not dry_run:
+            # Without a file hash the same file is parsed again, so skipped rows get retried
+            recorded_hash = None if skipped_rows else file_hash
+            upload_hashing.record_upload(db, data_type, hash_sheet, recorded_hash, row_hashes, total_rows, current_user.id)
+        summary["rows_total"] = total_rows
+        summary["rows_processed"] = len(df) - len(set(skipped_rows or []))
+
         # Log the data upload action
         audit_logger.log_data_upload(
             db=db,
@@ -487,6 +583,76 @@ async def upload_data(
             os.unlink(temp_file_path)
         raise HTTPException(status_code=500, detail=f"Error processing upload: {str(e)}")
 
+# Snapshot export/import endpoints
+@app.get("/admin/export/{dataset}")
+def export_snapshot(
+    dataset: str,
+    format: str = "parquet",
+    current_user: schemas.User = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Export a dataset (areas, tribes, squads, members, memberships, services, dependencies) as Parquet or Arrow"""
+    if not user_auth.is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Not authorized to export data")
+    if not snapshots.PYARROW_AVAILABLE:
+        raise HTTPException(status_code=501, detail="Snapshot export requires the 'pyarrow' package")
+    if dataset not in snapshots.DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset}")
+    if format not in snapshots.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}. Use one of: {', '.join(snapshots.FORMATS)}")
+
+    try:
+        content = snapshots.export_dataset(db, dataset, format)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting {dataset}: {str(e)}")
+
+    extension, media_type = snapshots.FORMATS[format]
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={dataset}{extension}"
+        }
+    )
+
+@app.post("/admin/import/{dataset}")
+async def import_snapshot(
+    dataset: str,
+    file: UploadFile = File(...),
+    replace: bool = Form(False),
+    current_user: schemas.User = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Import a Parquet or Arrow snapshot produced by /admin/export/{dataset}"""
+    if not user_auth.is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Not authorized to upload data")
+    if not snapshots.PYARROW_AVAILABLE:
+        raise HTTPException(status_code=501, detail="Snapshot import requires the 'pyarrow' package")
+    if dataset not in snapshots.DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset}")
+
+    fmt = snapshots.detect_format(file.filename)
+    if fmt is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid file format. Please upload a Parquet (.parquet) or Arrow (.arrow) file"
+        )
+
+    try:
+        row_count = snapshots.import_dataset(db, dataset, file.file, fmt, replace=replace)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error importing {dataset}: {str(e)}")
+
+    audit_logger.log_data_upload(
+        db=db,
+        user_id=current_user.id,
+        data_type=dataset,
+        is_dry_run=False,
+        details=f"Imported {row_count} {dataset} rows from {fmt} snapshot{' (replace)' if replace else ''}"
+    )
+
+    return {"success": True, "dataset": dataset, "rows_imported": row_count}
+
 # Admin settings endpoints
 @app.get("/admin/settings", response_model=List[schemas.AdminSetting])
 def get_admin_settings(current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
@@ -524,14 +690,89 @@ def update_admin_setting(key: str,
 @app.get("/admin/audit-logs", response_model=List[schemas.AuditLog])
 def get_audit_logs(skip: int = 0,
                    limit: int = 100,
+                   user_id: Optional[int] = None,
+                   entity_type: Optional[str] = None,
+                   entity_id: Optional[int] = None,
+                   action: Optional[str] = None,
+                   start_date: Optional[datetime] = None,
+                   end_date: Optional[datetime] = None,
+                   before: Optional[datetime] = None,
                    current_user: schemas.User = Depends(auth.get_current_active_user),
                    db: Session = Depends(get_db)):
     if not user_auth.is_admin(current_user):
         raise HTTPException(status_code=403, detail="Not authorized to access audit logs")
 
-    logs = user_auth.get_audit_logs(db, skip, limit)
+    logs = user_auth.get_audit_logs(
+        db, skip, min(limit, 1000),
+        user_id=user_id,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        action=action,
+        start_date=start_date,
+        end_date=end_date,
+        before=before
+    )
     return logs
 
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+def get_metrics(authorization: Optional[str] = Header(None)):
+    # Disabled until a scrape token is configured, so metrics are never public
+    if not metrics.METRICS_ENABLED or not metrics.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(authorization or "", f"Bearer {metrics.METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/admin/performance/routes")
+def get_slowest_routes(limit: int = 10,
+                       sort_by: str = "p99",
+                       current_user: schemas.User = Depends(auth.get_current_active_user)):
+    if not user_auth.is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Not authorized to access performance data")
+    if sort_by not in request_metrics.SORT_FIELDS:
+        raise HTTPException(status_code=400,
+                            detail=f"sort_by must be one of: {', '.join(request_metrics.SORT_FIELDS)}")
+
+    return request_metrics.slowest_routes(limit, sort_by)
+
+@app.get("/admin/performance/profile")
+async def get_sampling_profile(seconds: float = 10.0,
+                               interval_ms: float = 10.0,
+                               format: str = "speedscope",
+                               include_idle: bool = False,
+                               current_user: schemas.User = Depends(auth.get_current_active_user)):
+    """Sample all threads for a number of seconds and return a collapsed-stack or speedscope profile"""
+    if not user_auth.is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Not authorized to access performance data")
+    if format not in sampling_profiler.FORMATS:
+        raise HTTPException(status_code=400,
+                            detail=f"format must be one of: {', '.join(sampling_profiler.FORMATS)}")
+    if seconds <= 0 or seconds > sampling_profiler.PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=400,
+                            detail=f"seconds must be between 0 and {sampling_profiler.PROFILER_MAX_SECONDS:g}")
+
+    logger.info(f"User {current_user.id} started a {seconds}s sampling profile")
+    try:
+        # Sample from a worker thread so the event loop keeps serving requests
+        profile = await run_in_threadpool(sampling_profiler.collect_profile, seconds, interval_ms / 1000, include_idle)
+    except sampling_profiler.ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if format == "collapsed":
+        return Response(
+            content=profile.to_collapsed(),
+            media_type="text/plain",
+            headers={"Content-Disposition": f'attachment; filename="profile_{timestamp}.collapsed.txt"'}
+        )
+    return Response(
+        content=json.dumps(profile.to_speedscope()),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="profile_{timestamp}.speedscope.json"'}
+    )
+
 # Root endpoint
 @app.get("/")
 def read_root():
@@ -1084,6 +1325,13 @@ def update_service(
     updated_service = crud.update_service(db, service_id, service_update)
     if not updated_service:
         raise HTTPException(status_code=404, detail="Service not found")
+
+    # Record the blast radius of an outage; never fail the update because of it
+    if service_update.status in (schemas.ServiceStatus.DOWN, schemas.ServiceStatus.DEGRADED):
+        try:
+            impact_analysis.log_service_impact(db, service_id)
+        except Exception as e:
+            logger.error(f"Impact analysis for service {service_id} failed: {str(e)}")
     return updated_service
 
 @app.delete("/services/{service_id}", status_code=204)
@@ -1105,8 +1353,8 @@ def get_dependencies(squad_id: int, db: Session = Depends(get_db)):
 
 @app.get("/dependencies", response_model=List[schemas.Dependency])
 def get_all_dependencies(db: Session = Depends(get_db)):
-    dependencies = crud.get_all_dependencies(db)
-    return dependencies
+    # Served from the cached dependency graph instead of re-reading the table
+    return dependency_graph.get_graph(db).dependencies
 
 @app.post("/dependencies", response_model=schemas.Dependency, status_code=201)
 def create_dependency(
@@ -1148,6 +1396,76 @@ def delete_dependency(
         raise HTTPException(status_code=404, detail="Dependency not found")
     return None
 
+# Dependency graph
+def _graph_with_squads(db: Session, *squad_ids: int) -> dependency_graph.DependencyGraph:
+    graph = dependency_graph.get_graph(db)
+    if not all(graph.has_squad(squad_id) for squad_id in squad_ids):
+        raise HTTPException(status_code=404, detail="Squad not found")
+    return graph
+
+@app.get("/dependency-graph/squads/{squad_id}/upstream", response_model=schemas.DependencyClosure)
+def get_upstream_squads(squad_id: int, max_depth: Optional[int] = None, db: Session = Depends(get_db)):
+    """Squads the given squad depends on, directly or transitively"""
+    graph = _graph_with_squads(db, squad_id)
+    return {"squad_id": squad_id, "direction": "upstream",
+            "squads": graph.closure(squad_id, upstream=True, max_depth=max_depth)}
+
+@app.get("/dependency-graph/squads/{squad_id}/downstream", response_model=schemas.DependencyClosure)
+def get_downstream_squads(squad_id: int, max_depth: Optional[int] = None, db: Session = Depends(get_db)):
+    """Squads that depend on the given squad, directly or transitively"""
+    graph = _graph_with_squads(db, squad_id)
+    return {"squad_id": squad_id, "direction": "downstream",
+            "squads": graph.closure(squad_id, upstream=False, max_depth=max_depth)}
+
+@app.get("/dependency-graph/path", response_model=schemas.DependencyPath)
+def get_dependency_path(from_squad_id: int, to_squad_id: int, db: Session = Depends(get_db)):
+    """Shortest chain of dependencies leading from one squad to another"""
+    graph = _graph_with_squads(db, from_squad_id, to_squad_id)
+    path = graph.shortest_path(from_squad_id, to_squad_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="No dependency path between these squads")
+    return path
+
+@app.get("/dependency-graph/cycles", response_model=List[schemas.DependencyCycle])
+def get_dependency_cycles(db: Session = Depends(get_db)):
+    """Groups of squads that (transitively) depend on each other"""
+    return dependency_graph.get_graph(db).cycles()
+
+@app.get("/dependency-graph/layout", response_model=schemas.DependencyLayout)
+def get_dependency_layout(
+    level: str = "squad",
+    include_isolated: bool = False,
+    format: str = "json",
+    db: Session = Depends(get_db)
+):
+    """Precomputed dependency map positions, per squad or aggregated per tribe or area"""
+    if level not in dependency_layout.LEVELS:
+        raise HTTPException(status_code=400, detail=f"Unsupported level: {level}. Use one of: {', '.join(dependency_layout.LEVELS)}")
+    if format not in ("json", "binary"):
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}. Use one of: json, binary")
+
+    payload = dependency_layout.layout_cache.payload(db, level, include_isolated, binary=format == "binary")
+    if format == "binary":
+        return Response(content=payload, media_type="application/octet-stream")
+    return payload
+
+# Impact analysis
+@app.get("/impact/service/{service_id}", response_model=schemas.ServiceImpact)
+def get_service_impact(service_id: int, max_depth: Optional[int] = None, db: Session = Depends(get_db)):
+    """Squads, tribes and areas affected when a service's owning squad is unavailable"""
+    impact = impact_analysis.impact_analyzer.service_impact(db, service_id, max_depth)
+    if impact is None:
+        raise HTTPException(status_code=404, detail="Service not found")
+    return impact
+
+@app.get("/impact/{squad_id}", response_model=schemas.SquadImpact)
+def get_squad_impact(squad_id: int, max_depth: Optional[int] = None, db: Session = Depends(get_db)):
+    """Squads, tribes and areas affected when a squad is unavailable"""
+    impact = impact_analysis.impact_analyzer.squad_impact(db, squad_id, max_depth)
+    if impact is None:
+        raise HTTPException(status_code=404, detail="Squad not found")
+    return impact
+
 # On-call roster
 @app.get("/on-call/{squad_id}", response_model=schemas.OnCallRoster)
 def get_on_call(squad_id: int, db: Session = Depends(get_db)):
@@ -1441,6 +1759,48 @@ def get_group_projects(group_id: int, source: str = "gitlab", limit: int = 50, d
     projects = repo_service.get_group_projects(group_id, source, limit)
     return {"results": projects, "total": len(projects)}
 
+@app.put("/repositories/{repo_id}/service")
+def link_repository_service(repo_id: int,
+                            link: schemas.RepositoryServiceLink,
+                            source: str = "gitlab",
+                            current_user: schemas.User = Depends(auth.get_current_active_user),
+                            db: Session = Depends(get_db)):
+    """
+    Link a repository from the local index to a service of type repo
+    """
+    repo_service = RepositoryService(db)
+    try:
+        repository = repo_service.link_service(repo_id, source, link.service_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not repository:
+        raise HTTPException(status_code=404, detail="Repository not found in the local index")
+
+    return repository
+
+@app.get("/services/{service_id}/repositories")
+def get_service_repositories(service_id: int, db: Session = Depends(get_db)):
+    """
+    Get the indexed repositories linked to a service
+    """
+    repositories = RepositoryService(db).get_service_repositories(service_id)
+    return {"results": repositories, "total": len(repositories)}
+
+@app.post("/admin/repositories/sync")
+def sync_repository_index(full: bool = False,
+                          current_user: schemas.User = Depends(auth.get_current_active_user)):
+    """
+    Synchronise the local repository index from the configured GitLab groups now
+    """
+    if not user_auth.is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Not authorized to synchronise repositories")
+
+    stats = repository_sync.run_once(full=full)
+    if stats is None:
+        raise HTTPException(status_code=400,
+                            detail=f"Configure gitlab_api_url, gitlab_api_token and {repository_sync.SYNC_GROUPS_SETTING} first")
+    return stats
+
 if __name__ == "__main__":
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description="Who What Where Portal Backend")
@@ -0,0 +1,310 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+
+Counters, gauges and fixed-bucket histograms, optionally labelled. Memory
+is bounded: a histogram keeps one count per bucket rather than the samples,
+and each metric holds at most METRICS_MAX_SERIES label combinations (further
+combinations are dropped with a single warning).
+
+Usage:
+    from metrics import registry
+
+    requests_total = registry.counter("requests_total", "Requests handled", ["method"])
+    requests_total.labels(method="GET").inc()
+
+    duration = registry.histogram("operation_duration_seconds", "Operation duration", ["operation"])
+    duration.labels(operation="load").observe(0.42)
+
+The registry is served at /metrics (see main.py) to scrapers presenting
+METRICS_TOKEN as a bearer token. Percentiles can be read
+with Histogram.quantile() in-process or with histogram_quantile() in PromQL.
+"""
+
+import os
+import re
+import math
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar
+
+from logger import get_logger
+
+# Initialize logger
+logger = get_logger('metrics', log_level='INFO')
+
+# Configuration
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_MAX_SERIES = int(os.environ.get("METRICS_MAX_SERIES", "1000"))
+# Bearer token required to scrape /metrics; the endpoint is disabled until one is set
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# Default latency buckets in seconds (1ms .. 30s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_:]")
+
+def sanitize_name(name: str) -> str:
+    """Make a string a valid Prometheus metric or label name"""
+    name = _INVALID_NAME_CHARS.sub("_", name)
+    if not name or name[0].isdigit():
+        name = "_" + name
+    return name
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric(ABC):
+    """Base class for a metric family with optional labels"""
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str = "", labelnames: Iterable[str] = (),
+                 max_series: int = METRICS_MAX_SERIES):
+        self.name = sanitize_name(name)
+        self.documentation = documentation
+        self.labelnames = tuple(sanitize_name(label) for label in labelnames)
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._overflow_warned = False
+
+    @abstractmethod
+    def _new_child(self):
+        """Create the object holding one label combination's value"""
+
+    def labels(self, **labels):
+        """Get the child series for a set of label values"""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is not None:
+            return child
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                if len(self._children) >= self.max_series:
+                    if not self._overflow_warned:
+                        logger.warning(f"Metric {self.name} reached {self.max_series} series, dropping new label values")
+                        self._overflow_warned = True
+                    # Detached child: updates are accepted but not exported
+                    return self._new_child()
+                child = self._new_child()
+                self._children[key] = child
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"Metric {self.name} requires labels: {', '.join(self.labelnames)}")
+        return self.labels()
+
+    def series(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def clear(self):
+        with self._lock:
+            self._children.clear()
+
+    def render(self) -> List[str]:
+        lines = []
+        if self.documentation:
+            lines.append(f"# HELP {self.name} {_escape(self.documentation)}")
+        lines.append(f"# TYPE {self.name} {self.metric_type}")
+        for values, child in sorted(self.series()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.get())}"]
+
+class _Value:
+    """A single float value guarded by a lock"""
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = float(value)
+
+    def get(self) -> float:
+        return self._value
+
+class _CounterChild(_Value):
+    def inc(self, amount: float = 1.0):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        super().inc(amount)
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    metric_type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    metric_type = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default().dec(amount)
+
+    def set(self, value: float):
+        self._default().set(value)
+
+class _HistogramChild:
+    """Fixed-bucket histogram: one count per bucket plus sum and count"""
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile by linear interpolation within its bucket (the
+        same estimate as PromQL histogram_quantile).
+        """
+        counts, _, total = self.snapshot()
+        if total == 0:
+            return None
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if count and cumulative + count >= rank:
+                if index == len(self.buckets):
+                    # Beyond the last finite bucket
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets"""
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str = "", labelnames: Iterable[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, max_series: int = METRICS_MAX_SERIES):
+        super().__init__(name, documentation, labelnames, max_series)
+        self.buckets = tuple(sorted(float(bucket) for bucket in buckets if bucket != math.inf))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        child: _HistogramChild = self.labels(**labels)
+        return child.quantile(q)
+
+    def _render_child(self, values, child) -> List[str]:
+        counts, total_sum, total_count = child.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + [math.inf], counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, values, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total_sum)}")
+        lines.append(f"{self.name}_count{labels} {total_count}")
+        return lines
+
+_MetricT = TypeVar("_MetricT", bound=_Metric)
+
+class MetricsRegistry:
+    """Named collection of metrics; get-or-create accessors make registration idempotent"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_class: Type[_MetricT], name: str, *args, **kwargs) -> _MetricT:
+        key = sanitize_name(name)
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = metric_class(name, *args, **kwargs)
+                    self._metrics[key] = metric
+        if not isinstance(metric, metric_class):
+            raise ValueError(f"Metric {key} is already registered as a {metric.metric_type}")
+        return metric
+
+    def counter(self, name: str, documentation: str = "", labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str = "", labelnames: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str = "", labelnames: Iterable[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(sanitize_name(name))
+
+    def clear(self):
+        """Reset every series (registered metrics are kept)"""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+# Shared registry for the application
+registry = MetricsRegistry()
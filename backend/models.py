@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, Text, Table, DateTime, JSON
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, Text, Table, DateTime, JSON, Index, UniqueConstraint, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.schema import MetaData
@@ -171,9 +171,30 @@ class AdminSetting(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
+class SettingsVersion(Base):
+    """Single-row counter bumped on every admin setting change, so each worker can tell its cache is stale"""
+    __tablename__ = "settings_version"
+    __table_args__ = {'schema': schema} if schema else {}
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+@event.listens_for(SettingsVersion.__table__, "after_create")
+def _seed_settings_version(target, connection, **kw):
+    """Create the single settings_version row with the table, so writers only ever update it"""
+    connection.execute(target.insert().values(id=1, version=0))
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
-    __table_args__ = {'schema': schema} if schema else {}
+    __table_args__ = (
+        # Composite indexes for the filtered, newest-first audit queries
+        Index("ix_audit_logs_created_at", "created_at"),
+        Index("ix_audit_logs_user_id_created_at", "user_id", "created_at"),
+        Index("ix_audit_logs_entity_created_at", "entity_type", "entity_id", "created_at"),
+        # SQLite rollover can empty the table; AUTOINCREMENT keeps ids from being reused
+        {'schema': schema, 'sqlite_autoincrement': True} if schema else {'sqlite_autoincrement': True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id" if not schema else f"{schema}.users.id"), nullable=True)
@@ -186,6 +207,32 @@ class AuditLog(Base):
     # Relationships
     user = relationship("User")
 
+class UploadFileHash(Base):
+    """Content hash of the last successfully imported file per data type and sheet"""
+    __tablename__ = "upload_file_hashes"
+    __table_args__ = {'schema': schema} if schema else {}
+
+    id = Column(Integer, primary_key=True, index=True)
+    data_type = Column(String, index=True)  # organization, services, dependencies
+    sheet_name = Column(String, nullable=True)  # None for CSV files
+    file_hash = Column(String(64))  # SHA-256 hex digest of the uploaded bytes
+    row_count = Column(Integer, default=0)
+    uploaded_by = Column(Integer, ForeignKey("users.id" if not schema else f"{schema}.users.id"), nullable=True)
+    uploaded_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+class UploadRowHash(Base):
+    """Content hash of a normalized row applied by the last import of a data type"""
+    __tablename__ = "upload_row_hashes"
+    __table_args__ = (
+        UniqueConstraint("data_type", "row_hash", name="uq_upload_row_hashes_data_type_row_hash"),
+        {'schema': schema} if schema else {},
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    data_type = Column(String, index=True)
+    row_hash = Column(String(64), index=True)  # SHA-256 hex digest of the normalized row
+    created_at = Column(DateTime, default=func.now())
+
 class AreaLabel(enum.Enum):
     CFU_ALIGNED = "cfu_aligned"
     PLATFORM_GROUP = "platform_group"
@@ -330,6 +377,35 @@ class Service(Base):
     # Relationships
     squad = relationship("Squad", back_populates="services")
 
+class Repository(Base):
+    """Local index of repository platform projects and groups, kept up to date by repository/sync.py"""
+    __tablename__ = "repositories"
+    __table_args__ = (
+        UniqueConstraint("source", "kind", "external_id", name="uq_repositories_source_kind_external_id"),
+        Index("ix_repositories_sync_group_last_activity_at", "sync_group", "last_activity_at"),
+        {'schema': schema} if schema else {},
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, default="gitlab")  # Lowercase, as in the repository API responses
+    kind = Column(String, default="repository")  # repository or group
+    external_id = Column(Integer)  # Project / group id on the platform
+    name = Column(String, index=True)
+    path = Column(String)
+    description = Column(Text, nullable=True)
+    url = Column(String, nullable=True)
+    avatar_url = Column(String, nullable=True)
+    default_branch = Column(String, nullable=True)
+    sync_group = Column(String, nullable=True)  # Configured group it was crawled through
+    last_activity_at = Column(DateTime, nullable=True)
+    synced_at = Column(DateTime, default=func.now())
+    # Service of type repo this repository belongs to
+    service_id = Column(Integer, ForeignKey("services.id" if not schema else f"{schema}.services.id"),
+                        nullable=True, index=True)
+
+    # Relationships
+    service = relationship("Service")
+
 class Dependency(Base):
     __tablename__ = "dependencies"
     __table_args__ = {'schema': schema} if schema else {}
@@ -0,0 +1,165 @@
+"""
+Per-request SQL query counting and timing.
+
+SQLAlchemy cursor events time every statement executed on the engine and
+attribute it to the QueryStats of the current request, held in a
+contextvar. Sync endpoints run in a worker thread with a copy of the
+request context, so their queries are attributed as well; queries from
+background threads (audit writer, loaders) are not.
+
+QueryStatsMiddleware adds a Server-Timing header to every response:
+
+    Server-Timing: db;dur=12.4;desc="7 queries", app;dur=31.0
+
+and logs a warning for requests slower than SLOW_REQUEST_THRESHOLD_MS or
+running more than QUERY_COUNT_WARNING_THRESHOLD statements (typically an
+N+1 pattern), including the slowest statement.
+
+Outside requests, use track_queries():
+
+    with track_queries() as stats:
+        crud.get_squads(db)
+    print(stats.count, stats.total_time)
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from logger import get_logger
+
+# Initialize logger
+logger = get_logger('query_stats', log_level='INFO')
+
+# Configuration
+QUERY_STATS_ENABLED = os.environ.get("QUERY_STATS_ENABLED", "true").lower() in ("1", "true", "yes")
+SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get("SLOW_REQUEST_THRESHOLD_MS", "1000"))
+QUERY_COUNT_WARNING_THRESHOLD = int(os.environ.get("QUERY_COUNT_WARNING_THRESHOLD", "100"))
+
+# Longest statement text kept for the slow-request log
+_MAX_STATEMENT_LENGTH = 500
+
+class QueryStats:
+    """Query count and timing for one request (or one track_queries block)"""
+
+    __slots__ = ("count", "total_time", "slowest_time", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.total_time += duration
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+    def to_dict(self):
+        return {
+            "query_count": self.count,
+            "db_time_ms": round(self.total_time * 1000, 2),
+            "slowest_query_ms": round(self.slowest_time * 1000, 2),
+            "slowest_statement": _shorten(self.slowest_statement),
+        }
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def _shorten(statement: Optional[str]) -> Optional[str]:
+    if statement is None:
+        return None
+    statement = " ".join(statement.split())
+    if len(statement) > _MAX_STATEMENT_LENGTH:
+        return statement[:_MAX_STATEMENT_LENGTH] + "..."
+    return statement
+
+def get_current_stats() -> Optional[QueryStats]:
+    """QueryStats of the current request, if any"""
+    return _current_stats.get()
+
+@contextmanager
+def track_queries():
+    """Collect query stats for the statements executed inside the block"""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, so a statement that raises leaves nothing behind
+    if _current_stats.get() is not None and context is not None:
+        context._query_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    start = getattr(context, "_query_start", None)
+    if stats is not None and start is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+def install_query_hooks(engine):
+    """Register the cursor execute listeners on an engine (idempotent)"""
+    if not QUERY_STATS_ENABLED:
+        return
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        logger.info("SQL query instrumentation enabled")
+
+def server_timing_header(stats: QueryStats, app_time: float) -> str:
+    """Server-Timing header value for a request"""
+    return (f'db;dur={stats.total_time * 1000:.1f};desc="{stats.count} queries", '
+            f'app;dur={app_time * 1000:.1f}')
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware that tracks queries per request, sets the Server-Timing
+    header and logs slow or query-heavy requests.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not QUERY_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        status_code = None
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing",
+                                server_timing_header(stats, time.perf_counter() - start).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            duration = time.perf_counter() - start
+            if duration * 1000 >= SLOW_REQUEST_THRESHOLD_MS or stats.count >= QUERY_COUNT_WARNING_THRESHOLD:
+                logger.structured(
+                    'WARNING',
+                    f"Slow request: {scope['method']} {scope['path']} took {duration * 1000:.1f}ms "
+                    f"with {stats.count} queries",
+                    method=scope["method"],
+                    path=scope["path"],
+                    status_code=status_code,
+                    duration_ms=round(duration * 1000, 2),
+                    **stats.to_dict()
+                )
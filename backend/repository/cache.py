@@ -0,0 +1,179 @@
+"""
+Stale-while-revalidate cache for repository platform responses.
+
+Entries are fresh for their TTL and served straight from memory. After that
+they stay servable for REPOSITORY_CACHE_STALE_SECONDS: a stale hit returns
+the old value immediately and refreshes it on a background thread (one
+refresh per key at a time). Only entries older than TTL + stale window, or
+missing ones, make the caller wait for the remote call.
+
+Values must be JSON serializable. None is never cached (the clients return
+None on errors); empty results are cached for the shorter
+REPOSITORY_CACHE_EMPTY_TTL_SECONDS so a transient failure does not hide
+results for long.
+
+With REPOSITORY_CACHE_DB_PATH set, entries are also written to a SQLite file
+so a restarted worker (or another worker on the same host) starts warm.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+REPOSITORY_CACHE_ENABLED = os.environ.get("REPOSITORY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+REPOSITORY_SEARCH_TTL_SECONDS = float(os.environ.get("REPOSITORY_SEARCH_TTL_SECONDS", "300"))
+REPOSITORY_DETAILS_TTL_SECONDS = float(os.environ.get("REPOSITORY_DETAILS_TTL_SECONDS", "1800"))
+REPOSITORY_CACHE_EMPTY_TTL_SECONDS = float(os.environ.get("REPOSITORY_CACHE_EMPTY_TTL_SECONDS", "30"))
+REPOSITORY_CACHE_STALE_SECONDS = float(os.environ.get("REPOSITORY_CACHE_STALE_SECONDS", "3600"))
+REPOSITORY_CACHE_MAX_ENTRIES = int(os.environ.get("REPOSITORY_CACHE_MAX_ENTRIES", "2000"))
+REPOSITORY_CACHE_DB_PATH = os.environ.get("REPOSITORY_CACHE_DB_PATH", "")
+
+class _DiskStore:
+    """SQLite backing store: key -> (JSON value, stored_at, ttl)"""
+
+    def __init__(self, path: str):
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS repository_cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, ttl REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, stored_at, ttl FROM repository_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def set(self, key: str, value: Any, stored_at: float, ttl: float):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO repository_cache (key, value, stored_at, ttl) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), stored_at, ttl),
+            )
+
+    def prune(self, max_age: float):
+        with self._lock:
+            self._connection.execute("DELETE FROM repository_cache WHERE stored_at + ttl + ? < ?",
+                                     (max_age, time.time()))
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM repository_cache")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+class RepositoryCache:
+    """LRU of remote responses with per-entry TTLs and background revalidation"""
+
+    def __init__(self, stale_seconds: float = REPOSITORY_CACHE_STALE_SECONDS,
+                 max_entries: int = REPOSITORY_CACHE_MAX_ENTRIES, db_path: str = "",
+                 empty_ttl_seconds: float = REPOSITORY_CACHE_EMPTY_TTL_SECONDS):
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self.empty_ttl_seconds = empty_ttl_seconds
+        # Wall-clock timestamps, so entries loaded from disk compare correctly
+        self._entries = OrderedDict()  # key -> (value, stored_at, ttl)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="repository-cache")
+        self._disk = _DiskStore(db_path) if db_path else None
+        if self._disk:
+            self._disk.prune(stale_seconds)
+
+    def _lookup(self, key: str) -> Optional[Tuple[Any, float, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self._disk:
+            entry = self._disk.get(key)
+            if entry is not None:
+                self._remember(key, entry)
+            return entry
+        return None
+
+    def _remember(self, key: str, entry: Tuple[Any, float, float]):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Store a value; None is ignored and empty values get the short TTL"""
+        if value is None:
+            return
+        if not value:
+            ttl = min(ttl, self.empty_ttl_seconds)
+        entry = (value, time.time(), ttl)
+        self._remember(key, entry)
+        if self._disk:
+            try:
+                self._disk.set(key, *entry)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning(f"Could not persist repository cache entry {key}: {str(e)}")
+
+    def _refresh(self, key: str, fetch: Callable[[], Any], ttl: float):
+        try:
+            self.set(key, fetch(), ttl)
+        except Exception as e:
+            logger.error(f"Background refresh of {key} failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any], ttl: float) -> Any:
+        """
+        Cached value for `key`, calling `fetch()` on a miss.
+
+        Fresh entries are returned as is; stale ones are returned immediately
+        while `fetch()` refreshes them in the background.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            value, stored_at, entry_ttl = entry
+            age = time.time() - stored_at
+            if age < entry_ttl:
+                return value
+            if age < entry_ttl + self.stale_seconds:
+                with self._lock:
+                    schedule = key not in self._refreshing
+                    self._refreshing.add(key)
+                if schedule:
+                    self._executor.submit(self._refresh, key, fetch, ttl)
+                return value
+
+        value = fetch()
+        self.set(key, value, ttl)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._disk:
+            self._disk.clear()
+
+    def close(self):
+        """Stop background refreshes and close the backing store"""
+        self._executor.shutdown(wait=True)
+        if self._disk:
+            self._disk.close()
+
+repository_cache = RepositoryCache(db_path=REPOSITORY_CACHE_DB_PATH) if REPOSITORY_CACHE_ENABLED else None
@@ -0,0 +1,83 @@
+import requests
+from typing import List, Dict, Any, Optional
+import logging
+
+from .gitlab_client import create_session, GITLAB_CONNECT_TIMEOUT_SECONDS, GITLAB_READ_TIMEOUT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = "https://api.github.com"
+
+def _format_repository(repository: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": repository["id"],
+        "name": repository["name"],
+        "path": repository.get("full_name", ""),
+        "description": repository.get("description") or "",
+        "type": "repository",  # Use lowercase for consistency
+        "url": repository.get("html_url", ""),
+        "avatar_url": (repository.get("owner") or {}).get("avatar_url", ""),
+        "default_branch": repository.get("default_branch"),
+        "source": "github",  # Use lowercase for consistency
+        "updated_at": repository.get("pushed_at") or repository.get("updated_at") or ""
+    }
+
+class GitHubClient:
+    """
+    Client for the GitHub REST API
+
+    Shares the pooled, retrying session setup of GitLabClient. Organisations
+    play the role of GitLab groups.
+    """
+
+    def __init__(self, token: str, api_url: str = DEFAULT_API_URL, session: Optional[requests.Session] = None,
+                 timeout: Optional[tuple] = None):
+        self.api_url = (api_url or DEFAULT_API_URL).rstrip("/")
+        self.token = token
+        self.session = session or create_session(token, auth_headers={
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+        })
+        self.timeout = timeout or (GITLAB_CONNECT_TIMEOUT_SECONDS, GITLAB_READ_TIMEOUT_SECONDS)
+
+    def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        response = self.session.get(f"{self.api_url}/{path.lstrip('/')}", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
+    def search_repositories(self, search_term: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Search repositories visible to the token (errors propagate)
+        """
+        response = self._get("search/repositories", {"q": search_term, "per_page": min(limit, 100)})
+        return [_format_repository(item) for item in response.json().get("items", [])[:limit]]
+
+    def get_repository_details(self, repository_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get details of a repository by its numeric id
+        Returns repository details or None if not found
+        """
+        try:
+            repository = self._get(f"repositories/{repository_id}").json()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error getting GitHub repository details: {str(e)}")
+            return None
+
+        details = _format_repository(repository)
+        details.update({"type": "repo", "created_at": repository.get("created_at", "")})
+        return details
+
+    def get_group_projects(self, organisation_id: int, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get repositories of an organisation by its numeric id
+        """
+        try:
+            response = self._get(f"organizations/{organisation_id}/repos", {"per_page": min(limit, 100)})
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error getting GitHub organisation repositories: {str(e)}")
+            return []
+        return [_format_repository(item) for item in response.json()[:limit]]
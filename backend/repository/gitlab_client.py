@@ -1,103 +1,218 @@
+import os
+import time
 import requests
-from typing import List, Dict, Any, Optional
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import List, Dict, Any, Iterator, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# HTTP client configuration
+GITLAB_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("GITLAB_CONNECT_TIMEOUT_SECONDS", "5"))
+GITLAB_READ_TIMEOUT_SECONDS = float(os.environ.get("GITLAB_READ_TIMEOUT_SECONDS", "30"))
+GITLAB_MAX_RETRIES = int(os.environ.get("GITLAB_MAX_RETRIES", "3"))
+GITLAB_RETRY_BACKOFF_SECONDS = float(os.environ.get("GITLAB_RETRY_BACKOFF_SECONDS", "0.5"))
+GITLAB_POOL_SIZE = int(os.environ.get("GITLAB_POOL_SIZE", "10"))
+# Overall time budget for one search / listing, across pages and retries
+GITLAB_REQUEST_DEADLINE_SECONDS = float(os.environ.get("GITLAB_REQUEST_DEADLINE_SECONDS", "10"))
+
+# GitLab caps per_page at 100
+MAX_PER_PAGE = 100
+
+# Transient statuses worth retrying (rate limiting and gateway errors)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+def create_session(token: str, pool_size: int = GITLAB_POOL_SIZE, max_retries: int = GITLAB_MAX_RETRIES,
+                   backoff_seconds: float = GITLAB_RETRY_BACKOFF_SECONDS,
+                   auth_headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    Session with a keep-alive connection pool and retries with exponential backoff.
+
+    Authenticates with GitLab's PRIVATE-TOKEN header unless `auth_headers` are given.
+
+    Only idempotent methods are retried; Retry-After headers on 429/503 are honoured.
+    Read timeouts are not retried: a slow GitLab would only push the caller
+    past its deadline.
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=0,
+        status=max_retries,
+        backoff_factor=backoff_seconds,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(auth_headers or {"PRIVATE-TOKEN": token})
+    session.headers["Content-Type"] = "application/json"
+    return session
+
+# Runs the project and group searches side by side (threads share the session's pool)
+_search_executor = ThreadPoolExecutor(max_workers=GITLAB_POOL_SIZE, thread_name_prefix="gitlab-search")
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised when a request would start after the caller's deadline"""
+
+def _format_project(project: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": project["id"],
+        "name": project["name"],
+        "path": project.get("path_with_namespace", ""),
+        "description": project.get("description", ""),
+        "type": "repository",  # Use lowercase for consistency
+        "url": project.get("web_url", ""),
+        "avatar_url": project.get("avatar_url", ""),
+        "default_branch": project.get("default_branch"),
+        "source": "gitlab",  # Use lowercase for consistency
+        "updated_at": project.get("last_activity_at", "")
+    }
+
+def _format_group(group: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": group["id"],
+        "name": group["name"],
+        "path": group.get("full_path", ""),
+        "description": group.get("description", ""),
+        "type": "group",  # Use lowercase for consistency
+        "url": group.get("web_url", ""),
+        "avatar_url": group.get("avatar_url", ""),
+        "source": "gitlab",  # Use lowercase for consistency
+        "updated_at": group.get("created_at", "")
+    }
+
 class GitLabClient:
-    """Client for interacting with the GitLab API"""
+    """
+    Client for interacting with the GitLab API
+
+    Holds a pooled requests.Session, so one instance should be shared across
+    requests (see providers.get_gitlab_client) and closed when the
+    settings it was built from change.
+    """
 
-    def __init__(self, api_url: str, token: str):
+    def __init__(self, api_url: str, token: str, session: Optional[requests.Session] = None,
+                 timeout: Optional[tuple] = None):
         self.api_url = api_url.rstrip("/")  # Remove trailing slashes
         self.token = token
-        self.headers = {
-            "PRIVATE-TOKEN": token,
-            "Content-Type": "application/json"
-        }
+        self.session = session or create_session(token)
+        self.timeout = timeout or (GITLAB_CONNECT_TIMEOUT_SECONDS, GITLAB_READ_TIMEOUT_SECONDS)
 
-    def search_repositories(self, search_term: str, limit: int = 20) -> List[Dict[str, Any]]:
+    def _get(self, url: str, params: Optional[Dict[str, Any]] = None,
+             deadline: Optional[float] = None) -> requests.Response:
         """
-        Search for repositories in GitLab using the provided search term
-        Returns a list of repositories with their details
+        GET through the pooled session, raising for error statuses.
+
+        `deadline` is a time.monotonic() value; the read timeout is shortened
+        so the request cannot run past it.
         """
-        if len(search_term) < 3:
-            logger.warning(f"Search term is too short: {search_term}")
-            return []
+        timeout = self.timeout
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"Deadline exceeded before GET {url}")
+            timeout = (min(timeout[0], remaining), min(timeout[1], remaining))
+        response = self.session.get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response
 
-        try:
-            # First, search for projects
-            projects_url = f"{self.api_url}/api/v4/projects"
-            params = {
-                "search": search_term,
-                "order_by": "name",
-                "sort": "asc",
-                "per_page": limit,
-                "simple": True  # Return simple project data (faster)
-            }
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
 
-            response = requests.get(projects_url, headers=self.headers, params=params)
-            response.raise_for_status()
-
-            projects = response.json()
-
-            # Format repositories with type flag
-            formatted_repos = []
-            for project in projects:
-                formatted_repos.append({
-                    "id": project["id"],
-                    "name": project["name"],
-                    "path": project.get("path_with_namespace", ""),
-                    "description": project.get("description", ""),
-                    "type": "repository",  # Use lowercase for consistency
-                    "url": project.get("web_url", ""),
-                    "avatar_url": project.get("avatar_url", ""),
-                    "source": "gitlab",  # Use lowercase for consistency
-                    "updated_at": project.get("last_activity_at", "")
-                })
-
-            # Next, search for groups
-            groups_url = f"{self.api_url}/api/v4/groups"
-            params = {
-                "search": search_term,
-                "order_by": "name",
-                "sort": "asc",
-                "per_page": limit
-            }
+    def _deadline(self, deadline_seconds: Optional[float]) -> float:
+        return time.monotonic() + (deadline_seconds if deadline_seconds is not None else GITLAB_REQUEST_DEADLINE_SECONDS)
 
-            response = requests.get(groups_url, headers=self.headers, params=params)
-            response.raise_for_status()
+    def iter_pages(self, path: str, params: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+                   per_page: int = MAX_PER_PAGE, deadline: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield items of a paginated API listing, fetching the next page only when needed
 
-            groups = response.json()
+        Follows GitLab's X-Next-Page header (or the Link header) until the
+        listing ends, `limit` items have been yielded or the deadline passes.
+        """
+        params = dict(params or {})
+        params["per_page"] = max(1, min(per_page, MAX_PER_PAGE, limit or MAX_PER_PAGE))
+        url = f"{self.api_url}/api/v4/{path.lstrip('/')}"
+        yielded = 0
 
-            # Format groups with type flag
-            for group in groups:
-                formatted_repos.append({
-                    "id": group["id"],
-                    "name": group["name"],
-                    "path": group.get("full_path", ""),
-                    "description": group.get("description", ""),
-                    "type": "group",  # Use lowercase for consistency
-                    "url": group.get("web_url", ""),
-                    "avatar_url": group.get("avatar_url", ""),
-                    "source": "gitlab",  # Use lowercase for consistency
-                    "updated_at": group.get("created_at", "")
-                })
+        while url:
+            response = self._get(url, params, deadline)
+            for item in response.json():
+                yield item
+                yielded += 1
+                if limit is not None and yielded >= limit:
+                    return
 
-            return formatted_repos
+            next_page = response.headers.get("X-Next-Page")
+            if next_page:
+                params["page"] = next_page
+            elif "next" in response.links:
+                # The Link URL already carries every query parameter
+                url, params = response.links["next"]["url"], None
+            else:
+                url = None
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error searching GitLab repositories: {str(e)}")
+    def _collect(self, path: str, params: Dict[str, Any], limit: int, deadline: float) -> List[Dict[str, Any]]:
+        """Items of a listing up to `limit`; a timeout keeps the pages fetched so far"""
+        items = []
+        try:
+            for item in self.iter_pages(path, params, limit=limit, deadline=deadline):
+                items.append(item)
+        except requests.exceptions.Timeout as e:
+            logger.warning(f"GitLab listing {path} stopped after {len(items)} items: {str(e)}")
+        return items
+
+    def search_repositories(self, search_term: str, limit: int = 20,
+                            deadline_seconds: Optional[float] = None,
+                            raise_errors: bool = False) -> List[Dict[str, Any]]:
+        """
+        Search for repositories in GitLab using the provided search term
+        Returns a list of repositories with their details
+
+        Projects and groups are searched concurrently, each up to `limit`
+        results, within one shared deadline. With raise_errors, request
+        errors propagate instead of being logged (used by circuit breakers).
+        """
+        if len(search_term) < 3:
+            logger.warning(f"Search term is too short: {search_term}")
             return []
 
-    def get_repository_details(self, repository_id: int) -> Optional[Dict[str, Any]]:
+        deadline = self._deadline(deadline_seconds)
+        search = {"search": search_term, "order_by": "name", "sort": "asc"}
+        projects = _search_executor.submit(
+            self._collect, "projects", {**search, "simple": True}, limit, deadline  # simple project data is faster
+        )
+        groups = _search_executor.submit(self._collect, "groups", search, limit, deadline)
+
+        formatted_repos = []
+        for future, formatter, kind in ((projects, _format_project, "projects"), (groups, _format_group, "groups")):
+            try:
+                formatted_repos.extend(formatter(item) for item in future.result())
+            except requests.exceptions.RequestException as e:
+                if raise_errors:
+                    raise
+                logger.error(f"Error searching GitLab {kind}: {str(e)}")
+
+        return formatted_repos
+
+    def get_repository_details(self, repository_id: int,
+                               deadline_seconds: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
         Get details of a specific repository by ID
         Returns repository details or None if not found
         """
         try:
             url = f"{self.api_url}/api/v4/projects/{repository_id}"
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
+            response = self._get(url, deadline=self._deadline(deadline_seconds))
 
             project = response.json()
 
@@ -117,39 +232,44 @@ class GitLabClient:
             logger.error(f"Error getting repository details: {str(e)}")
             return None
 
-    def get_group_projects(self, group_id: int, limit: int = 50) -> List[Dict[str, Any]]:
+    def get_group_projects(self, group_id: int, limit: int = 50,
+                           deadline_seconds: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         Get all projects (repositories) in a group
-        Returns a list of repositories with their details
+        Returns a list of repositories with their details, following pagination up to `limit`
         """
         try:
-            url = f"{self.api_url}/api/v4/groups/{group_id}/projects"
-            params = {
-                "per_page": limit,
-                "simple": True
-            }
-
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-
-            projects = response.json()
-
-            formatted_repos = []
-            for project in projects:
-                formatted_repos.append({
-                    "id": project["id"],
-                    "name": project["name"],
-                    "path": project.get("path_with_namespace", ""),
-                    "description": project.get("description", ""),
-                    "type": "repository",  # Use lowercase for consistency
-                    "url": project.get("web_url", ""),
-                    "avatar_url": project.get("avatar_url", ""),
-                    "source": "gitlab",  # Use lowercase for consistency
-                    "updated_at": project.get("last_activity_at", "")
-                })
-
-            return formatted_repos
+            projects = self._collect(f"groups/{group_id}/projects", {"simple": True}, limit,
+                                     self._deadline(deadline_seconds))
+            return [_format_project(project) for project in projects]
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error getting group projects: {str(e)}")
             return []
+
+    def iter_group_projects(self, group_id, include_subgroups: bool = True,
+                            last_activity_after: Optional[str] = None,
+                            deadline_seconds: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every project in a group, following pagination
+
+        Unlike get_group_projects, errors and timeouts are raised, so callers
+        can tell a complete listing from a partial one.
+        """
+        params: Dict[str, Any] = {"simple": True, "include_subgroups": include_subgroups,
+                                  "order_by": "last_activity_at", "sort": "desc"}
+        if last_activity_after:
+            params["last_activity_after"] = last_activity_after
+        path = f"groups/{quote(str(group_id), safe='')}/projects"
+        for project in self.iter_pages(path, params, deadline=self._deadline(deadline_seconds)):
+            yield _format_project(project)
+
+    def iter_group_and_subgroups(self, group_id,
+                                 deadline_seconds: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Yield a group followed by all of its descendant groups, raising on errors"""
+        deadline = self._deadline(deadline_seconds)
+        group_path = quote(str(group_id), safe="")  # ids or full paths such as "platform/payments"
+        response = self._get(f"{self.api_url}/api/v4/groups/{group_path}", {"with_projects": False}, deadline)
+        yield _format_group(response.json())
+        for group in self.iter_pages(f"groups/{group_path}/descendant_groups", deadline=deadline):
+            yield _format_group(group)
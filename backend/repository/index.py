@@ -0,0 +1,203 @@
+"""
+Local full-text index of repositories and groups.
+
+Rows live in the `repositories` table (models.Repository) and are written by
+repository/sync.py. Full-text search over name, path and description uses:
+
+- PostgreSQL: a GIN index on a 'simple' tsvector expression, queried with
+  prefix terms ("pay:* & api:*").
+- SQLite: an external-content FTS5 table (repositories_fts) kept in step with
+  the base table by triggers, queried with prefix terms ("pay"* AND "api"*).
+
+If the full-text objects are missing (ensure_search_index failed or was not
+run) search falls back to ILIKE on name and path.
+"""
+
+import re
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.orm import Session
+
+import models
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "repositories_fts"
+PG_INDEX_NAME = "ix_repositories_search"
+
+# Name, path and description with path separators turned into spaces, so
+# "platform/payments-api" matches "payments" and "api"
+_PG_DOCUMENT = ("translate(coalesce(name, '') || ' ' || coalesce(path, '') || ' ' || coalesce(description, ''), "
+                "'/-_.', '    ')")
+
+# Engine URL -> whether the full-text objects exist
+_fts_ready: Dict[str, bool] = {}
+
+def _table_name() -> str:
+    table = models.Repository.__table__
+    return f"{table.schema}.{table.name}" if table.schema else table.name
+
+def _terms(query: str) -> List[str]:
+    """Lowercase word terms of a search string"""
+    return re.findall(r"\w+", query.lower())
+
+def ensure_search_index(engine) -> bool:
+    """Create the full-text index (PostgreSQL) or FTS5 table and triggers (SQLite) if missing"""
+    table = _table_name()
+    try:
+        with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {PG_INDEX_NAME} ON {table} "
+                    f"USING gin (to_tsvector('simple', {_PG_DOCUMENT}))"
+                ))
+            elif engine.dialect.name == "sqlite":
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+                ), {"name": FTS_TABLE}).first()
+                if not exists:
+                    conn.execute(text(
+                        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                        f"name, path, description, content='{table}', content_rowid='id')"
+                    ))
+                    conn.execute(text(
+                        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {table} BEGIN "
+                        f"INSERT INTO {FTS_TABLE}(rowid, name, path, description) "
+                        f"VALUES (new.id, new.name, new.path, new.description); END"
+                    ))
+                    conn.execute(text(
+                        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {table} BEGIN "
+                        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, path, description) "
+                        f"VALUES ('delete', old.id, old.name, old.path, old.description); END"
+                    ))
+                    conn.execute(text(
+                        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {table} BEGIN "
+                        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, path, description) "
+                        f"VALUES ('delete', old.id, old.name, old.path, old.description); "
+                        f"INSERT INTO {FTS_TABLE}(rowid, name, path, description) "
+                        f"VALUES (new.id, new.name, new.path, new.description); END"
+                    ))
+                    # Index rows that existed before the FTS table
+                    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+            else:
+                return False
+        _fts_ready[str(engine.url)] = True
+        return True
+    except Exception as e:
+        logger.error(f"Could not create the repository search index: {str(e)}")
+        _fts_ready[str(engine.url)] = False
+        return False
+
+def has_entries(db: Session, source: str = "gitlab") -> bool:
+    """Whether the local index holds anything for a source"""
+    return db.execute(
+        select(models.Repository.id).where(models.Repository.source == source).limit(1)
+    ).first() is not None
+
+def search(db: Session, query: str, limit: int = 20, source: str = "gitlab") -> List[models.Repository]:
+    """Repositories and groups matching every word of `query` as a prefix, ordered by name"""
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    bind = db.get_bind()
+    statement = select(models.Repository).where(models.Repository.source == source)
+    if _fts_ready.get(str(bind.url)) and bind.dialect.name == "postgresql":
+        ts_query = " & ".join(f"{term}:*" for term in terms)
+        statement = statement.where(
+            text(f"to_tsvector('simple', {_PG_DOCUMENT}) @@ to_tsquery('simple', :ts_query)")
+        ).params(ts_query=ts_query)
+    elif _fts_ready.get(str(bind.url)) and bind.dialect.name == "sqlite":
+        match = " AND ".join(f'"{term}"*' for term in terms)
+        matching_ids = (select(literal_column("rowid")).select_from(text(FTS_TABLE))
+                        .where(text(f"{FTS_TABLE} MATCH :match")))
+        statement = statement.where(models.Repository.id.in_(matching_ids)).params(match=match)
+    else:
+        for term in terms:
+            statement = statement.where(
+                models.Repository.name.ilike(f"%{term}%") | models.Repository.path.ilike(f"%{term}%")
+            )
+
+    statement = statement.order_by(func.lower(models.Repository.name)).limit(limit)
+    return list(db.execute(statement).scalars())
+
+def get(db: Session, external_id: int, kind: str = "repository", source: str = "gitlab") -> Optional[models.Repository]:
+    return db.execute(
+        select(models.Repository).where(
+            models.Repository.source == source,
+            models.Repository.kind == kind,
+            models.Repository.external_id == external_id,
+        )
+    ).scalar_one_or_none()
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """GitLab ISO 8601 timestamp as a naive UTC datetime"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = (parsed - parsed.utcoffset()).replace(tzinfo=None)
+    return parsed
+
+def upsert(db: Session, items: Iterable[Dict[str, Any]], kind: str, sync_group: str,
+           synced_at: datetime, source: str = "gitlab") -> int:
+    """
+    Insert or update formatted client results (see gitlab_client._format_project/_format_group).
+
+    Service links on existing rows are kept. Does not commit.
+    """
+    items = list(items)
+    if not items:
+        return 0
+
+    external_ids = [item["id"] for item in items]
+    existing = {
+        row.external_id: row
+        for row in db.execute(
+            select(models.Repository).where(
+                models.Repository.source == source,
+                models.Repository.kind == kind,
+                models.Repository.external_id.in_(external_ids),
+            )
+        ).scalars()
+    }
+
+    for item in items:
+        row = existing.get(item["id"])
+        if row is None:
+            row = models.Repository(source=source, kind=kind, external_id=item["id"])
+            db.add(row)
+            existing[item["id"]] = row
+        row.name = item.get("name") or ""
+        row.path = item.get("path") or ""
+        row.description = item.get("description") or None
+        row.url = item.get("url") or None
+        row.avatar_url = item.get("avatar_url") or None
+        row.default_branch = item.get("default_branch")
+        row.sync_group = sync_group
+        row.last_activity_at = parse_timestamp(item.get("updated_at"))
+        row.synced_at = synced_at
+    db.flush()
+    return len(items)
+
+def to_result(row: models.Repository) -> Dict[str, Any]:
+    """Index row in the same shape as the repository search API results"""
+    return {
+        "id": row.external_id,
+        "name": row.name,
+        "path": row.path or "",
+        "description": row.description or "",
+        "type": row.kind,
+        "url": row.url or "",
+        "avatar_url": row.avatar_url or "",
+        "default_branch": row.default_branch,
+        "source": row.source,
+        "updated_at": row.last_activity_at.isoformat() + "Z" if row.last_activity_at else "",
+        "service_id": row.service_id,
+    }
@@ -0,0 +1,370 @@
+"""
+Repository providers and parallel fan-out.
+
+Each repository platform is a RepositoryProvider with the same three calls
+(search, repository details, group projects) returning results in the shape
+of the GitLab client. Built-in providers:
+
+- gitlab: GitLabClient, configured by the gitlab_api_url/gitlab_api_token settings
+- github: GitHubClient, configured by github_api_token (and optionally github_api_url)
+- local: bare repositories and working copies under REPOSITORY_LOCAL_ROOT,
+  for offline development and tests
+
+search_providers() calls every provider concurrently. Each provider has its
+own timeout, and a circuit breaker per provider skips one that keeps failing
+or timing out until REPOSITORY_BREAKER_RESET_SECONDS have passed, after which
+a single trial call decides whether it is used again. A slow or broken
+provider therefore never holds up the others.
+
+Clients are shared across requests and rebuilt only when their settings change.
+"""
+
+import os
+import time
+import zlib
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from settings_cache import settings_cache
+from .gitlab_client import GitLabClient
+from .github_client import GitHubClient, DEFAULT_API_URL as GITHUB_DEFAULT_API_URL
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+REPOSITORY_PROVIDER_TIMEOUT_SECONDS = float(os.environ.get("REPOSITORY_PROVIDER_TIMEOUT_SECONDS", "5"))
+REPOSITORY_BREAKER_FAILURE_THRESHOLD = int(os.environ.get("REPOSITORY_BREAKER_FAILURE_THRESHOLD", "3"))
+REPOSITORY_BREAKER_RESET_SECONDS = float(os.environ.get("REPOSITORY_BREAKER_RESET_SECONDS", "30"))
+REPOSITORY_LOCAL_ROOT = os.environ.get("REPOSITORY_LOCAL_ROOT", "")
+
+# Threads that run provider calls; a call that outlives its timeout keeps its thread until it returns
+_provider_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="repository-provider")
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed: calls allowed. After failure_threshold consecutive failures the
+    breaker opens and calls are skipped. After reset_seconds one trial call
+    is let through (half-open); success closes the breaker, failure reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = REPOSITORY_BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = REPOSITORY_BREAKER_RESET_SECONDS):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_running:
+                    logger.warning(f"Circuit opened after {self._failures} consecutive failures")
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+class RepositoryProvider(ABC):
+    """Interface every repository platform implements"""
+
+    name = ""
+    timeout_seconds = REPOSITORY_PROVIDER_TIMEOUT_SECONDS
+
+    def cache_scope(self) -> Optional[str]:
+        """Key prefix for cached responses, or None to bypass the repository cache"""
+        return None
+
+    @abstractmethod
+    def search(self, search_term: str, limit: int) -> List[Dict[str, Any]]:
+        """Matching repositories (and groups); raise on failure so the breaker can count it"""
+
+    def get_repository_details(self, repository_id: int) -> Optional[Dict[str, Any]]:
+        return None
+
+    def get_group_projects(self, group_id: int, limit: int) -> List[Dict[str, Any]]:
+        return []
+
+def _token_scope(name: str, api_url: str, token: str) -> str:
+    # Different tokens can see different repositories
+    digest = hashlib.sha256(f"{api_url}\n{token}".encode()).hexdigest()[:16]
+    return f"{name}:{digest}"
+
+class GitLabProvider(RepositoryProvider):
+    name = "gitlab"
+
+    def __init__(self, client: GitLabClient):
+        self.client = client
+
+    def cache_scope(self) -> Optional[str]:
+        return _token_scope(self.name, self.client.api_url, self.client.token)
+
+    def search(self, search_term: str, limit: int) -> List[Dict[str, Any]]:
+        return self.client.search_repositories(search_term, limit, deadline_seconds=self.timeout_seconds,
+                                               raise_errors=True)
+
+    def get_repository_details(self, repository_id: int) -> Optional[Dict[str, Any]]:
+        return self.client.get_repository_details(repository_id)
+
+    def get_group_projects(self, group_id: int, limit: int) -> List[Dict[str, Any]]:
+        return self.client.get_group_projects(group_id, limit)
+
+class GitHubProvider(RepositoryProvider):
+    name = "github"
+
+    def __init__(self, client: GitHubClient):
+        self.client = client
+
+    def cache_scope(self) -> Optional[str]:
+        return _token_scope(self.name, self.client.api_url, self.client.token)
+
+    def search(self, search_term: str, limit: int) -> List[Dict[str, Any]]:
+        return self.client.search_repositories(search_term, limit)
+
+    def get_repository_details(self, repository_id: int) -> Optional[Dict[str, Any]]:
+        return self.client.get_repository_details(repository_id)
+
+    def get_group_projects(self, group_id: int, limit: int) -> List[Dict[str, Any]]:
+        return self.client.get_group_projects(group_id, limit)
+
+class LocalGitProvider(RepositoryProvider):
+    """
+    Git repositories below a directory: bare repositories (HEAD, objects/ and
+    refs/ at the top) and working copies (a .git entry). Ids are a CRC32 of
+    the path relative to the root, so they are stable across scans.
+    """
+
+    name = "local"
+    timeout_seconds = 2.0
+
+    # Directory levels searched below the root, and how long a scan is reused
+    MAX_DEPTH = 3
+    SCAN_TTL_SECONDS = 30.0
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._scanned_at: Optional[float] = None
+        self._repositories: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_bare(path: str) -> bool:
+        return all(os.path.exists(os.path.join(path, entry)) for entry in ("HEAD", "objects", "refs"))
+
+    def _describe(self, path: str, git_dir: str) -> Dict[str, Any]:
+        relative = os.path.relpath(path, self.root).replace(os.sep, "/")
+        description = ""
+        description_file = os.path.join(git_dir, "description")
+        if os.path.isfile(description_file):
+            with open(description_file, encoding="utf-8", errors="replace") as f:
+                description = f.read().strip()
+            if description.startswith("Unnamed repository"):
+                description = ""
+        name = os.path.basename(path)
+        return {
+            "id": zlib.crc32(relative.encode()),
+            "name": name[:-4] if name.endswith(".git") else name,
+            "path": relative,
+            "description": description,
+            "type": "repository",
+            "url": f"file://{path}",
+            "avatar_url": "",
+            "default_branch": None,
+            "source": self.name,
+            "updated_at": datetime.utcfromtimestamp(os.path.getmtime(git_dir)).isoformat() + "Z",
+        }
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            if self._scanned_at is not None and time.monotonic() - self._scanned_at < self.SCAN_TTL_SECONDS:
+                return self._repositories
+            repositories = []
+            for directory, subdirectories, _ in os.walk(self.root):
+                depth = os.path.relpath(directory, self.root).count(os.sep) + 1
+                if directory != self.root and self._is_bare(directory):
+                    repositories.append(self._describe(directory, directory))
+                    subdirectories[:] = []
+                elif directory != self.root and os.path.exists(os.path.join(directory, ".git")):
+                    git_dir = os.path.join(directory, ".git")
+                    repositories.append(self._describe(directory, git_dir if os.path.isdir(git_dir) else directory))
+                    subdirectories[:] = []
+                elif depth >= self.MAX_DEPTH:
+                    subdirectories[:] = []
+                else:
+                    subdirectories[:] = sorted(entry for entry in subdirectories if not entry.startswith("."))
+            self._repositories = repositories
+            self._scanned_at = time.monotonic()
+            return repositories
+
+    def search(self, search_term: str, limit: int) -> List[Dict[str, Any]]:
+        term = search_term.lower()
+        matches = [repository for repository in self._scan()
+                   if term in repository["name"].lower() or term in repository["path"].lower()]
+        return matches[:limit]
+
+    def get_repository_details(self, repository_id: int) -> Optional[Dict[str, Any]]:
+        for repository in self._scan():
+            if repository["id"] == repository_id:
+                return {**repository, "type": "repo", "created_at": ""}
+        return None
+
+# Shared clients/providers: name -> (settings key, instance)
+_shared: Dict[str, Tuple[Any, Any]] = {}
+_shared_lock = threading.Lock()
+
+def _shared_instance(name: str, key: Any, factory: Callable[[], Any]) -> Any:
+    """Instance for `key`, built with `factory` only when the key changed; closes the one it replaces"""
+    with _shared_lock:
+        current = _shared.get(name)
+        if current is not None and current[0] == key:
+            return current[1]
+
+        instance = None
+        if key:
+            try:
+                instance = factory()
+                logger.info(f"Repository client '{name}' initialized")
+            except Exception as e:
+                logger.error(f"Failed to initialize repository client '{name}': {str(e)}")
+        _shared[name] = (key, instance)
+
+    previous = current[1] if current is not None else None
+    if previous is not None and hasattr(previous, "close"):
+        previous.close()
+    return instance
+
+def get_gitlab_client(db: Session) -> Optional[GitLabClient]:
+    """
+    Shared GitLab client for the current settings.
+
+    Settings come from the admin settings cache, so this costs no query; the
+    client (and its connection pool) is only rebuilt when the URL or token change.
+    """
+    gitlab_url = settings_cache.get_str(db, "gitlab_api_url")
+    gitlab_token = settings_cache.get_str(db, "gitlab_api_token")
+    key = (gitlab_url, gitlab_token) if gitlab_url and gitlab_token else None
+    return _shared_instance("gitlab", key, lambda: GitLabClient(gitlab_url, gitlab_token))
+
+def get_github_client(db: Session) -> Optional[GitHubClient]:
+    """Shared GitHub client, or None without a github_api_token setting"""
+    github_url = settings_cache.get_str(db, "github_api_url", GITHUB_DEFAULT_API_URL)
+    github_token = settings_cache.get_str(db, "github_api_token")
+    key = (github_url, github_token) if github_token else None
+    return _shared_instance("github", key, lambda: GitHubClient(github_token, github_url))
+
+def get_providers(db: Session) -> List[RepositoryProvider]:
+    """Configured providers, in merge order"""
+    providers: List[RepositoryProvider] = []
+    gitlab_client = get_gitlab_client(db)
+    if gitlab_client is not None:
+        providers.append(GitLabProvider(gitlab_client))
+    github_client = get_github_client(db)
+    if github_client is not None:
+        providers.append(GitHubProvider(github_client))
+    local = _shared_instance("local", REPOSITORY_LOCAL_ROOT or None, lambda: LocalGitProvider(REPOSITORY_LOCAL_ROOT))
+    if local is not None:
+        providers.append(local)
+    return providers
+
+def close_clients():
+    """Close the shared clients' connection pools (application shutdown)"""
+    with _shared_lock:
+        instances = [instance for _, instance in _shared.values()]
+        _shared.clear()
+    for instance in instances:
+        if instance is not None and hasattr(instance, "close"):
+            instance.close()
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _shared_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker()
+        return _breakers[name]
+
+def call_provider(provider: RepositoryProvider, call: Callable[[RepositoryProvider], Any], default: Any = None) -> Any:
+    """Run one provider call through its circuit breaker (no timeout); `default` if skipped or failed"""
+    breaker = get_breaker(provider.name)
+    if not breaker.allow_request():
+        return default
+    try:
+        result = call(provider)
+    except Exception as e:
+        breaker.record_failure()
+        logger.error(f"Repository provider '{provider.name}' failed: {str(e)}")
+        return default
+    breaker.record_success()
+    return result
+
+def search_providers(providers: List[RepositoryProvider],
+                     call: Callable[[RepositoryProvider], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Run `call(provider)` for every provider concurrently and merge the results.
+
+    Providers whose breaker is open are skipped; failures and calls that
+    exceed the provider's timeout count against its breaker and contribute
+    nothing. Results are ordered by name, then provider order, then path, so
+    the order is stable whichever provider answers first.
+    """
+    started = time.monotonic()
+    futures = []
+    for order, provider in enumerate(providers):
+        if get_breaker(provider.name).allow_request():
+            futures.append((order, provider, _provider_executor.submit(call, provider)))
+        else:
+            logger.info(f"Skipping repository provider '{provider.name}': circuit open")
+
+    merged = []
+    for order, provider, future in futures:
+        breaker = get_breaker(provider.name)
+        try:
+            remaining = max(0.0, started + provider.timeout_seconds - time.monotonic())
+            results = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            future.cancel()
+            breaker.record_failure()
+            logger.warning(f"Repository provider '{provider.name}' timed out after {provider.timeout_seconds}s")
+            continue
+        except Exception as e:
+            breaker.record_failure()
+            logger.error(f"Repository provider '{provider.name}' failed: {str(e)}")
+            continue
+        breaker.record_success()
+        merged.extend((order, result) for result in results or [])
+
+    merged.sort(key=lambda item: ((item[1].get("name") or "").lower(), item[0], item[1].get("path") or ""))
+    return [result for _, result in merged]
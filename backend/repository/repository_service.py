@@ -1,48 +1,62 @@
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, List, Optional
 import logging
-from .gitlab_client import GitLabClient
+from .cache import repository_cache, REPOSITORY_SEARCH_TTL_SECONDS, REPOSITORY_DETAILS_TTL_SECONDS
+from . import index
+from .providers import RepositoryProvider, call_provider, get_gitlab_client, get_providers, search_providers
 from sqlalchemy.orm import Session
-import user_crud
+import models
 
 logger = logging.getLogger(__name__)
 
+def _cached(provider: RepositoryProvider, key: str, fetch: Callable[[], Any], ttl: float) -> Any:
+    """Serve `fetch()` through the repository cache, scoped to the provider's URL and token"""
+    scope = provider.cache_scope()
+    if repository_cache is None or scope is None:
+        return fetch()
+    return repository_cache.get_or_fetch(f"{scope}:{key}", fetch, ttl)
+
 class RepositoryService:
     """Service for interacting with repository platforms"""
 
     def __init__(self, db: Session):
         self.db = db
         self.gitlab_client = None
+        self.providers: List[RepositoryProvider] = []
         self._initialize_clients()
 
     def _initialize_clients(self):
-        """Initialize repository clients based on admin settings"""
-        # Get GitLab settings
-        gitlab_url = user_crud.get_admin_setting_value(self.db, "gitlab_api_url")
-        gitlab_token = user_crud.get_admin_setting_value(self.db, "gitlab_api_token")
-
-        if gitlab_url and gitlab_token:
-            try:
-                self.gitlab_client = GitLabClient(gitlab_url, gitlab_token)
-                logger.info(f"GitLab client initialized with URL: {gitlab_url}")
-            except Exception as e:
-                logger.error(f"Failed to initialize GitLab client: {str(e)}")
-        else:
-            logger.warning("GitLab client not initialized - missing configuration")
+        """Use the shared repository clients for the current admin settings"""
+        self.gitlab_client = get_gitlab_client(self.db)
+        self.providers = get_providers(self.db)
+
+    def _provider(self, source: str) -> Optional[RepositoryProvider]:
+        # Normalize source to lowercase for consistency
+        source = source.lower() if isinstance(source, str) else source
+        return next((provider for provider in self.providers if provider.name == source), None)
 
     def search_repositories(self, search_term: str, limit: int = 20) -> List[Dict[str, Any]]:
         """
         Search for repositories across all configured providers
         Returns a list of repositories with their details
+
+        Providers are queried in parallel (see providers.search_providers);
+        GitLab is answered from the local index once repository sync has filled it.
         """
+        providers = self.providers
         results = []
+        if index.has_entries(self.db, "gitlab"):
+            results = [index.to_result(row) for row in index.search(self.db, search_term, limit, "gitlab")]
+            providers = [provider for provider in providers if provider.name != "gitlab"]
+            if not providers:
+                return results
 
-        # Search GitLab repositories
-        if self.gitlab_client:
-            gitlab_results = self.gitlab_client.search_repositories(search_term, limit)
-            results.extend(gitlab_results)
+        key = f"search:{search_term.lower()}:{limit}"
+        results.extend(search_providers(providers, lambda provider: _cached(
+            provider, key, lambda: provider.search(search_term, limit), REPOSITORY_SEARCH_TTL_SECONDS
+        )))
 
-        # Sort results by name
-        results.sort(key=lambda x: x.get("name", "").lower())
+        # Sort results by name (stable, so ties keep provider order)
+        results.sort(key=lambda x: (x.get("name") or "").lower())
 
         return results
 
@@ -54,20 +68,58 @@ class RepositoryService:
         # Normalize source to lowercase for consistency
         source = source.lower() if isinstance(source, str) else source
 
-        if source == "gitlab" and self.gitlab_client:
-            return self.gitlab_client.get_repository_details(repository_id)
+        if source == "gitlab":
+            row = index.get(self.db, repository_id, "repository", "gitlab")
+            if row is not None:
+                return {**index.to_result(row), "type": "repo", "created_at": ""}
 
-        return None
+        provider = self._provider(source)
+        if provider is None:
+            return None
+        return call_provider(provider, lambda p: _cached(
+            p, f"project:{repository_id}", lambda: p.get_repository_details(repository_id),
+            REPOSITORY_DETAILS_TTL_SECONDS
+        ))
 
     def get_group_projects(self, group_id: int, source: str, limit: int = 50) -> List[Dict[str, Any]]:
         """
         Get all projects (repositories) in a group
         Returns a list of repositories with their details
         """
-        # Normalize source to lowercase for consistency
+        provider = self._provider(source)
+        if provider is None:
+            return []
+        return call_provider(provider, lambda p: _cached(
+            p, f"group_projects:{group_id}:{limit}", lambda: p.get_group_projects(group_id, limit),
+            REPOSITORY_SEARCH_TTL_SECONDS
+        ), default=[])
+
+    def link_service(self, repository_id: int, source: str, service_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        """
+        Link an indexed repository to a Service of type repo (None unlinks)
+
+        Returns the repository, or None if it is not in the local index.
+        Raises ValueError if the service does not exist or is not a repo.
+        """
         source = source.lower() if isinstance(source, str) else source
+        row = index.get(self.db, repository_id, "repository", source)
+        if row is None:
+            return None
+
+        if service_id is not None:
+            service = self.db.get(models.Service, service_id)
+            if service is None:
+                raise ValueError(f"Service {service_id} not found")
+            service_type = service.service_type.value if hasattr(service.service_type, "value") else service.service_type
+            if (service_type or "").lower() != "repo":
+                raise ValueError(f"Service {service_id} is not of type repo")
 
-        if source == "gitlab" and self.gitlab_client:
-            return self.gitlab_client.get_group_projects(group_id, limit)
+        row.service_id = service_id
+        self.db.commit()
+        return index.to_result(row)
 
-        return []
+    def get_service_repositories(self, service_id: int) -> List[Dict[str, Any]]:
+        """Indexed repositories linked to a service"""
+        rows = self.db.query(models.Repository).filter(models.Repository.service_id == service_id) \
+            .order_by(models.Repository.name).all()
+        return [index.to_result(row) for row in rows]
@@ -0,0 +1,213 @@
+"""
+Background synchronisation of the local repository index from GitLab.
+
+The groups listed in the `gitlab_sync_groups` admin setting (ids or full
+paths, one per line or comma separated) are crawled with full pagination:
+each group, its descendant groups and every project below it are upserted
+into the `repositories` table (see repository/index.py).
+
+- Incremental runs (every REPOSITORY_SYNC_INTERVAL_SECONDS) only request
+  projects whose last_activity_at is newer than the newest one already
+  indexed for the group, minus a small overlap.
+- Full runs (the first run of a process, then every
+  REPOSITORY_FULL_SYNC_INTERVAL_SECONDS) fetch everything and, if every
+  group was crawled completely, delete rows that were not seen, so deleted
+  or moved projects and removed groups disappear from the index.
+
+Run once from the command line with `python -m repository.sync [--full]`.
+"""
+
+import os
+import time
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+from settings_cache import settings_cache
+from . import index
+from .gitlab_client import GitLabClient
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+REPOSITORY_SYNC_ENABLED = os.environ.get("REPOSITORY_SYNC_ENABLED", "true").lower() in ("1", "true", "yes")
+REPOSITORY_SYNC_INTERVAL_SECONDS = float(os.environ.get("REPOSITORY_SYNC_INTERVAL_SECONDS", "900"))
+REPOSITORY_FULL_SYNC_INTERVAL_SECONDS = float(os.environ.get("REPOSITORY_FULL_SYNC_INTERVAL_SECONDS", "86400"))
+# Time budget for crawling one group
+REPOSITORY_SYNC_GROUP_DEADLINE_SECONDS = float(os.environ.get("REPOSITORY_SYNC_GROUP_DEADLINE_SECONDS", "600"))
+
+SYNC_GROUPS_SETTING = "gitlab_sync_groups"
+
+# Re-request projects active shortly before the newest indexed one, to cover clock skew
+_INCREMENTAL_OVERLAP = timedelta(hours=1)
+
+# Upserted and flushed per batch while streaming pages
+_UPSERT_BATCH_SIZE = 500
+
+def configured_groups(db: Session) -> List[str]:
+    return settings_cache.get_list(db, SYNC_GROUPS_SETTING)
+
+def _newest_activity(db: Session, group: str) -> Optional[datetime]:
+    return db.execute(
+        select(func.max(models.Repository.last_activity_at)).where(
+            models.Repository.source == "gitlab",
+            models.Repository.kind == "repository",
+            models.Repository.sync_group == group,
+        )
+    ).scalar()
+
+def sync_group(db: Session, client: GitLabClient, group: str, full: bool, synced_at: datetime) -> Dict[str, int]:
+    """
+    Crawl one configured group into the index and commit.
+
+    Errors (including deadline timeouts) propagate after rolling back, so a
+    partial crawl is never mistaken for a complete one.
+    """
+    counts = {"groups": 0, "repositories": 0}
+    last_activity_after = None
+    if not full:
+        newest = _newest_activity(db, group)
+        if newest is not None:
+            last_activity_after = (newest - _INCREMENTAL_OVERLAP).isoformat() + "Z"
+
+    try:
+        counts["groups"] = index.upsert(
+            db, client.iter_group_and_subgroups(group, REPOSITORY_SYNC_GROUP_DEADLINE_SECONDS),
+            "group", group, synced_at
+        )
+
+        batch = []
+        for project in client.iter_group_projects(group, last_activity_after=last_activity_after,
+                                                  deadline_seconds=REPOSITORY_SYNC_GROUP_DEADLINE_SECONDS):
+            batch.append(project)
+            if len(batch) >= _UPSERT_BATCH_SIZE:
+                counts["repositories"] += index.upsert(db, batch, "repository", group, synced_at)
+                batch = []
+        counts["repositories"] += index.upsert(db, batch, "repository", group, synced_at)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return counts
+
+def sync_repositories(db: Session, client: GitLabClient, groups: List[str], full: bool = False) -> Dict:
+    """
+    Crawl every configured group.
+
+    Returns:
+        dict: Per-run statistics (groups/repositories upserted, failed groups, rows pruned)
+    """
+    started = time.perf_counter()
+    # Every row written by this run carries this timestamp; older ones were not seen
+    synced_at = datetime.utcnow()
+    stats = {"full": full, "groups": 0, "repositories": 0, "failed_groups": [], "pruned": 0}
+
+    for group in groups:
+        try:
+            counts = sync_group(db, client, group, full, synced_at)
+            stats["groups"] += counts["groups"]
+            stats["repositories"] += counts["repositories"]
+        except Exception as e:
+            logger.error(f"Repository sync of group {group} failed: {str(e)}")
+            stats["failed_groups"].append(group)
+
+    if full and not stats["failed_groups"]:
+        result = db.execute(
+            delete(models.Repository).where(
+                models.Repository.source == "gitlab",
+                models.Repository.synced_at < synced_at,
+            )
+        )
+        db.commit()
+        stats["pruned"] = result.rowcount or 0
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    logger.info(f"Repository sync finished: {stats}")
+    return stats
+
+def run_once(full: bool = False, session_factory=SessionLocal) -> Optional[Dict]:
+    """Sync with the current settings; None when GitLab or the groups are not configured"""
+    from .providers import get_gitlab_client
+
+    db = session_factory()
+    try:
+        groups = configured_groups(db)
+        client = get_gitlab_client(db)
+        if not groups or client is None:
+            return None
+        return sync_repositories(db, client, groups, full=full)
+    finally:
+        db.close()
+
+class RepositorySyncWorker:
+    """Background thread running incremental syncs with periodic full ones"""
+
+    def __init__(self, interval: float = REPOSITORY_SYNC_INTERVAL_SECONDS,
+                 full_interval: float = REPOSITORY_FULL_SYNC_INTERVAL_SECONDS):
+        self.interval = interval
+        self.full_interval = full_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_full: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="repository-sync", daemon=True)
+        self._thread.start()
+        logger.info(f"Repository sync started: every {self.interval}s, full every {self.full_interval}s")
+
+    def stop(self, timeout: Optional[float] = 10.0):
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            full = self._last_full is None or time.monotonic() - self._last_full >= self.full_interval
+            try:
+                stats = run_once(full=full)
+                if full and stats is not None and not stats["failed_groups"]:
+                    self._last_full = time.monotonic()
+            except Exception as e:
+                logger.error(f"Repository sync failed: {str(e)}")
+            self._stop.wait(self.interval)
+
+repository_sync = RepositorySyncWorker()
+
+def start_repository_sync():
+    if REPOSITORY_SYNC_ENABLED:
+        repository_sync.start()
+
+def stop_repository_sync():
+    repository_sync.stop()
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Synchronise the local repository index from GitLab')
+    parser.add_argument('--full', action='store_true', help='Fetch everything and prune rows that were not seen')
+
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    result = run_once(full=args.full)
+    if result is None:
+        print(f"Nothing to do: configure gitlab_api_url, gitlab_api_token and {SYNC_GROUPS_SETTING}")
+    else:
+        print(result)
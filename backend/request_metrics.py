@@ -0,0 +1,142 @@
+"""
+Per-route request metrics.
+
+RequestMetricsMiddleware records, for every HTTP request, labelled by method
+and templated route path (e.g. /squads/{squad_id}, so ids do not create new
+series):
+
+- http_requests_total (also by status code)
+- http_request_duration_seconds histogram
+- http_response_size_bytes histogram
+- http_request_db_queries histogram (from query_stats, when enabled)
+- http_requests_in_flight gauge
+
+The metrics are part of the shared registry served at /metrics.
+slowest_routes() summarises them for the admin performance endpoint.
+Requests are not logged individually unless REQUEST_LOG_ENABLED is set.
+"""
+
+import os
+import time
+from typing import Dict, List
+
+from metrics import registry
+import query_stats
+from logger import get_logger
+
+# Initialize logger
+logger = get_logger('request_metrics', log_level='INFO')
+
+# Configuration
+REQUEST_METRICS_ENABLED = os.environ.get("REQUEST_METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+REQUEST_LOG_ENABLED = os.environ.get("REQUEST_LOG_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Route label for requests that did not match a route (404s, static files)
+UNMATCHED_ROUTE = "<unmatched>"
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# slowest_routes() sort options -> summary field
+SORT_FIELDS = {"p50": "p50_ms", "p90": "p90_ms", "p99": "p99_ms", "mean": "mean_ms",
+               "count": "count", "total": "total_ms"}
+
+REQUESTS_TOTAL = registry.counter(
+    "http_requests_total", "HTTP requests by route and status code", ["method", "route", "status"])
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route"])
+RESPONSE_SIZE = registry.histogram(
+    "http_response_size_bytes", "HTTP response body size by route", ["method", "route"], buckets=SIZE_BUCKETS)
+REQUEST_DB_QUERIES = registry.histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ["method", "route"],
+    buckets=QUERY_COUNT_BUCKETS)
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled")
+
+def route_template(scope) -> str:
+    """Templated path of the route that handled the request"""
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return path or UNMATCHED_ROUTE
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording latency, status, size and in-flight metrics per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not REQUEST_METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        response_size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            duration = time.perf_counter() - start
+            method = scope["method"]
+            route = route_template(scope)
+
+            REQUESTS_TOTAL.labels(method=method, route=route, status=status_code).inc()
+            REQUEST_DURATION.labels(method=method, route=route).observe(duration)
+            RESPONSE_SIZE.labels(method=method, route=route).observe(response_size)
+            stats = query_stats.get_current_stats()
+            if stats is not None:
+                REQUEST_DB_QUERIES.labels(method=method, route=route).observe(stats.count)
+
+            if REQUEST_LOG_ENABLED:
+                logger.info(f"{method} {scope['path']} -> {status_code} in {duration * 1000:.1f}ms ({response_size} bytes)")
+
+def slowest_routes(limit: int = 10, sort_by: str = "p99") -> List[Dict]:
+    """
+    Summarise the route latency histograms, slowest first.
+
+    Parameters:
+        limit: Number of routes to return
+        sort_by: 'p50', 'p90', 'p99', 'mean', 'count' or 'total' (time spent)
+    """
+    if sort_by not in SORT_FIELDS:
+        raise ValueError(f"Unsupported sort field: {sort_by}")
+
+    errors = {}
+    for (method, route, status), child in REQUESTS_TOTAL.series():
+        if status.isdigit() and int(status) >= 500:
+            errors[(method, route)] = errors.get((method, route), 0) + child.get()
+
+    queries = {key: child for key, child in REQUEST_DB_QUERIES.series()}
+
+    routes = []
+    for (method, route), child in REQUEST_DURATION.series():
+        _, total_time, count = child.snapshot()
+        if count == 0:
+            continue
+        query_child = queries.get((method, route))
+        routes.append({
+            "method": method,
+            "route": route,
+            "count": count,
+            "error_count": int(errors.get((method, route), 0)),
+            "mean_ms": round(total_time / count * 1000, 2),
+            "p50_ms": round(child.quantile(0.5) * 1000, 2),
+            "p90_ms": round(child.quantile(0.9) * 1000, 2),
+            "p99_ms": round(child.quantile(0.99) * 1000, 2),
+            "total_ms": round(total_time * 1000, 2),
+            "mean_queries": round(query_child.sum / query_child.count, 1) if query_child and query_child.count else None,
+        })
+
+    routes.sort(key=lambda item: item[SORT_FIELDS[sort_by]], reverse=True)
+    return routes[:limit]
@@ -1,8 +1,11 @@
 import os
 from database import Base, engine
+import aggregate_views
 
 # Drop all tables and recreate them
 def reset_database():
+    print("Dropping aggregate views...")
+    aggregate_views.drop_aggregate_views(engine)
     print("Dropping all tables...")
     Base.metadata.drop_all(bind=engine)
     print("Creating tables from scratch...")
@@ -0,0 +1,186 @@
+"""
+On-demand statistical sampling profiler.
+
+A sampler thread reads the Python stacks of all other threads with
+sys._current_frames() at a fixed interval for a bounded duration. Nothing is
+installed in the profiled threads (no sys.setprofile / settrace), so the
+overhead on live requests is the GIL time the sampler takes per tick, about
+what it costs to walk the stacks.
+
+Output formats:
+- 'collapsed': one "frame;frame;frame count" line per distinct stack
+  (flamegraph.pl, speedscope, inferno)
+- 'speedscope': speedscope.app JSON with one sampled profile per thread
+
+Only one profile runs at a time; a second request raises ProfilerBusyError.
+Threads that are idle (waiting on a lock, queue or selector) are skipped
+unless include_idle is set.
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from logger import get_logger
+
+# Initialize logger
+logger = get_logger('sampling_profiler', log_level='INFO')
+
+# Configuration
+PROFILER_MAX_SECONDS = float(os.environ.get("PROFILER_MAX_SECONDS", "60"))
+MIN_INTERVAL_SECONDS = 0.001
+
+FORMATS = ("collapsed", "speedscope")
+
+# Leaf frames (file name, function) of threads that are waiting rather than running
+_IDLE_LEAF_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("socket.py", "accept"),
+    ("logger.py", "dequeue"),
+}
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is already being collected"""
+
+_profile_lock = threading.Lock()
+
+Frame = Tuple[str, str, int]  # (function, file name, first line)
+
+def _stack(frame) -> List[Frame]:
+    """Frames from the outermost call to the innermost"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+def _is_idle(stack: List[Frame]) -> bool:
+    if not stack:
+        return True
+    function, filename, _ = stack[-1]
+    return (os.path.basename(filename), function) in _IDLE_LEAF_FRAMES
+
+class Profile:
+    """Samples collected by one profiling run"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.sample_count = 0
+        # thread name -> Counter of stacks (tuples of frames)
+        self.stacks: Dict[str, Counter] = {}
+
+    def add(self, thread_name: str, stack: List[Frame]):
+        self.stacks.setdefault(thread_name, Counter())[tuple(stack)] += 1
+
+    @staticmethod
+    def frame_label(frame: Frame) -> str:
+        function, filename, line = frame
+        return f"{function} ({os.path.basename(filename)}:{line})"
+
+    def to_collapsed(self) -> str:
+        """Collapsed stacks, prefixed with the thread name"""
+        lines = []
+        for thread_name, stacks in sorted(self.stacks.items()):
+            for stack, count in stacks.most_common():
+                frames = [thread_name.replace(";", ":")] + [self.frame_label(frame).replace(";", ":") for frame in stack]
+                lines.append(f"{';'.join(frames)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def to_speedscope(self) -> Dict:
+        """speedscope file format (https://www.speedscope.app/file-format-schema.json)"""
+        frame_index: Dict[Frame, int] = {}
+        frames = []
+        profiles = []
+
+        for thread_name, stacks in sorted(self.stacks.items()):
+            samples = []
+            weights = []
+            for stack, count in stacks.most_common():
+                indices = []
+                for frame in stack:
+                    if frame not in frame_index:
+                        frame_index[frame] = len(frames)
+                        frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                    indices.append(frame_index[frame])
+                samples.append(indices)
+                weights.append(round(count * self.interval, 6))
+            profiles.append({
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 6),
+                "samples": samples,
+                "weights": weights,
+            })
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"Sampling profile ({self.duration:.1f}s, {self.sample_count} samples)",
+            "exporter": "team-portal sampling_profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+def collect_profile(seconds: float = 10.0, interval: float = 0.01, include_idle: bool = False) -> Profile:
+    """
+    Sample every other thread's stack for `seconds`, every `interval` seconds.
+
+    Blocks the calling thread for the duration; call it from a worker thread
+    in async code.
+    """
+    seconds = max(0.0, min(seconds, PROFILER_MAX_SECONDS))
+    interval = max(interval, MIN_INTERVAL_SECONDS)
+
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already being collected")
+
+    try:
+        profile = Profile(interval)
+        own_id = threading.get_ident()
+        start = time.perf_counter()
+        deadline = start + seconds
+        next_tick = start
+
+        logger.info(f"Collecting sampling profile: {seconds}s at {interval * 1000:.1f}ms intervals")
+        while True:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = _stack(frame)
+                if include_idle or not _is_idle(stack):
+                    profile.add(names.get(thread_id, f"thread-{thread_id}"), stack)
+            profile.sample_count += 1
+
+            next_tick += interval
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if next_tick > now:
+                time.sleep(min(next_tick, deadline) - now)
+            else:
+                # Running behind (sampling took longer than the interval); skip missed ticks
+                next_tick = now
+
+        profile.duration = time.perf_counter() - start
+        logger.info(f"Sampling profile done: {profile.sample_count} ticks over {profile.duration:.2f}s")
+        return profile
+    finally:
+        _profile_lock.release()
+
+def is_running() -> bool:
+    """Whether a profile is currently being collected"""
+    return _profile_lock.locked()
@@ -148,6 +148,97 @@ class Dependency(DependencyBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+# Dependency graph models
+class DependencyGraphSquad(BaseModel):
+    squad_id: int
+    squad_name: Optional[str] = None
+    depth: Optional[int] = None  # Hops from the queried squad (closures only)
+
+class DependencyClosure(BaseModel):
+    squad_id: int
+    direction: str  # "upstream" or "downstream"
+    squads: List[DependencyGraphSquad]
+
+class DependencyPath(BaseModel):
+    from_squad_id: int
+    to_squad_id: int
+    length: int
+    squads: List[DependencyGraphSquad]
+    dependency_ids: List[int]
+
+class DependencyCycle(BaseModel):
+    squads: List[DependencyGraphSquad]
+    dependency_ids: List[int]
+
+# Dependency map layout models (columnar: one list per column)
+class DependencyLayoutNodes(BaseModel):
+    id: List[Optional[int]]
+    name: List[Optional[str]]
+    x: List[float]
+    y: List[float]
+    radius: List[float]
+    tribe_id: List[Optional[int]]
+    area_id: List[Optional[int]]
+    size: List[int]  # Squads in the node (1 at squad level)
+    internal: List[int]  # Dependencies inside a tribe/area super-node
+
+class DependencyLayoutEdges(BaseModel):
+    source: List[int]  # Index into the node columns
+    target: List[int]
+    weight: List[int]  # Dependencies represented by the edge
+    id: Optional[List[int]] = None  # Dependency ids (squad level only)
+    interaction_mode: Optional[List[Optional[int]]] = None  # Index into interaction_modes (squad level only)
+
+class DependencyLayout(BaseModel):
+    graph_version: int
+    level: str
+    bounds: List[float]  # min x, min y, max x, max y
+    interaction_modes: List[str]
+    nodes: DependencyLayoutNodes
+    edges: DependencyLayoutEdges
+
+# Impact analysis models
+class ImpactStats(BaseModel):
+    squad_count: int
+    member_count: int
+    core_count: int
+    subcon_count: int
+    total_capacity: float
+    core_capacity: float
+    subcon_capacity: float
+
+class ImpactedSquad(BaseModel):
+    squad_id: int
+    squad_name: Optional[str] = None
+    depth: int  # 0 for the squad itself, then hops along its dependents
+    tribe_id: Optional[int] = None
+    member_count: int
+    total_capacity: float
+
+class ImpactedTribe(ImpactStats):
+    tribe_id: int
+    tribe_name: Optional[str] = None
+    area_id: Optional[int] = None
+
+class ImpactedArea(ImpactStats):
+    area_id: int
+    area_name: Optional[str] = None
+
+class SquadImpact(BaseModel):
+    squad_id: int
+    squad_name: Optional[str] = None
+    graph_version: int
+    max_depth: Optional[int] = None
+    totals: ImpactStats
+    squads: List[ImpactedSquad]
+    tribes: List[ImpactedTribe]
+    areas: List[ImpactedArea]
+
+class ServiceImpact(SquadImpact):
+    service_id: int
+    service_name: str
+    service_status: Optional[str] = None
+
 class OnCallRosterBase(BaseModel):
     primary_name: str
     primary_contact: Optional[str] = None
@@ -368,6 +459,9 @@ class AdminSettingUpdate(BaseModel):
     value: str
     description: Optional[str] = None
 
+class RepositoryServiceLink(BaseModel):
+    service_id: Optional[int] = None  # None removes the link
+
 # Validation Token schemas
 class ValidationTokenBase(BaseModel):
     token: str
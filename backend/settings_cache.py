@@ -0,0 +1,196 @@
+"""
+In-process cache of admin settings.
+
+All admin_settings rows are loaded into memory on first use and served from
+there, so reads such as the GitLab credentials or the allowed email domains
+no longer cost a query each. Writers call mark_changed() in the same
+transaction as the setting update: it bumps the single settings_version row
+and, once committed, makes the local cache reload on its next read.
+
+Other workers notice the change by reading settings_version at most once per
+SETTINGS_CACHE_CHECK_SECONDS; when the version differs they reload every
+setting and notify subscribers with the set of keys whose values changed.
+A check interval of 0 compares the version on every read (one primary-key
+lookup instead of one query per setting).
+
+The settings_version row is created with its table and, for databases that
+predate it, by ensure_version_row() at startup; mark_changed() only updates
+it, so concurrent writers never race to insert it.
+"""
+
+import os
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+from logger import get_logger
+
+# Initialize logger
+logger = get_logger('settings_cache', log_level='INFO')
+
+# Configuration
+SETTINGS_CACHE_ENABLED = os.environ.get("SETTINGS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+SETTINGS_CACHE_CHECK_SECONDS = float(os.environ.get("SETTINGS_CACHE_CHECK_SECONDS", "5"))
+
+# Primary key of the single settings_version row
+_VERSION_ROW_ID = 1
+
+_TRUE_VALUES = ("1", "true", "yes", "on")
+
+def _read_version(db: Session) -> int:
+    return db.execute(
+        select(models.SettingsVersion.version).where(models.SettingsVersion.id == _VERSION_ROW_ID)
+    ).scalar() or 0
+
+def ensure_version_row(engine):
+    """Create the settings_version row if the table exists without it"""
+    with engine.connect() as conn:
+        if conn.execute(select(models.SettingsVersion.id).where(models.SettingsVersion.id == _VERSION_ROW_ID)).first():
+            return
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(models.SettingsVersion).values(id=_VERSION_ROW_ID, version=0))
+        logger.info("Created the settings_version row")
+    except IntegrityError:
+        # Another worker created it first
+        pass
+
+def mark_changed(db: Session):
+    """
+    Bump the settings version in the caller's transaction.
+
+    Call before committing any write to admin_settings; the local cache is
+    reloaded after the commit and other workers pick the change up on their
+    next version check.
+    """
+    result = db.execute(
+        update(models.SettingsVersion)
+        .where(models.SettingsVersion.id == _VERSION_ROW_ID)
+        .values(version=models.SettingsVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        logger.warning("settings_version row is missing; other workers will not see this change until restart")
+    # Invalidating before the commit would let a concurrent read cache the old values under the new version
+    event.listen(db, "after_commit", lambda session: settings_cache.invalidate(), once=True)
+
+class SettingsCache:
+    """Admin settings by key, reloaded when the shared settings version changes"""
+
+    def __init__(self, check_seconds: float, enabled: bool = True):
+        self.check_seconds = check_seconds
+        self.enabled = enabled
+        self._values: Optional[Dict[str, str]] = None
+        self._version = None
+        self._checked_at = 0.0
+        self._generation = 0  # bumped by invalidate() / clear() so in-flight reloads can tell
+        self._subscribers: List[Callable[[Set[str]], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[Set[str]], None]):
+        """Call `callback(changed_keys)` whenever a reload finds changed values"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def invalidate(self):
+        """Force the next read to check the version (after a local write)"""
+        with self._lock:
+            self._checked_at = 0.0
+            self._version = None
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._values = None
+            self._version = None
+            self._checked_at = 0.0
+            self._generation += 1
+
+    def _refresh(self, db: Session) -> Dict[str, str]:
+        with self._lock:
+            values = self._values
+            if values is not None and time.monotonic() - self._checked_at < self.check_seconds:
+                return values
+            cached_version = self._version
+            generation = self._generation
+
+        # Query without holding the lock, so a slow database does not stall every reader
+        version = _read_version(db)
+        if values is not None and version == cached_version:
+            with self._lock:
+                if self._generation == generation:
+                    self._checked_at = time.monotonic()
+            return values
+
+        loaded = {key: value for key, value in db.execute(
+            select(models.AdminSetting.key, models.AdminSetting.value)
+        ).all()}
+
+        with self._lock:
+            if self._values is not values and self._version is not None and self._version >= version:
+                # Another thread installed this version or a newer one meanwhile
+                return self._values
+            previous = self._values
+            self._values = loaded
+            self._version = version
+            # After an invalidate() during the reload a newer version may be committed; check on the next read
+            self._checked_at = time.monotonic() if self._generation == generation else 0.0
+            subscribers = list(self._subscribers)
+
+        changed = set()
+        if previous is not None:
+            changed = {key for key in set(previous) | set(loaded) if previous.get(key) != loaded.get(key)}
+        if changed:
+            logger.info(f"Admin settings reloaded (version {version}), changed: {', '.join(sorted(changed))}")
+            for callback in subscribers:
+                try:
+                    callback(changed)
+                except Exception as e:
+                    logger.error(f"Settings change subscriber failed: {str(e)}")
+        return loaded
+
+    def get(self, db: Session, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Raw string value of a setting, or `default` if it is not set"""
+        if not self.enabled:
+            setting = db.query(models.AdminSetting).filter(models.AdminSetting.key == key).first()
+            return setting.value if setting else default
+        values = self._refresh(db)
+        return values[key] if key in values else default
+
+    def get_str(self, db: Session, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Setting value, treating empty strings as unset"""
+        value = self.get(db, key)
+        return value if value else default
+
+    def get_bool(self, db: Session, key: str, default: bool = False) -> bool:
+        value = self.get_str(db, key)
+        if value is None:
+            return default
+        return value.strip().lower() in _TRUE_VALUES
+
+    def get_int(self, db: Session, key: str, default: Optional[int] = None) -> Optional[int]:
+        value = self.get_str(db, key)
+        if value is None:
+            return default
+        try:
+            return int(value.strip())
+        except ValueError:
+            logger.warning(f"Admin setting '{key}' is not an integer: {value!r}")
+            return default
+
+    def get_list(self, db: Session, key: str, default: Optional[List[str]] = None) -> List[str]:
+        """Values separated by newlines and/or commas, stripped, without empty entries"""
+        value = self.get_str(db, key)
+        items = []
+        if value:
+            for line in value.splitlines():
+                items.extend(item.strip() for item in line.split(',') if item.strip())
+        if not items:
+            return list(default) if default is not None else []
+        return items
+
+settings_cache = SettingsCache(SETTINGS_CACHE_CHECK_SECONDS, SETTINGS_CACHE_ENABLED)
@@ -0,0 +1,304 @@
+"""
+Columnar snapshot import and export for organization data.
+
+Each dataset (areas, tribes, squads, members, memberships, services,
+dependencies) maps to one table and is exported as a Parquet or Arrow IPC
+file with a schema derived from the SQLAlchemy columns. Rows are streamed in
+record batches, so neither export nor import builds a pandas DataFrame or
+holds the full table as Python objects at once.
+
+Snapshots are table-shaped (primary and foreign keys included), unlike the
+CSV/XLSX templates, which makes them suitable for backups and for cloning an
+environment. Import datasets in IMPORT_ORDER so foreign keys resolve.
+
+pyarrow is optional; without it PYARROW_AVAILABLE is False and the functions
+raise SnapshotUnavailableError.
+"""
+
+import io
+import os
+import json
+import argparse
+from typing import Dict, Optional
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, JSON, select, insert, delete, func, text
+from sqlalchemy.orm import Session
+
+import models
+import dependency_graph
+from database import db_config
+from logger import get_logger, log_and_handle_exception
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Initialize logger
+logger = get_logger('snapshots', log_level='INFO')
+
+# Dataset name -> table
+DATASETS = {
+    "areas": models.Area.__table__,
+    "tribes": models.Tribe.__table__,
+    "squads": models.Squad.__table__,
+    "members": models.TeamMember.__table__,
+    "memberships": models.squad_members,
+    "services": models.Service.__table__,
+    "dependencies": models.Dependency.__table__,
+}
+
+# Order in which datasets must be imported so foreign keys resolve
+IMPORT_ORDER = ["areas", "tribes", "squads", "members", "memberships", "services", "dependencies"]
+
+# Supported formats: name -> (file extension, media type)
+FORMATS = {
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "arrow": (".arrow", "application/vnd.apache.arrow.file"),
+}
+
+# Rows per record batch
+BATCH_SIZE = int(os.environ.get("SNAPSHOT_BATCH_SIZE", "10000"))
+
+class SnapshotUnavailableError(RuntimeError):
+    """Raised when pyarrow is not installed"""
+
+def _require_pyarrow():
+    if not PYARROW_AVAILABLE:
+        raise SnapshotUnavailableError("Snapshot import/export requires the 'pyarrow' package")
+
+def _arrow_type(column):
+    """Map a SQLAlchemy column type to an Arrow type"""
+    column_type = column.type
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    # String, Text and JSON (serialized) columns
+    return pa.string()
+
+def get_arrow_schema(dataset: str):
+    """Arrow schema for a dataset, derived from its table columns"""
+    _require_pyarrow()
+    table = DATASETS[dataset]
+    return pa.schema([pa.field(column.name, _arrow_type(column), nullable=True) for column in table.columns])
+
+def _json_columns(table):
+    return {column.name for column in table.columns if isinstance(column.type, JSON)}
+
+def _iter_record_batches(db: Session, dataset: str):
+    """Stream a table as Arrow record batches"""
+    table = DATASETS[dataset]
+    schema = get_arrow_schema(dataset)
+    json_columns = _json_columns(table)
+    names = [column.name for column in table.columns]
+
+    order_by = list(table.primary_key.columns) or list(table.columns)
+    result = db.execute(select(table).order_by(*order_by).execution_options(yield_per=BATCH_SIZE))
+    for rows in result.partitions(BATCH_SIZE):
+        columns = list(zip(*rows)) if rows else [[] for _ in names]
+        arrays = []
+        for name, values, field in zip(names, columns, schema):
+            if name in json_columns:
+                values = [json.dumps(value) if value is not None else None for value in values]
+            arrays.append(pa.array(values, type=field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def export_dataset(db: Session, dataset: str, fmt: str = "parquet") -> bytes:
+    """
+    Export a dataset as a Parquet or Arrow IPC file.
+
+    Returns:
+        bytes: The file contents
+    """
+    _require_pyarrow()
+    schema = get_arrow_schema(dataset)
+    sink = io.BytesIO()
+    row_count = 0
+
+    if fmt == "parquet":
+        with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+            for batch in _iter_record_batches(db, dataset):
+                writer.write_batch(batch)
+                row_count += batch.num_rows
+    elif fmt == "arrow":
+        with pa_ipc.new_file(sink, schema) as writer:
+            for batch in _iter_record_batches(db, dataset):
+                writer.write_batch(batch)
+                row_count += batch.num_rows
+    else:
+        raise ValueError(f"Unsupported snapshot format: {fmt}")
+
+    logger.info(f"Exported {row_count} {dataset} rows as {fmt} ({sink.tell()} bytes)")
+    return sink.getvalue()
+
+def _read_record_batches(source, fmt: str):
+    """Yield record batches from a Parquet or Arrow IPC file (path or file object)"""
+    if fmt == "parquet":
+        yield from pq.ParquetFile(source).iter_batches(batch_size=BATCH_SIZE)
+    elif fmt == "arrow":
+        reader = pa_ipc.open_file(source)
+        for index in range(reader.num_record_batches):
+            yield reader.get_batch(index)
+    else:
+        raise ValueError(f"Unsupported snapshot format: {fmt}")
+
+def detect_format(filename: str) -> Optional[str]:
+    """Guess the snapshot format from a file name"""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in (".arrow", ".feather", ".ipc"):
+        return "arrow"
+    if extension in (".parquet", ".pq"):
+        return "parquet"
+    return None
+
+def reset_sequence(db: Session, table):
+    """Move a PostgreSQL id sequence past the imported ids"""
+    if not db_config.is_postgres or "id" not in table.columns:
+        return
+    table_name = f"{db_config.schema}.{table.name}" if db_config.schema else table.name
+    db.execute(text(
+        f"SELECT setval(pg_get_serial_sequence(:table_name, 'id'), "
+        f"COALESCE((SELECT MAX(id) FROM {table_name}), 0) + 1, false)"
+    ), {"table_name": table_name})
+
+def import_dataset(db: Session, dataset: str, source, fmt: str = "parquet", replace: bool = False,
+                   commit: bool = True) -> int:
+    """
+    Import a dataset snapshot with one multi-row INSERT per record batch.
+
+    Columns are matched by name. Columns missing from the snapshot take their
+    database defaults and unknown columns are ignored.
+
+    Parameters:
+        db: Database session
+        dataset: Dataset name (see DATASETS)
+        source: Path or binary file object
+        fmt: 'parquet' or 'arrow'
+        replace: Delete the existing rows of the table first
+        commit: Commit when done (False lets callers import several datasets in one transaction)
+
+    Returns:
+        int: Number of rows imported
+    """
+    _require_pyarrow()
+    table = DATASETS[dataset]
+    json_columns = _json_columns(table)
+    row_count = 0
+
+    try:
+        if replace:
+            db.execute(delete(table))
+
+        for batch in _read_record_batches(source, fmt):
+            names = [name for name in batch.schema.names if name in table.columns]
+            if not names or batch.num_rows == 0:
+                continue
+            columns = [batch.column(name).to_pylist() for name in names]
+            rows = [dict(zip(names, values)) for values in zip(*columns)]
+            for name in json_columns.intersection(names):
+                for row in rows:
+                    if row[name] is not None:
+                        row[name] = json.loads(row[name])
+            db.execute(insert(table), rows)
+            row_count += len(rows)
+
+        reset_sequence(db, table)
+        if dataset in ("areas", "tribes", "squads", "dependencies"):
+            dependency_graph.mark_changed(db)
+        if commit:
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        log_and_handle_exception(
+            logger,
+            f"Error importing {dataset} snapshot",
+            e,
+            reraise=True,
+            dataset=dataset,
+            format=fmt
+        )
+
+    logger.info(f"Imported {row_count} {dataset} rows from {fmt} snapshot")
+    return row_count
+
+def count_rows(db: Session, dataset: str) -> int:
+    """Number of rows currently in a dataset's table"""
+    return db.execute(select(func.count()).select_from(DATASETS[dataset])).scalar()
+
+def export_all(db: Session, directory: str, fmt: str = "parquet") -> Dict[str, str]:
+    """Export every dataset into a directory, returning dataset -> file path"""
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for dataset in IMPORT_ORDER:
+        path = os.path.join(directory, dataset + FORMATS[fmt][0])
+        with open(path, "wb") as f:
+            f.write(export_dataset(db, dataset, fmt))
+        paths[dataset] = path
+    return paths
+
+def import_all(db: Session, directory: str, replace: bool = False) -> Dict[str, int]:
+    """
+    Import every dataset snapshot found in a directory, in foreign key order,
+    in a single transaction.
+
+    With replace=True tables are emptied in reverse order first.
+    """
+    found = {}
+    for dataset in IMPORT_ORDER:
+        for fmt, (extension, _) in FORMATS.items():
+            path = os.path.join(directory, dataset + extension)
+            if os.path.exists(path):
+                found[dataset] = (path, fmt)
+                break
+
+    if replace:
+        for dataset in reversed(IMPORT_ORDER):
+            if dataset in found:
+                db.execute(delete(DATASETS[dataset]))
+
+    counts = {}
+    for dataset in IMPORT_ORDER:
+        if dataset in found:
+            path, fmt = found[dataset]
+            counts[dataset] = import_dataset(db, dataset, path, fmt, commit=False)
+    db.commit()
+    return counts
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Export or import Parquet/Arrow snapshots of the organization data')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--export', dest='export_dir', type=str, help='Directory to write snapshots to')
+    group.add_argument('--import', dest='import_dir', type=str, help='Directory to read snapshots from')
+    parser.add_argument('--format', dest='fmt', choices=list(FORMATS), default='parquet',
+                        help='Snapshot format for --export (default: parquet)')
+    parser.add_argument('--replace', action='store_true', help='Delete existing rows before importing')
+
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    args = parse_args()
+    if not PYARROW_AVAILABLE:
+        logger.error("pyarrow is not installed. Install it with: pip install pyarrow")
+        exit(1)
+
+    db = SessionLocal()
+    try:
+        if args.export_dir:
+            for dataset, path in export_all(db, args.export_dir, args.fmt).items():
+                logger.info(f"Wrote {dataset} snapshot: {path}")
+        else:
+            for dataset, count in import_all(db, args.import_dir, replace=args.replace).items():
+                logger.info(f"Imported {count} {dataset} rows")
+    finally:
+        db.close()
@@ -0,0 +1,12 @@
+import os
+import atexit
+import shutil
+import tempfile
+
+# Keep the default database, log files and generated admin credentials out of
+# the repository; set before any backend module is imported
+_scratch_dir = tempfile.mkdtemp(prefix="team_portal_tests_")
+os.environ.setdefault("DB_PATH", os.path.join(_scratch_dir, "team_portal.db"))
+os.environ.setdefault("LOG_DIR", os.path.join(_scratch_dir, "logs"))
+os.environ.setdefault("CREDENTIALS_DIR", os.path.join(_scratch_dir, "credentials"))
+atexit.register(shutil.rmtree, _scratch_dir, ignore_errors=True)
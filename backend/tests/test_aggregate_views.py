@@ -0,0 +1,80 @@
+import sys
+import os
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+import aggregate_views
+from database import Base
+
+def _make_session():
+    """Create an in-memory database with a small organisation loaded."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    assert aggregate_views.create_aggregate_views(engine)
+    db = sessionmaker(bind=engine)()
+
+    area = models.Area(name="Area 1")
+    db.add(area)
+    db.flush()
+    tribe = models.Tribe(name="Tribe 1", area_id=area.id)
+    db.add(tribe)
+    db.flush()
+    squad_a = models.Squad(name="Squad A", tribe_id=tribe.id)
+    squad_b = models.Squad(name="Squad B", tribe_id=tribe.id)
+    db.add_all([squad_a, squad_b])
+    db.flush()
+
+    core = models.TeamMember(name="Core", role="Engineer", employment_type="core")
+    subcon = models.TeamMember(name="Subcon", role="Engineer", employment_type="subcon")
+    vacancy = models.TeamMember(name="Vacancy", role="Engineer", is_vacancy=True)
+    db.add_all([core, subcon, vacancy])
+    db.flush()
+
+    db.execute(models.squad_members.insert(), [
+        {"member_id": core.id, "squad_id": squad_a.id, "capacity": 1.0},
+        {"member_id": subcon.id, "squad_id": squad_a.id, "capacity": 0.5},
+        {"member_id": vacancy.id, "squad_id": squad_a.id, "capacity": 1.0},
+        {"member_id": core.id, "squad_id": squad_b.id, "capacity": 0.25},
+    ])
+    db.commit()
+    return db, area, tribe, squad_a, squad_b
+
+def test_squad_member_stats_view():
+    """Test that squad aggregates exclude vacancies and split core/subcon."""
+    db, _, _, squad_a, squad_b = _make_session()
+
+    stats = aggregate_views.get_member_stats(db, "squad")
+    assert stats[squad_a.id]["member_count"] == 2
+    assert stats[squad_a.id]["core_count"] == 1
+    assert stats[squad_a.id]["subcon_count"] == 1
+    assert stats[squad_a.id]["total_capacity"] == 1.5
+    assert stats[squad_a.id]["subcon_capacity"] == 0.5
+    assert stats[squad_b.id]["member_count"] == 1
+    assert stats[squad_b.id]["core_capacity"] == 0.25
+
+def test_tribe_and_area_member_stats_views():
+    """Test that tribe and area aggregates roll up all squads."""
+    db, area, tribe, _, _ = _make_session()
+
+    tribe_stats = aggregate_views.get_member_stats(db, "tribe", [tribe.id])
+    area_stats = aggregate_views.get_member_stats(db, "area", [area.id])
+    for stats in (tribe_stats[tribe.id], area_stats[area.id]):
+        assert stats["member_count"] == 3
+        assert stats["core_count"] == 2
+        assert stats["subcon_count"] == 1
+        assert stats["total_capacity"] == 1.75
+
+def test_apply_member_stats_does_not_dirty_objects(monkeypatch):
+    """Test that view values are applied without marking objects dirty."""
+    db, _, _, squad_a, _ = _make_session()
+    monkeypatch.setattr(aggregate_views, "AGGREGATE_VIEWS_ENABLED", True)
+
+    aggregate_views.apply_member_stats(db, "squad", [squad_a])
+    assert squad_a.member_count == 2
+    assert squad_a.total_capacity == 1.5
+    assert squad_a not in db.dirty
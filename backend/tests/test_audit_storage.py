@@ -0,0 +1,121 @@
+import sys
+import os
+import gzip
+import json
+from datetime import datetime
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+import models
+import audit_storage
+from database import Base
+
+NOW = datetime(2024, 6, 15)
+
+def _make_engine():
+    """Create an in-memory database with audit entries spread over several months."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = models.User(email="admin@example.com", username="admin", hashed_password="x")
+    db.add(user)
+    db.flush()
+    db.execute(insert(models.AuditLog), [
+        {"user_id": user.id, "action": "LOGIN", "entity_type": "User", "entity_id": user.id,
+         "created_at": datetime(2023, 1, 10)},
+        {"user_id": user.id, "action": "UPDATE", "entity_type": "Squad", "entity_id": 7,
+         "created_at": datetime(2024, 4, 2)},
+        {"user_id": user.id, "action": "UPDATE", "entity_type": "Squad", "entity_id": 7,
+         "created_at": datetime(2024, 6, 1)},
+        {"user_id": None, "action": "CREATE", "entity_type": "Tribe", "entity_id": 3,
+         "created_at": datetime(2024, 6, 10)},
+    ])
+    db.commit()
+    db.close()
+    return engine
+
+def test_rollover_moves_previous_months():
+    """Test that SQLite rollover keeps only the current month in audit_logs."""
+    engine = _make_engine()
+
+    moved = audit_storage.rollover(engine, now=NOW)
+    assert moved == ["audit_logs_2023_01", "audit_logs_2024_04"]
+
+    db = sessionmaker(bind=engine)()
+    assert db.query(models.AuditLog).count() == 2
+    with engine.connect() as conn:
+        assert set(audit_storage.list_partitions(conn).values()) == set(moved)
+
+def test_ids_not_reused_after_rollover_empties_table():
+    """Test that new entries get fresh ids after every row was rolled over."""
+    engine = _make_engine()
+    audit_storage.rollover(engine, now=datetime(2024, 8, 1))
+
+    db = sessionmaker(bind=engine)()
+    assert db.query(models.AuditLog).count() == 0
+    entry = models.AuditLog(action="LOGIN", entity_type="User", created_at=datetime(2024, 8, 2))
+    db.add(entry)
+    db.commit()
+    assert entry.id == 5
+
+def test_rollover_upgrades_legacy_table():
+    """Test that an audit_logs table without AUTOINCREMENT is rebuilt and continues after rolled-over ids."""
+    engine = _make_engine()
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE audit_logs_2024_05 AS SELECT * FROM audit_logs WHERE 0"))
+        conn.execute(text("INSERT INTO audit_logs_2024_05 (id, action, created_at) VALUES (9, 'LOGIN', '2024-05-03')"))
+        conn.execute(text("ALTER TABLE audit_logs RENAME TO audit_logs_old"))
+        for index in models.AuditLog.__table__.indexes:
+            conn.execute(text(f"DROP INDEX {index.name}"))
+        audit_storage._audit_table("audit_logs").create(bind=conn)
+        conn.execute(text("INSERT INTO audit_logs SELECT * FROM audit_logs_old"))
+        conn.execute(text("DROP TABLE audit_logs_old"))
+
+    audit_storage.rollover(engine, now=NOW)
+    with engine.connect() as conn:
+        sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'audit_logs'")).scalar()
+    assert "AUTOINCREMENT" in sql
+
+    db = sessionmaker(bind=engine)()
+    assert db.query(models.AuditLog).count() == 2
+    entry = models.AuditLog(action="LOGIN", entity_type="User", created_at=NOW)
+    db.add(entry)
+    db.commit()
+    assert entry.id == 10
+
+def test_query_includes_rollover_tables():
+    """Test that filtered queries span the live and rollover tables, newest first."""
+    engine = _make_engine()
+    audit_storage.rollover(engine, now=NOW)
+    db = sessionmaker(bind=engine)()
+
+    logs = audit_storage.query_audit_logs(db, entity_type="Squad", entity_id=7)
+    assert [log.created_at for log in logs] == [datetime(2024, 6, 1), datetime(2024, 4, 2)]
+    assert logs[0].user.username == "admin"
+
+    logs = audit_storage.query_audit_logs(db, start_date=datetime(2024, 5, 1))
+    assert [log.action for log in logs] == ["CREATE", "UPDATE"]
+
+    logs = audit_storage.query_audit_logs(db, before=datetime(2024, 6, 1), limit=1)
+    assert [log.created_at for log in logs] == [datetime(2024, 4, 2)]
+
+def test_archive_old_entries(tmp_path):
+    """Test that months past retention are written to archive files and removed."""
+    engine = _make_engine()
+    audit_storage.rollover(engine, now=NOW)
+
+    paths = audit_storage.archive_old_entries(engine, retention_days=365, archive_dir=str(tmp_path), now=NOW)
+    assert [os.path.basename(path) for path in paths] == ["audit_logs_2023_01.jsonl.gz"]
+
+    with gzip.open(paths[0], "rt", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [record["action"] for record in records] == ["LOGIN"]
+
+    db = sessionmaker(bind=engine)()
+    assert len(audit_storage.query_audit_logs(db)) == 3
+    with engine.connect() as conn:
+        assert list(audit_storage.list_partitions(conn).values()) == ["audit_logs_2024_04"]
@@ -0,0 +1,153 @@
+import sys
+import os
+import threading
+import time
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import audit_writer
+import models
+import user_auth
+from audit_writer import AuditLogWriter
+from database import Base
+
+def _make_session_factory():
+    """Create an in-memory database shared by the test and the writer thread."""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+def _entry(number):
+    """Audit entry column values for a numbered action."""
+    return {"user_id": None, "action": f"ACTION_{number}", "entity_type": "Squad", "entity_id": number, "details": ""}
+
+def _actions(session_factory):
+    """Actions of every written audit entry, sorted."""
+    db = session_factory()
+    try:
+        return sorted(row.action for row in db.query(models.AuditLog))
+    finally:
+        db.close()
+
+def _record_batches(monkeypatch, writer):
+    """Record the size of every batch the writer writes."""
+    sizes = []
+    write_batch = writer._write_batch
+
+    def recording(batch):
+        sizes.append(len(batch))
+        write_batch(batch)
+
+    monkeypatch.setattr(writer, "_write_batch", recording)
+    return sizes
+
+def test_entries_written_in_batches_and_drained_on_stop(monkeypatch):
+    """Test that full batches are written as they fill and the remainder is drained by stop()."""
+    session_factory = _make_session_factory()
+    writer = AuditLogWriter(session_factory, batch_size=3, flush_interval=60)
+    sizes = _record_batches(monkeypatch, writer)
+    writer.start()
+    for number in range(7):
+        assert writer.enqueue(_entry(number))
+    writer.stop()
+
+    assert sizes == [3, 3, 1]
+    assert _actions(session_factory) == [f"ACTION_{number}" for number in range(7)]
+    assert not writer.running
+
+def test_partial_batch_flushed_after_interval():
+    """Test that a batch smaller than batch_size is written once the flush interval has passed."""
+    session_factory = _make_session_factory()
+    writer = AuditLogWriter(session_factory, batch_size=100, flush_interval=0.05)
+    writer.start()
+    try:
+        writer.enqueue(_entry(1))
+        writer.enqueue(_entry(2))
+        deadline = time.monotonic() + 5
+        while len(_actions(session_factory)) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert _actions(session_factory) == ["ACTION_1", "ACTION_2"]
+    finally:
+        writer.stop()
+
+def test_failed_batch_is_retried(monkeypatch):
+    """Test that a batch whose write fails is written by the next attempt."""
+    session_factory = _make_session_factory()
+    # The first session has no audit_logs table, so the first attempt fails
+    broken_factory = sessionmaker(bind=create_engine("sqlite://"))
+    attempts = []
+
+    def flaky_factory():
+        attempts.append(len(attempts) + 1)
+        return broken_factory() if len(attempts) == 1 else session_factory()
+
+    monkeypatch.setattr(audit_writer.time, "sleep", lambda seconds: None)
+    writer = AuditLogWriter(flaky_factory, batch_size=2, flush_interval=60)
+    writer._write_batch([_entry(1), _entry(2)])
+
+    assert attempts == [1, 2]
+    assert _actions(session_factory) == ["ACTION_1", "ACTION_2"]
+
+def test_full_queue_falls_back_to_synchronous_write(monkeypatch):
+    """Test that log_user_action writes the entry itself when the writer's queue is full."""
+    session_factory = _make_session_factory()
+    release = threading.Event()
+
+    def blocked_factory():
+        release.wait(5)
+        return session_factory()
+
+    writer = AuditLogWriter(blocked_factory, batch_size=1, flush_interval=60, max_queue_size=1)
+    monkeypatch.setattr(user_auth, "audit_writer", writer)
+    writer.start()
+    try:
+        # The worker takes the first entry and blocks writing it; the second fills the queue
+        assert writer.enqueue(_entry(1))
+        deadline = time.monotonic() + 5
+        while writer._queue.qsize() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert writer.enqueue(_entry(2))
+
+        db = session_factory()
+        user_auth.log_user_action(db, None, "SYNC", "Squad", 3, "")
+        db.close()
+        assert _actions(session_factory) == ["SYNC"]
+    finally:
+        release.set()
+        writer.stop()
+    assert _actions(session_factory) == ["ACTION_1", "ACTION_2", "SYNC"]
+
+def test_entries_during_stop_written_synchronously(monkeypatch):
+    """Test that once stop() has been called, entries are written by the caller even while the worker drains."""
+    session_factory = _make_session_factory()
+    release = threading.Event()
+
+    def blocked_factory():
+        release.wait(5)
+        return session_factory()
+
+    writer = AuditLogWriter(blocked_factory, batch_size=1, flush_interval=60)
+    monkeypatch.setattr(user_auth, "audit_writer", writer)
+    writer.start()
+    assert writer.enqueue(_entry(1))
+    stopper = threading.Thread(target=writer.stop)
+    stopper.start()
+    deadline = time.monotonic() + 5
+    while writer._accepting and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert writer.running
+    assert not writer.enqueue(_entry(2))
+    db = session_factory()
+    user_auth.log_user_action(db, None, "DURING_STOP", "Squad", 1, "")
+    db.close()
+
+    release.set()
+    stopper.join(5)
+    assert not writer.running
+    assert _actions(session_factory) == ["ACTION_1", "DURING_STOP"]
@@ -0,0 +1,150 @@
+import sys
+import os
+import threading
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import crud
+import dependency_graph
+import entity_crud
+import models
+import schemas
+from database import Base
+from dependency_graph import DependencyGraph, DependencyGraphCache, dependency_graph_cache, load_graph
+
+def _graph(edges, squads=6):
+    """Build a graph of squads 1..n named S1..Sn from (dependent, dependency) pairs."""
+    dependencies = [
+        {"id": i + 1, "dependent_squad_id": dependent, "dependency_squad_id": dependency}
+        for i, (dependent, dependency) in enumerate(edges)
+    ]
+    return DependencyGraph([(i, f"S{i}") for i in range(1, squads + 1)], dependencies)
+
+def _make_session():
+    """Create an in-memory database with three squads and two dependencies."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    for squad_id in (1, 2, 3):
+        db.add(models.Squad(id=squad_id, name=f"Squad {squad_id}"))
+    db.add(models.Dependency(id=1, dependent_squad_id=1, dependency_squad_id=2, dependency_name="API",
+                             interaction_mode="X_AS_A_SERVICE"))
+    db.add(models.Dependency(id=2, dependent_squad_id=2, dependency_squad_id=3, dependency_name="Platform",
+                             interaction_mode="collaboration"))
+    db.commit()
+    return db
+
+def test_upstream_and_downstream_closure():
+    """Test that closures follow edge direction, report depths and honour max_depth."""
+    graph = _graph([(1, 2), (2, 3), (3, 4), (1, 3), (5, 1)])
+
+    upstream = graph.closure(1, upstream=True)
+    assert [(s["squad_id"], s["depth"]) for s in upstream] == [(2, 1), (3, 1), (4, 2)]
+    downstream = graph.closure(3, upstream=False)
+    assert [(s["squad_id"], s["depth"]) for s in downstream] == [(1, 1), (2, 1), (5, 2)]
+    assert [s["squad_id"] for s in graph.closure(5, max_depth=1)] == [1]
+    assert graph.closure(6) == []
+
+def test_shortest_path():
+    """Test that the fewest-hop path and the dependencies along it are returned."""
+    graph = _graph([(1, 2), (2, 3), (3, 4), (1, 3)])
+
+    path = graph.shortest_path(1, 4)
+    assert [s["squad_id"] for s in path["squads"]] == [1, 3, 4]
+    assert path["dependency_ids"] == [4, 3]
+    assert path["length"] == 2
+    assert graph.shortest_path(4, 1) is None
+    assert graph.shortest_path(2, 2)["length"] == 0
+
+def test_cycles():
+    """Test that strongly connected components and self-dependencies are reported as cycles."""
+    graph = _graph([(1, 2), (2, 3), (3, 1), (3, 4), (5, 5), (4, 6)])
+
+    cycles = graph.cycles()
+    assert [[s["squad_id"] for s in cycle["squads"]] for cycle in cycles] == [[1, 2, 3], [5]]
+    assert cycles[0]["dependency_ids"] == [1, 2, 3]
+    assert cycles[1]["dependency_ids"] == [5]
+    assert _graph([(1, 2), (2, 3)]).cycles() == []
+
+def test_load_graph_matches_get_all_dependencies():
+    """Test that the graph rows match the normalized rows of crud.get_all_dependencies."""
+    db = _make_session()
+
+    graph = load_graph(db)
+    expected = [schemas.Dependency.model_validate(d).model_dump() for d in crud.get_all_dependencies(db)]
+    assert [schemas.Dependency.model_validate(d).model_dump() for d in graph.dependencies] == expected
+    assert graph.dependencies[0]["interaction_mode"] == "x_as_a_service"
+
+def test_cache_invalidated_by_crud_writes():
+    """Test that dependency writes drop the cached graph once committed."""
+    db = _make_session()
+    dependency_graph_cache.invalidate()
+    assert dependency_graph_cache.get(db).edge_count == 2
+
+    crud.update_dependency(db, 1, schemas.DependencyBase(dependency_name="Payments API"))
+    graph = dependency_graph_cache.get(db)
+    assert graph.dependencies[0]["dependency_name"] == "Payments API"
+
+    crud.delete_dependency(db, 2)
+    graph = dependency_graph_cache.get(db)
+    assert graph.edge_count == 1
+    assert graph.closure(1) == [{"squad_id": 2, "squad_name": "Squad 2", "depth": 1}]
+
+def test_cache_invalidated_by_squad_writes():
+    """Test that squads created or renamed through entity_crud are visible to the graph straight away."""
+    db = _make_session()
+    dependency_graph_cache.invalidate()
+    assert not dependency_graph_cache.get(db).has_squad(4)
+
+    squad_data = schemas.SquadBase(name="Squad 4", status="Active", timezone="UTC", member_count=0, total_capacity=0.0)
+    squad = entity_crud.create_squad(db, squad_data, tribe_id=1, user_id=1)
+    assert dependency_graph_cache.get(db).has_squad(squad.id)
+
+    squad_data.name = "Platform Squad"
+    entity_crud.update_squad(db, 3, squad_data, user_id=1)
+    graph = dependency_graph_cache.get(db)
+    assert graph.dependencies[1]["dependency_squad_name"] == "Platform Squad"
+    assert graph.closure(2) == [{"squad_id": 3, "squad_name": "Platform Squad", "depth": 1}]
+
+def test_cache_rebuilds_after_max_age():
+    """Test that changes from other writers are picked up once the graph is too old."""
+    db = _make_session()
+    cache = DependencyGraphCache(max_age=60)
+    first = cache.get(db)
+    assert cache.get(db) is first
+
+    cache.max_age = 0
+    assert cache.get(db) is not first
+
+def test_concurrent_callers_share_one_build(monkeypatch):
+    """Test that callers arriving during a build wait for it, and the queries run without the lock."""
+    db = _make_session()
+    cache = DependencyGraphCache(max_age=60)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+    built = load_graph(db, 1)
+
+    def slow_load(session, version=0):
+        calls.append(version)
+        assert not cache._lock.locked()
+        started.set()
+        release.wait(5)
+        return built
+
+    monkeypatch.setattr(dependency_graph, "load_graph", slow_load)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(db))) for _ in range(3)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert len(results) == 3 and all(graph is built for graph in results)
@@ -0,0 +1,133 @@
+import sys
+import os
+import struct
+import threading
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import crud
+import impact_analysis
+import models
+from database import Base
+from dependency_graph import dependency_graph_cache
+from dependency_layout import LayoutCache, encode_binary
+
+def _make_session():
+    """
+    Create an in-memory database with two areas, three tribes and nine squads.
+
+    Squad 9 has no dependencies; the others depend on each other within and
+    across tribes.
+    """
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([models.Area(id=1, name="Retail"), models.Area(id=2, name="Platform")])
+    db.add_all([
+        models.Tribe(id=1, name="Payments", area_id=1),
+        models.Tribe(id=2, name="Checkout", area_id=1),
+        models.Tribe(id=3, name="Infra", area_id=2),
+    ])
+    for squad_id in range(1, 10):
+        db.add(models.Squad(id=squad_id, name=f"Squad {squad_id}", tribe_id=(squad_id - 1) // 3 + 1))
+    edges = [(1, 2), (2, 3), (4, 1), (5, 1), (6, 7), (7, 8), (4, 5)]
+    for dependency_id, (dependent, dependency) in enumerate(edges, start=1):
+        db.add(models.Dependency(id=dependency_id, dependent_squad_id=dependent, dependency_squad_id=dependency,
+                                 dependency_name=f"Dependency {dependency_id}", interaction_mode="collaboration"))
+    db.commit()
+    dependency_graph_cache.invalidate()
+    return db
+
+def _overlapping(nodes):
+    """Count pairs of node circles that overlap."""
+    x, y, radius = np.array(nodes["x"]), np.array(nodes["y"]), np.array(nodes["radius"])
+    distance = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+    np.fill_diagonal(distance, np.inf)
+    return int((distance < radius[:, None] + radius[None, :] - 0.5).sum() // 2)
+
+def test_squad_level_layout():
+    """Test that connected squads get non-overlapping positions and edges index into the nodes."""
+    db = _make_session()
+    payload = LayoutCache().payload(db, "squad")
+    nodes, edges = payload["nodes"], payload["edges"]
+
+    assert nodes["id"] == [1, 2, 3, 4, 5, 6, 7, 8]
+    assert nodes["tribe_id"] == [1, 1, 1, 2, 2, 2, 3, 3]
+    assert nodes["area_id"] == [1, 1, 1, 1, 1, 1, 2, 2]
+    assert _overlapping(nodes) == 0
+    assert [(nodes["id"][s], nodes["id"][t]) for s, t in zip(edges["source"], edges["target"])][:2] == [(1, 2), (2, 3)]
+    assert set(edges["interaction_mode"]) == {payload["interaction_modes"].index("collaboration")}
+
+    with_isolated = LayoutCache().payload(db, "squad", include_isolated=True)
+    assert 9 in with_isolated["nodes"]["id"]
+
+def test_tribe_and_area_super_nodes():
+    """Test that tribe and area levels aggregate dependencies between clusters."""
+    db = _make_session()
+    cache = LayoutCache()
+
+    tribes = cache.payload(db, "tribe")
+    nodes, edges = tribes["nodes"], tribes["edges"]
+    assert nodes["id"] == [1, 2, 3]
+    assert nodes["size"] == [3, 3, 2]
+    assert nodes["internal"] == [2, 1, 1]
+    pairs = {(nodes["id"][s], nodes["id"][t]): w for s, t, w in zip(edges["source"], edges["target"], edges["weight"])}
+    assert pairs == {(2, 1): 2, (2, 3): 1}
+    assert _overlapping(nodes) == 0
+
+    areas = cache.payload(db, "area")
+    assert areas["nodes"]["id"] == [1, 2]
+    assert areas["nodes"]["internal"] == [5, 1]
+    assert areas["edges"]["weight"] == [1]
+
+def test_binary_payload_and_cache_per_graph_version():
+    """Test the binary header and that layouts are reused until the graph changes."""
+    db = _make_session()
+    cache = LayoutCache()
+    first = cache.layout(db)
+    assert cache.layout(db) is first
+
+    payload = cache.payload(db, "squad")
+    binary = encode_binary(payload)
+    magic, version, level, node_count, edge_count = struct.unpack("<4sIIII", binary[:20])
+    assert (magic, version, level, node_count, edge_count) == (b"DMAP", payload["graph_version"], 0, 8, 7)
+    assert len(binary) == 20 + node_count * 8 * 4 + edge_count * (3 * 4 + 1)
+
+    crud.delete_dependency(db, 5)
+    assert cache.layout(db) is not first
+    assert cache.payload(db, "squad")["graph_version"] > payload["graph_version"]
+
+def test_concurrent_callers_share_one_layout(monkeypatch):
+    """Test that callers arriving during a layout wait for it, and the rollups are fetched without the lock."""
+    db = _make_session()
+    cache = LayoutCache()
+    graph = dependency_graph_cache.get(db)
+    rollups = impact_analysis.impact_analyzer.rollups(db, graph)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_rollups(session, graph):
+        calls.append(graph.version)
+        assert not cache._lock.locked()
+        started.set()
+        release.wait(5)
+        return rollups
+
+    monkeypatch.setattr(impact_analysis.impact_analyzer, "rollups", slow_rollups)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.layout(db))) for _ in range(3)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [graph.version]
+    assert len(results) == 3 and all(layout is results[0] for layout in results)
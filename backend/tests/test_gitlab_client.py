@@ -0,0 +1,151 @@
+import sys
+import os
+import json
+import time
+import threading
+from urllib.parse import parse_qs, urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import Base
+from repository import providers, repository_service
+from repository.gitlab_client import GitLabClient, create_session
+from settings_cache import mark_changed, settings_cache
+
+class _FakeGitLab(BaseHTTPRequestHandler):
+    """
+    Minimal GitLab API: the first request to /api/v4/projects/7 fails with a 503,
+    searches for "slow" take 0.3s and group 5 has seven projects.
+    """
+    protocol_version = "HTTP/1.1"
+    failed_once = False
+    connections = set()
+    calls = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        _FakeGitLab.connections.add(self.client_address)
+        _FakeGitLab.calls.append((url.path, self.headers.get("PRIVATE-TOKEN")))
+        headers = {}
+        status, body = 200, []
+        if url.path == "/api/v4/projects/7":
+            if not _FakeGitLab.failed_once:
+                _FakeGitLab.failed_once = True
+                status, body = 503, {"message": "try again"}
+            else:
+                body = {"id": 7, "name": "api", "web_url": "https://gitlab/api"}
+        elif url.path == "/api/v4/groups/5/projects":
+            page, per_page = int(query.get("page", ["1"])[0]), int(query["per_page"][0])
+            ids = list(range(1, 8))[(page - 1) * per_page:page * per_page]
+            body = [{"id": project_id, "name": f"project-{project_id}"} for project_id in ids]
+            if page * per_page < 7:
+                headers["X-Next-Page"] = str(page + 1)
+        elif query.get("search") == ["slow"]:
+            time.sleep(0.3)
+            body = [{"id": 1, "name": "slow"}]
+
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+class _QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients that hit their deadline hang up mid-response
+        pass
+
+def _start_server():
+    _FakeGitLab.failed_once = False
+    _FakeGitLab.connections.clear()
+    _FakeGitLab.calls.clear()
+    server = _QuietServer(("127.0.0.1", 0), _FakeGitLab)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_retries_and_reuses_connections():
+    """Test that transient errors are retried and sequential requests share one keep-alive connection."""
+    server, url = _start_server()
+    client = GitLabClient(url, "secret", session=create_session("secret", backoff_seconds=0))
+    try:
+        assert client.get_repository_details(7)["name"] == "api"
+        assert client.get_repository_details(7)["id"] == 7
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert all(token == "secret" for _, token in _FakeGitLab.calls)
+    # One retried 503 plus two successes
+    assert len(_FakeGitLab.calls) == 3
+    assert len(_FakeGitLab.connections) == 1
+
+def test_group_projects_follow_pagination():
+    """Test that listings are fetched page by page up to the limit."""
+    server, url = _start_server()
+    client = GitLabClient(url, "secret")
+    try:
+        assert [project["id"] for project in client.get_group_projects(5, limit=50)] == list(range(1, 8))
+
+        _FakeGitLab.calls.clear()
+        pages = client.iter_pages("groups/5/projects", per_page=3)
+        assert [next(pages)["id"] for _ in range(4)] == [1, 2, 3, 4]
+        # The generator only fetched the pages it needed
+        assert len(_FakeGitLab.calls) == 2
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_search_runs_concurrently_within_deadline():
+    """Test that projects and groups are searched in parallel and the deadline bounds the search."""
+    server, url = _start_server()
+    client = GitLabClient(url, "secret")
+    try:
+        started = time.perf_counter()
+        results = client.search_repositories("slow")
+        assert time.perf_counter() - started < 0.55
+        assert sorted(result["type"] for result in results) == ["group", "repository"]
+
+        started = time.perf_counter()
+        assert client.search_repositories("slow", deadline_seconds=0.1) == []
+        assert time.perf_counter() - started < 0.3
+    finally:
+        client.close()
+        server.shutdown()
+
+def test_shared_client_rebuilt_only_when_settings_change():
+    """Test that the shared client is reused until the GitLab URL or token changes."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(models.AdminSetting(key="gitlab_api_url", value="https://gitlab.example.com"))
+    db.add(models.AdminSetting(key="gitlab_api_token", value="one"))
+    db.commit()
+    settings_cache.clear()
+    providers.close_clients()
+    try:
+        client = repository_service.get_gitlab_client(db)
+        assert client is not None
+        assert repository_service.RepositoryService(db).gitlab_client is client
+
+        db.query(models.AdminSetting).filter(models.AdminSetting.key == "gitlab_api_token").update({"value": "two"})
+        mark_changed(db)
+        db.commit()
+        rebuilt = repository_service.get_gitlab_client(db)
+        assert rebuilt is not client
+        assert rebuilt.session.headers["PRIVATE-TOKEN"] == "two"
+    finally:
+        providers.close_clients()
+        settings_cache.clear()
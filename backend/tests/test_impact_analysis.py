@@ -0,0 +1,121 @@
+import sys
+import os
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import crud
+import entity_crud
+import models
+from database import Base
+from dependency_graph import dependency_graph_cache
+from impact_analysis import ImpactAnalyzer
+
+def _make_session():
+    """
+    Create an in-memory database with two areas, three tribes and five squads.
+
+    Squads 2 and 3 depend on squad 1, squad 4 depends on squad 3 and squad 5
+    is independent.
+    """
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([models.Area(id=1, name="Retail"), models.Area(id=2, name="Platform")])
+    db.add_all([
+        models.Tribe(id=1, name="Payments", area_id=1),
+        models.Tribe(id=2, name="Checkout", area_id=1),
+        models.Tribe(id=3, name="Infra", area_id=2),
+    ])
+    for squad_id, tribe_id, members, capacity in [(1, 3, 5, 4.5), (2, 1, 8, 7.25), (3, 1, 4, 4.0),
+                                                  (4, 2, 6, 5.5), (5, 2, 10, 10.0)]:
+        db.add(models.Squad(id=squad_id, name=f"Squad {squad_id}", tribe_id=tribe_id, member_count=members,
+                            core_count=members, subcon_count=0, total_capacity=capacity,
+                            core_capacity=capacity, subcon_capacity=0.0))
+    for dependency_id, (dependent, dependency) in enumerate([(2, 1), (3, 1), (4, 3)], start=1):
+        db.add(models.Dependency(id=dependency_id, dependent_squad_id=dependent, dependency_squad_id=dependency,
+                                 dependency_name=f"Dependency {dependency_id}"))
+    db.add(models.Service(id=1, name="Ledger", status="healthy", uptime=99.9, version="1.0", squad_id=1))
+    db.commit()
+    dependency_graph_cache.invalidate()
+    return db
+
+def test_squad_impact_aggregates_by_tribe_and_area():
+    """Test that dependents are found transitively and their rollups summed per tribe and area."""
+    db = _make_session()
+    impact = ImpactAnalyzer().squad_impact(db, 1)
+
+    assert [(s["squad_id"], s["depth"]) for s in impact["squads"]] == [(1, 0), (2, 1), (3, 1), (4, 2)]
+    assert impact["totals"]["squad_count"] == 4
+    assert impact["totals"]["member_count"] == 23
+    assert impact["totals"]["total_capacity"] == 21.25
+    assert [(t["tribe_id"], t["squad_count"], t["member_count"]) for t in impact["tribes"]] == [
+        (1, 2, 12), (2, 1, 6), (3, 1, 5)
+    ]
+    assert [(a["area_id"], a["squad_count"], a["total_capacity"]) for a in impact["areas"]] == [
+        (1, 3, 16.75), (2, 1, 4.5)
+    ]
+
+    limited = ImpactAnalyzer().squad_impact(db, 1, max_depth=1)
+    assert [s["squad_id"] for s in limited["squads"]] == [1, 2, 3]
+    assert ImpactAnalyzer().squad_impact(db, 99) is None
+
+def test_service_impact_uses_owning_squad():
+    """Test that a service's impact is the impact of the squad that owns it."""
+    db = _make_session()
+    impact = ImpactAnalyzer().service_impact(db, 1)
+
+    assert impact["service_name"] == "Ledger"
+    assert impact["squad_id"] == 1
+    assert impact["totals"]["squad_count"] == 4
+    assert ImpactAnalyzer().service_impact(db, 2) is None
+
+def test_results_cached_per_graph_version():
+    """Test that results are reused until a dependency change produces a new graph version."""
+    db = _make_session()
+    analyzer = ImpactAnalyzer()
+    first = analyzer.squad_impact(db, 3)
+    assert analyzer.squad_impact(db, 3) is first
+    assert first["totals"]["squad_count"] == 2
+
+    crud.delete_dependency(db, 3)
+    second = analyzer.squad_impact(db, 3)
+    assert second["graph_version"] > first["graph_version"]
+    assert second["totals"]["squad_count"] == 1
+
+def test_rollups_refreshed_by_tribe_and_squad_moves():
+    """Test that moving tribes and squads through entity_crud updates the tribe and area rollups."""
+    db = _make_session()
+    analyzer = ImpactAnalyzer()
+    analyzer.squad_impact(db, 3)
+
+    entity_crud.update_tribe_area(db, 2, 2, user_id=1)
+    impact = analyzer.squad_impact(db, 3)
+    assert sorted((a["area_id"], a["squad_count"]) for a in impact["areas"]) == [(1, 1), (2, 1)]
+
+    entity_crud.update_squad_tribe(db, 4, 1, user_id=1)
+    impact = analyzer.squad_impact(db, 3)
+    assert [(t["tribe_id"], t["squad_count"]) for t in impact["tribes"]] == [(1, 2)]
+    assert [(a["area_id"], a["squad_count"]) for a in impact["areas"]] == [(1, 2)]
+
+def test_squad_impact_without_tribes():
+    """Test that squads outside any tribe are counted in the totals but not grouped."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    for squad_id in (1, 2):
+        db.add(models.Squad(id=squad_id, name=f"Squad {squad_id}", tribe_id=None, member_count=3,
+                            core_count=3, subcon_count=0, total_capacity=3.0,
+                            core_capacity=3.0, subcon_capacity=0.0))
+    db.add(models.Dependency(id=1, dependent_squad_id=2, dependency_squad_id=1, dependency_name="Dependency 1"))
+    db.commit()
+    dependency_graph_cache.invalidate()
+
+    impact = ImpactAnalyzer().squad_impact(db, 1)
+    assert [s["squad_id"] for s in impact["squads"]] == [1, 2]
+    assert impact["totals"]["member_count"] == 6
+    assert impact["tribes"] == []
+    assert impact["areas"] == []
@@ -0,0 +1,20 @@
+import sys
+import os
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logger import LoggingPipeline
+
+def test_module_file_handler_shared_across_flags():
+    """Test that a module log file gets one handler whatever the console and rotation flags."""
+    pipeline = LoggingPipeline(asynchronous=False)
+
+    first = pipeline.module_handlers("test_logger", True, True, 10, 5)
+    second = pipeline.module_handlers("test_logger", False, False, 10, 5)
+    assert len(first) == 2 and len(second) == 1
+    assert first[0] is second[0]
+
+    other = pipeline.module_handlers("test_logger_other", True, True, 10, 5)
+    assert other[0] is not first[0]
+    assert other[1] is first[1]
@@ -0,0 +1,63 @@
+import sys
+import os
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from metrics import MetricsRegistry
+
+def test_counter_and_gauge_render():
+    """Test Prometheus text output for labelled counters and gauges."""
+    registry = MetricsRegistry()
+    requests_total = registry.counter("requests_total", "Requests handled", ["method"])
+    requests_total.labels(method="GET").inc()
+    requests_total.labels(method="GET").inc(2)
+    in_flight = registry.gauge("in_flight", "Requests in flight")
+    in_flight.inc()
+    in_flight.dec()
+    in_flight.set(3)
+
+    output = registry.render()
+    assert "# TYPE requests_total counter" in output
+    assert 'requests_total{method="GET"} 3' in output
+    assert "# TYPE in_flight gauge" in output
+    assert "in_flight 3" in output
+
+    with pytest.raises(ValueError):
+        requests_total.labels(method="GET").inc(-1)
+
+def test_histogram_buckets_and_quantiles():
+    """Test cumulative bucket output and interpolated quantiles."""
+    registry = MetricsRegistry()
+    duration = registry.histogram("duration_seconds", "Duration", ["operation"], buckets=[0.1, 1.0])
+    for value in (0.05, 0.05, 0.5, 2.0):
+        duration.labels(operation="load").observe(value)
+
+    output = registry.render()
+    assert 'duration_seconds_bucket{operation="load",le="0.1"} 2' in output
+    assert 'duration_seconds_bucket{operation="load",le="1"} 3' in output
+    assert 'duration_seconds_bucket{operation="load",le="+Inf"} 4' in output
+    assert 'duration_seconds_count{operation="load"} 4' in output
+
+    assert duration.quantile(0.5, operation="load") == pytest.approx(0.1)
+    assert duration.quantile(0.75, operation="load") == pytest.approx(1.0)
+    assert duration.quantile(0.99, operation="load") == 1.0
+
+def test_series_are_bounded():
+    """Test that label combinations beyond the limit are not kept."""
+    registry = MetricsRegistry()
+    counter = registry.counter("paths_total", "Paths", ["path"])
+    counter.max_series = 2
+    for index in range(5):
+        counter.labels(path=f"/items/{index}").inc()
+
+    assert len(counter.series()) == 2
+
+def test_registry_rejects_type_conflicts():
+    """Test that a name cannot be registered as two metric types."""
+    registry = MetricsRegistry()
+    assert registry.counter("events_total") is registry.counter("events_total")
+    with pytest.raises(ValueError):
+        registry.gauge("events_total")
@@ -0,0 +1,121 @@
+import sys
+import os
+from datetime import timedelta
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import auth
+import models
+import schemas
+import user_auth
+from auth import PrincipalCache
+from database import Base
+
+class _Clock:
+    """Stand-in for the time module with a manually advanced clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+def _user(user_id):
+    """Active user with the given id."""
+    return models.User(id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com",
+                       hashed_password="x", is_active=True)
+
+def _make_session():
+    """Create an in-memory database with one active user and a cached principal for their token."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(_user(1))
+    db.commit()
+    token = auth.create_access_token({"sub": "user1"}, expires_delta=timedelta(minutes=5))
+    auth.principal_cache.clear()
+    assert auth.get_current_user(token, db).id == 1
+    assert auth.principal_cache.get(token) is not None
+    return db, token
+
+def test_entries_expire_after_ttl(monkeypatch):
+    """Test that a cached principal is dropped once the TTL has passed."""
+    clock = _Clock()
+    monkeypatch.setattr(auth, "time", clock)
+    cache = PrincipalCache(ttl_seconds=30, max_size=10)
+    cache.set("token", _user(1))
+
+    clock.now += 29
+    assert cache.get("token").username == "user1"
+    clock.now += 1
+    assert cache.get("token") is None
+
+def test_entries_never_outlive_the_token(monkeypatch):
+    """Test that an entry expires with its token when the token expires before the TTL."""
+    clock = _Clock()
+    monkeypatch.setattr(auth, "time", clock)
+    cache = PrincipalCache(ttl_seconds=30, max_size=10)
+    cache.set("token", _user(1), token_expires_at=clock.now + 5)
+
+    clock.now += 4
+    assert cache.get("token") is not None
+    clock.now += 1
+    assert cache.get("token") is None
+
+def test_least_recently_used_entry_evicted():
+    """Test that the least recently used token is evicted once the cache is full."""
+    cache = PrincipalCache(ttl_seconds=30, max_size=2)
+    cache.set("first", _user(1))
+    cache.set("second", _user(2))
+    assert cache.get("first") is not None
+    cache.set("third", _user(3))
+
+    assert cache.get("second") is None
+    assert cache.get("first").id == 1
+    assert cache.get("third").id == 3
+
+def test_hits_return_fresh_users():
+    """Test that each hit returns a new object, so requests never share a cached principal."""
+    cache = PrincipalCache(ttl_seconds=30, max_size=10)
+    cache.set("token", _user(1))
+    assert cache.get("token") is not cache.get("token")
+
+def test_deactivation_takes_effect_at_once():
+    """Test that update_user drops the cached principal, so a deactivated user is rejected on the next request."""
+    db, token = _make_session()
+    user_auth.update_user(db, 1, schemas.UserUpdate(is_active=False))
+
+    assert auth.principal_cache.get(token) is None
+    with pytest.raises(HTTPException):
+        auth.get_current_active_user(auth.get_current_user(token, db))
+
+def test_password_reset_drops_cached_principal():
+    """Test that reset_password drops every cached principal of the user."""
+    db, token = _make_session()
+    reset_token = user_auth.create_password_reset_token(db, "user1@example.com", 1)
+    assert user_auth.reset_password(db, schemas.PasswordReset(token=reset_token, new_password="NewPassw0rd!"))
+
+    assert auth.principal_cache.get(token) is None
+
+def test_email_verification_drops_cached_principal():
+    """Test that verify_email drops the cached principal, so the activation is seen at once."""
+    db, token = _make_session()
+    db.query(models.User).filter(models.User.id == 1).update({"is_active": False})
+    db.commit()
+    auth.principal_cache.invalidate_user(1)
+    assert auth.get_current_user(token, db).is_active is False
+
+    verification_token = user_auth.create_verification_token(db, "user1@example.com", 1)
+    assert user_auth.verify_email(db, schemas.EmailVerification(email="user1@example.com", token=verification_token))
+
+    assert auth.principal_cache.get(token) is None
+    assert auth.get_current_active_user(auth.get_current_user(token, db)).id == 1
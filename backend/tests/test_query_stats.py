@@ -0,0 +1,50 @@
+import sys
+import os
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+
+import query_stats
+
+def test_track_queries_counts_statements():
+    """Test that statements inside track_queries are counted and timed."""
+    engine = create_engine("sqlite://")
+    query_stats.install_query_hooks(engine)
+    query_stats.install_query_hooks(engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with query_stats.track_queries() as stats:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        conn.execute(text("SELECT 3"))
+
+    assert stats.count == 2
+    assert stats.total_time >= stats.slowest_time > 0
+    assert stats.slowest_statement in ("SELECT 1", "SELECT 2")
+    assert query_stats.get_current_stats() is None
+
+def test_failed_statement_leaves_no_start_time():
+    """Test that a statement that raises is not counted and does not skew the next one."""
+    engine = create_engine("sqlite://")
+    query_stats.install_query_hooks(engine)
+
+    with engine.connect() as conn:
+        with query_stats.track_queries() as stats:
+            try:
+                conn.execute(text("SELECT * FROM missing_table"))
+            except Exception:
+                conn.rollback()
+            conn.execute(text("SELECT 1"))
+        assert not conn.info.get("query_start_times")
+
+    assert stats.count == 1
+    assert stats.slowest_statement == "SELECT 1"
+
+def test_server_timing_header():
+    """Test the Server-Timing header format."""
+    stats = query_stats.QueryStats()
+    stats.record("SELECT 1", 0.0125)
+    assert query_stats.server_timing_header(stats, 0.05) == 'db;dur=12.5;desc="1 queries", app;dur=50.0'
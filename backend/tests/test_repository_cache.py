@@ -0,0 +1,66 @@
+import sys
+import os
+import time
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository.cache import RepositoryCache
+
+class _Fetcher:
+    def __init__(self, *values):
+        self.values = list(values)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.values.pop(0)
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_stale_entries_are_served_while_refreshing():
+    """Test that a stale hit returns the old value and refreshes it in the background."""
+    cache = RepositoryCache(stale_seconds=60, max_entries=10)
+    fetch = _Fetcher(["old"], ["new"])
+    try:
+        assert cache.get_or_fetch("search:api", fetch, ttl=0.05) == ["old"]
+        assert cache.get_or_fetch("search:api", fetch, ttl=0.05) == ["old"]
+        assert fetch.calls == 1
+
+        time.sleep(0.06)
+        assert cache.get_or_fetch("search:api", fetch, ttl=0.05) == ["old"]
+        _wait_for(lambda: fetch.calls == 2)
+        assert cache.get_or_fetch("search:api", fetch, ttl=0.05) == ["new"]
+    finally:
+        cache.close()
+
+def test_expired_entries_and_errors_are_refetched():
+    """Test that entries past the stale window are fetched synchronously and None is never cached."""
+    cache = RepositoryCache(stale_seconds=0, max_entries=10, empty_ttl_seconds=0)
+    fetch = _Fetcher(None, {"id": 1}, [], ["project"])
+    try:
+        assert cache.get_or_fetch("project:1", fetch, ttl=60) is None
+        assert cache.get_or_fetch("project:1", fetch, ttl=60) == {"id": 1}
+        assert cache.get_or_fetch("project:1", fetch, ttl=60) == {"id": 1}
+        # Empty results get the short TTL (0 here), so they are refetched
+        assert cache.get_or_fetch("group:1", fetch, ttl=60) == []
+        assert cache.get_or_fetch("group:1", fetch, ttl=60) == ["project"]
+        assert fetch.calls == 4
+    finally:
+        cache.close()
+
+def test_disk_backing_survives_restart(tmp_path):
+    """Test that a new cache instance starts warm from the SQLite file."""
+    db_path = str(tmp_path / "repository_cache.db")
+    first = RepositoryCache(db_path=db_path)
+    first.get_or_fetch("search:api", lambda: [{"name": "api"}], ttl=60)
+    first.close()
+
+    second = RepositoryCache(db_path=db_path)
+    try:
+        assert second.get_or_fetch("search:api", _Fetcher(), ttl=60) == [{"name": "api"}]
+    finally:
+        second.close()
@@ -0,0 +1,74 @@
+import sys
+import os
+import time
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository import providers
+from repository.providers import CircuitBreaker, LocalGitProvider, RepositoryProvider, search_providers
+
+class _StubProvider(RepositoryProvider):
+    def __init__(self, name, names, delay=0.0, error=None, timeout_seconds=1.0):
+        self.name = name
+        self.names = names
+        self.delay = delay
+        self.error = error
+        self.timeout_seconds = timeout_seconds
+        self.calls = 0
+
+    def search(self, search_term, limit):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return [{"name": name, "path": f"{self.name}/{name}", "source": self.name} for name in self.names]
+
+def test_fan_out_merges_and_isolates_slow_and_failing_providers():
+    """Test that results merge in stable order while slow and failing providers are cut off."""
+    fast = _StubProvider("stub-fast", ["beta", "alpha"])
+    other = _StubProvider("stub-other", ["alpha"])
+    slow = _StubProvider("stub-slow", ["gamma"], delay=0.5, timeout_seconds=0.1)
+    broken = _StubProvider("stub-broken", ["delta"], error=RuntimeError("boom"))
+    providers._breakers["stub-broken"] = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+
+    started = time.perf_counter()
+    results = search_providers([fast, other, slow, broken], lambda provider: provider.search("a", 10))
+    assert time.perf_counter() - started < 0.4
+    assert [(result["name"], result["source"]) for result in results] == [
+        ("alpha", "stub-fast"), ("alpha", "stub-other"), ("beta", "stub-fast")
+    ]
+
+    # Second failure opens the breaker; the third search skips the broken provider
+    search_providers([broken], lambda provider: provider.search("a", 10))
+    assert providers.get_breaker("stub-broken").state == "open"
+    search_providers([broken], lambda provider: provider.search("a", 10))
+    assert broken.calls == 2
+
+def test_breaker_half_open_trial():
+    """Test that an open breaker lets one trial call through after the reset period."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    assert not breaker.allow_request()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # only one trial at a time
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow_request()
+
+def test_local_git_provider(tmp_path):
+    """Test that bare repositories and working copies below the root are found."""
+    bare = tmp_path / "platform" / "payments.git"
+    for directory in ("objects", "refs"):
+        (bare / directory).mkdir(parents=True)
+    (bare / "HEAD").write_text("ref: refs/heads/main\n")
+    (bare / "description").write_text("Payments API\n")
+    (tmp_path / "web-app" / ".git").mkdir(parents=True)
+
+    provider = LocalGitProvider(str(tmp_path))
+    results = provider.search("pay", 10)
+    assert [(result["name"], result["path"], result["description"]) for result in results] == [
+        ("payments", "platform/payments.git", "Payments API")
+    ]
+    assert [result["name"] for result in provider.search("web", 10)] == ["web-app"]
+    assert provider.get_repository_details(results[0]["id"])["type"] == "repo"
@@ -0,0 +1,107 @@
+import sys
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import Base
+from repository import index, sync
+from repository.gitlab_client import GitLabClient
+from repository.repository_service import RepositoryService
+
+class _FakeGitLab(BaseHTTPRequestHandler):
+    """Stub GitLab with one group ("platform") whose projects are set by the test."""
+    protocol_version = "HTTP/1.1"
+    projects = []
+    project_queries = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/api/v4/groups/platform":
+            body = {"id": 10, "name": "Platform", "full_path": "platform"}
+        elif url.path == "/api/v4/groups/platform/projects":
+            query = parse_qs(url.query)
+            _FakeGitLab.project_queries.append(query)
+            after = query.get("last_activity_after", [""])[0]
+            body = [project for project in _FakeGitLab.projects if project["last_activity_at"] > after]
+        else:
+            body = []
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def _project(project_id, name, last_activity_at):
+    return {"id": project_id, "name": name, "path_with_namespace": f"platform/{name}",
+            "web_url": f"https://gitlab.example.com/platform/{name}", "last_activity_at": last_activity_at}
+
+def test_sync_search_and_link(tmp_path):
+    """Test full and incremental syncs, local full-text search, pruning and service links."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'repositories.db'}")
+    Base.metadata.create_all(bind=engine)
+    assert index.ensure_search_index(engine)
+    db = sessionmaker(bind=engine)()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeGitLab)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = GitLabClient(f"http://127.0.0.1:{server.server_address[1]}", "secret")
+    _FakeGitLab.projects = [
+        _project(1, "payments-api", "2024-06-01T10:00:00.000Z"),
+        _project(2, "payments-web", "2024-05-01T10:00:00.000Z"),
+        _project(3, "identity", "2024-04-01T10:00:00.000Z"),
+    ]
+    _FakeGitLab.project_queries = []
+    try:
+        stats = sync.sync_repositories(db, client, ["platform"], full=True)
+        assert stats["repositories"] == 3 and stats["groups"] == 1 and not stats["failed_groups"]
+
+        names = [row.name for row in index.search(db, "pay")]
+        assert names == ["payments-api", "payments-web"]
+        assert [row.name for row in index.search(db, "platform api")] == ["payments-api"]
+        assert [row.kind for row in index.search(db, "platform")].count("group") == 1
+
+        # Incremental: only activity since the newest indexed project (minus overlap) is requested
+        _FakeGitLab.projects.append(_project(4, "ledger", "2024-06-02T10:00:00.000Z"))
+        stats = sync.sync_repositories(db, client, ["platform"])
+        assert _FakeGitLab.project_queries[-1]["last_activity_after"] == ["2024-06-01T09:00:00Z"]
+        assert stats["repositories"] == 2
+        assert [row.name for row in index.search(db, "ledger")] == ["ledger"]
+
+        # Full sync prunes projects that no longer exist
+        _FakeGitLab.projects = [project for project in _FakeGitLab.projects if project["id"] != 3]
+        stats = sync.sync_repositories(db, client, ["platform"], full=True)
+        assert stats["pruned"] == 1
+        assert index.search(db, "identity") == []
+
+        service = models.Service(name="Payments API repo", service_type="repo", squad_id=None)
+        api = models.Service(name="Payments API", service_type="api", squad_id=None)
+        db.add_all([service, api])
+        db.commit()
+        repo_service = RepositoryService(db)
+        assert repo_service.link_service(1, "gitlab", service.id)["service_id"] == service.id
+        assert [repo["name"] for repo in repo_service.get_service_repositories(service.id)] == ["payments-api"]
+        try:
+            repo_service.link_service(1, "gitlab", api.id)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+        # Searches are answered from the local index
+        assert [repo["name"] for repo in repo_service.search_repositories("payments")] == ["payments-api", "payments-web"]
+    finally:
+        client.close()
+        server.shutdown()
+        db.close()
@@ -0,0 +1,29 @@
+import sys
+import os
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import request_metrics
+
+def test_requests_are_recorded_per_route_template():
+    """Test that metrics are labelled with the templated path, not the raw path."""
+    app = FastAPI()
+    app.add_middleware(request_metrics.RequestMetricsMiddleware)
+
+    @app.get("/probe-items/{item_id}")
+    def read_item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    for item_id in range(3):
+        assert client.get(f"/probe-items/{item_id}").status_code == 200
+
+    routes = {route["route"]: route for route in request_metrics.slowest_routes(limit=100, sort_by="count")}
+    assert routes["/probe-items/{item_id}"]["count"] == 3
+    assert routes["/probe-items/{item_id}"]["error_count"] == 0
+    assert "/probe-items/0" not in routes
+    assert request_metrics.REQUESTS_IN_FLIGHT.labels().get() == 0
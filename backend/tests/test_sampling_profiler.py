@@ -0,0 +1,51 @@
+import sys
+import os
+import threading
+import time
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sampling_profiler
+
+def _spin(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+def test_profile_captures_busy_thread():
+    """Test that a busy thread shows up in both output formats."""
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,), name="spin-worker")
+    worker.start()
+    try:
+        profile = sampling_profiler.collect_profile(seconds=0.3, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert profile.sample_count > 10
+    assert "spin-worker" in profile.stacks
+
+    collapsed = profile.to_collapsed()
+    assert any(line.startswith("spin-worker;") and "_spin (test_sampling_profiler.py" in line
+               for line in collapsed.splitlines())
+
+    speedscope = profile.to_speedscope()
+    spin_profile = next(item for item in speedscope["profiles"] if item["name"] == "spin-worker")
+    assert len(spin_profile["samples"]) == len(spin_profile["weights"])
+    assert all(index < len(speedscope["shared"]["frames"]) for sample in spin_profile["samples"] for index in sample)
+
+def test_only_one_profile_at_a_time():
+    """Test that a concurrent profile request is rejected."""
+    runner = threading.Thread(target=sampling_profiler.collect_profile, args=(0.3,))
+    runner.start()
+    time.sleep(0.05)
+    try:
+        assert sampling_profiler.is_running()
+        try:
+            sampling_profiler.collect_profile(0.1)
+            assert False, "expected ProfilerBusyError"
+        except sampling_profiler.ProfilerBusyError:
+            pass
+    finally:
+        runner.join()
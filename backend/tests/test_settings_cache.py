@@ -0,0 +1,100 @@
+import sys
+import os
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+import settings_cache as settings_cache_module
+import schemas
+import user_crud
+from database import Base
+from settings_cache import SettingsCache, ensure_version_row, mark_changed, settings_cache
+
+def _make_session():
+    """Create an in-memory database with one admin setting."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(models.AdminSetting(key="allowed_email_domains", value="example.com,\n test.org "))
+    db.add(models.AdminSetting(key="page_size", value="25"))
+    db.commit()
+    return db
+
+def test_typed_accessors():
+    """Test that values are parsed and missing or invalid ones fall back to defaults."""
+    db = _make_session()
+    cache = SettingsCache(check_seconds=60)
+
+    assert cache.get_list(db, "allowed_email_domains") == ["example.com", "test.org"]
+    assert cache.get_int(db, "page_size") == 25
+    assert cache.get_int(db, "allowed_email_domains", default=10) == 10
+    assert cache.get_bool(db, "missing", default=True) is True
+    assert cache.get_str(db, "missing", "fallback") == "fallback"
+
+def test_reads_are_cached_until_version_changes():
+    """Test that a version bump from another writer reloads the cache and notifies subscribers."""
+    db = _make_session()
+    cache = SettingsCache(check_seconds=0)
+    changes = []
+    cache.subscribe(changes.append)
+    assert cache.get(db, "page_size") == "25"
+
+    # A write that does not bump the version stays invisible
+    db.query(models.AdminSetting).filter(models.AdminSetting.key == "page_size").update({"value": "50"})
+    db.commit()
+    assert cache.get(db, "page_size") == "25"
+
+    mark_changed(db)
+    db.commit()
+    assert cache.get(db, "page_size") == "50"
+    assert changes == [{"page_size"}]
+
+def test_update_admin_setting_refreshes_shared_cache():
+    """Test that updating a setting through user_crud is visible immediately."""
+    db = _make_session()
+    settings_cache.clear()
+    try:
+        assert user_crud.get_admin_setting_value(db, "gitlab_api_url") is None
+        user_crud.update_admin_setting(db, schemas.AdminSettingUpdate(value="https://gitlab.example.com"),
+                                       "gitlab_api_url", user_id=None)
+        assert user_crud.get_admin_setting_value(db, "gitlab_api_url") == "https://gitlab.example.com"
+    finally:
+        settings_cache.clear()
+
+def test_version_row_seeded():
+    """Test that the version row exists from table creation and is recreated at startup if missing."""
+    db = _make_session()
+    assert db.query(models.SettingsVersion).one().version == 0
+    mark_changed(db)
+    db.commit()
+    assert db.query(models.SettingsVersion).one().version == 1
+
+    db.query(models.SettingsVersion).delete()
+    db.commit()
+    ensure_version_row(db.get_bind())
+    ensure_version_row(db.get_bind())
+    assert db.query(models.SettingsVersion).one().version == 0
+
+def test_invalidate_during_reload_is_not_lost(monkeypatch):
+    """Test that a write committed while a reload was in flight is picked up on the next read."""
+    db = _make_session()
+    cache = SettingsCache(check_seconds=60)
+    read_version = settings_cache_module._read_version
+
+    def read_then_invalidate(session):
+        version = read_version(session)
+        cache.invalidate()  # a local write commits after the reload read the old version
+        return version
+
+    monkeypatch.setattr(settings_cache_module, "_read_version", read_then_invalidate)
+    assert cache.get(db, "page_size") == "25"
+    monkeypatch.setattr(settings_cache_module, "_read_version", read_version)
+
+    db.query(models.AdminSetting).filter(models.AdminSetting.key == "page_size").update({"value": "50"})
+    mark_changed(db)
+    db.commit()
+    assert cache.get(db, "page_size") == "50"
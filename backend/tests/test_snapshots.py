@@ -0,0 +1,56 @@
+import sys
+import os
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+pytest.importorskip("pyarrow")
+
+import models
+import snapshots
+from database import Base
+
+def _make_session():
+    """Create an empty in-memory database"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_snapshot_round_trip(fmt):
+    """Test that exported datasets import into another database unchanged"""
+    source = _make_session()
+    source.add(models.Area(id=1, name="Area 1", member_count=2, total_capacity=1.5))
+    source.add(models.Tribe(id=1, name="Tribe 1", area_id=1))
+    source.add(models.TeamMember(id=7, name="Ann", email="ann@example.com", is_vacancy=False))
+    source.commit()
+
+    target = _make_session()
+    for dataset in ["areas", "tribes", "members"]:
+        content = snapshots.export_dataset(source, dataset, fmt)
+        snapshots.import_dataset(target, dataset, io.BytesIO(content), fmt)
+
+    area = target.query(models.Area).one()
+    assert (area.id, area.name, area.member_count, area.total_capacity) == (1, "Area 1", 2, 1.5)
+    assert target.query(models.Tribe).one().area_id == 1
+    member = target.query(models.TeamMember).one()
+    assert (member.id, member.email, member.is_vacancy) == (7, "ann@example.com", False)
+
+def test_snapshot_import_replace():
+    """Test that replace=True removes existing rows before importing"""
+    source = _make_session()
+    source.add(models.Area(id=1, name="Area 1"))
+    source.commit()
+    content = snapshots.export_dataset(source, "areas", "parquet")
+
+    target = _make_session()
+    target.add(models.Area(id=5, name="Old area"))
+    target.commit()
+
+    assert snapshots.import_dataset(target, "areas", io.BytesIO(content), "parquet", replace=True) == 1
+    assert [area.name for area in target.query(models.Area).all()] == ["Area 1"]
@@ -0,0 +1,49 @@
+import sys
+import os
+
+# Add the parent directory to the path so we can import the backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+from database import Base
+from upload_hashing import drop_skipped_rows, filter_changed_rows, record_upload
+
+COLUMNS = ['Service Name', 'Squad Name', 'Version']
+
+def _make_session():
+    """Create an empty in-memory database"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+def _upload(db, rows, skipped_rows=None):
+    """Filter a services upload, record it and return the service names that were applied."""
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    changed, row_hashes = filter_changed_rows(db, "services", df, COLUMNS)
+    record_upload(db, "services", "Services", f"file-{len(rows)}", drop_skipped_rows(row_hashes, skipped_rows), len(df))
+    return changed['Service Name'].tolist()
+
+def test_unchanged_rows_are_skipped():
+    """Test that only new or changed rows are passed on after the first import."""
+    db = _make_session()
+    assert _upload(db, [["Ledger", "Payments", "1.0"], ["Search", "Discovery", "2.0"]]) == ["Ledger", "Search"]
+    assert _upload(db, [["Ledger", "Payments", "1.1"], ["Search", "Discovery", "2.0"]]) == ["Ledger"]
+
+def test_row_changed_back_is_applied_again():
+    """Test that a row reverted to an earlier value is not mistaken for the current one."""
+    db = _make_session()
+    _upload(db, [["Ledger", "Payments", "1.0"]])
+    _upload(db, [["Ledger", "Payments", "1.1"]])
+    assert _upload(db, [["Ledger", "Payments", "1.0"]]) == ["Ledger"]
+    assert db.query(models.UploadRowHash).count() == 1
+
+def test_skipped_rows_are_retried():
+    """Test that rows a loader skipped are not recorded and come back on the next upload."""
+    db = _make_session()
+    rows = [["Ledger", "Payments", "1.0"], ["Search", "Unknown", "2.0"]]
+    _upload(db, rows, skipped_rows=[1])
+    assert _upload(db, rows) == ["Search"]
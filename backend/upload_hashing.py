@@ -0,0 +1,167 @@
+"""
+Content hashing for admin data uploads.
+
+Uploaded files are hashed while they are copied to disk, and every row is
+hashed after normalization. Both are stored per data_type once the upload has
+been applied, so that:
+
+- re-uploading a byte-identical file short-circuits without parsing it, and
+- for a changed file only rows that differ from the last import are passed
+  to the loaders.
+
+The stored row hashes are replaced on every import rather than accumulated,
+so a row that changes and later changes back is applied again.
+
+Row hashes only cover the columns the loader reads, so edits to unrelated
+spreadsheet columns do not count as changes.
+"""
+
+import hashlib
+import json
+from typing import BinaryIO, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+import models
+from logger import get_logger
+
+# Initialize logger
+logger = get_logger('upload_hashing', log_level='INFO')
+
+# Read uploads in 1 MiB chunks while hashing
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Maximum number of hashes per IN (...) lookup
+_LOOKUP_BATCH_SIZE = 500
+
+def copy_and_hash(source: BinaryIO, destination: BinaryIO) -> str:
+    """Copy a file object to another while computing its SHA-256 digest"""
+    digest = hashlib.sha256()
+    while True:
+        chunk = source.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        destination.write(chunk)
+    return digest.hexdigest()
+
+def _normalize_value(value):
+    """Normalize a cell so equivalent values hash the same"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if hasattr(value, "item"):
+        # numpy scalars
+        return _normalize_value(value.item())
+    return value
+
+def hash_rows(df: pd.DataFrame, columns: List[str]) -> List[str]:
+    """
+    Hash each row of a DataFrame over the given columns.
+
+    Missing columns hash as empty values. The column names are part of the
+    hash, so a change in the template layout invalidates old hashes.
+    """
+    present = [col for col in columns if col in df.columns]
+    frame = df.reindex(columns=present)
+    hashes = []
+    for values in frame.itertuples(index=False, name=None):
+        payload = json.dumps(
+            [present, [_normalize_value(value) for value in values]],
+            default=str,
+            separators=(",", ":")
+        )
+        hashes.append(hashlib.sha256(payload.encode("utf-8")).hexdigest())
+    return hashes
+
+def is_unchanged_file(db: Session, data_type: str, sheet_name: Optional[str], file_hash: str) -> bool:
+    """Check whether this exact file was the last one imported for the data type and sheet"""
+    stored = db.query(models.UploadFileHash).filter(
+        models.UploadFileHash.data_type == data_type,
+        models.UploadFileHash.sheet_name == sheet_name
+    ).first()
+    return stored is not None and stored.file_hash == file_hash
+
+def _known_row_hashes(db: Session, data_type: str, row_hashes: Iterable[str]) -> set:
+    """Return the subset of row_hashes already stored for the data type"""
+    candidates = list(set(row_hashes))
+    known = set()
+    for start in range(0, len(candidates), _LOOKUP_BATCH_SIZE):
+        batch = candidates[start:start + _LOOKUP_BATCH_SIZE]
+        rows = db.query(models.UploadRowHash.row_hash).filter(
+            models.UploadRowHash.data_type == data_type,
+            models.UploadRowHash.row_hash.in_(batch)
+        ).all()
+        known.update(row.row_hash for row in rows)
+    return known
+
+def filter_changed_rows(db: Session, data_type: str, df: pd.DataFrame, columns: List[str],
+                        force: bool = False) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Drop the rows that were already applied by the last import of this data type.
+
+    With force=True every row is kept.
+
+    Returns:
+        tuple: (DataFrame of new or changed rows, hashes of all rows indexed like df)
+    """
+    row_hashes = pd.Series(hash_rows(df, columns), index=df.index, dtype=object)
+    if force:
+        return df, row_hashes
+    known = _known_row_hashes(db, data_type, row_hashes)
+    mask = ~row_hashes.isin(known)
+
+    logger.info(f"{data_type} upload: {int(mask.sum())} of {len(row_hashes)} rows are new or changed")
+    return df[mask], row_hashes
+
+def drop_skipped_rows(row_hashes: pd.Series, skipped_rows: Optional[Iterable] = None) -> pd.Series:
+    """
+    Remove the hashes of rows a loader skipped (e.g. unknown squad names).
+
+    Skipped rows are not recorded, so they are retried on the next upload
+    once whatever they were waiting for exists.
+    """
+    if not skipped_rows:
+        return row_hashes
+    return row_hashes[~row_hashes.index.isin(list(skipped_rows))]
+
+def record_upload(db: Session, data_type: str, sheet_name: Optional[str], file_hash: Optional[str],
+                  row_hashes: Iterable[str], row_count: int, user_id: Optional[int] = None):
+    """Store the file hash and replace the data type's row hashes with those of this import"""
+    stored = db.query(models.UploadFileHash).filter(
+        models.UploadFileHash.data_type == data_type,
+        models.UploadFileHash.sheet_name == sheet_name
+    ).first()
+    if stored is None:
+        stored = models.UploadFileHash(data_type=data_type, sheet_name=sheet_name)
+        db.add(stored)
+    stored.file_hash = file_hash
+    stored.row_count = row_count
+    stored.uploaded_by = user_id
+
+    db.query(models.UploadRowHash).filter(
+        models.UploadRowHash.data_type == data_type
+    ).delete(synchronize_session=False)
+    new_hashes = set(row_hashes)
+    if new_hashes:
+        db.execute(
+            insert(models.UploadRowHash),
+            [{"data_type": data_type, "row_hash": row_hash} for row_hash in new_hashes]
+        )
+    db.commit()
+
+def clear_upload_hashes(db: Session, data_type: Optional[str] = None):
+    """Forget stored hashes so the next upload is applied in full"""
+    file_query = db.query(models.UploadFileHash)
+    row_query = db.query(models.UploadRowHash)
+    if data_type:
+        file_query = file_query.filter(models.UploadFileHash.data_type == data_type)
+        row_query = row_query.filter(models.UploadRowHash.data_type == data_type)
+    file_query.delete(synchronize_session=False)
+    row_query.delete(synchronize_session=False)
+    db.commit()
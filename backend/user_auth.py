@@ -7,7 +7,10 @@ from fastapi import HTTPException
 import re
 import models
 import schemas
-from auth import get_password_hash
+from auth import hash_password_pooled, principal_cache
+from audit_writer import audit_writer
+import audit_storage
+from settings_cache import settings_cache, mark_changed
 from logger import get_logger, log_and_handle_exception
 
 # Initialize logger
@@ -45,19 +48,8 @@ def get_team_member_by_email(db: Session, email: str) -> Optional[models.TeamMem
 
 def get_allowed_email_domains(db: Session) -> List[str]:
     """Get list of allowed email domains from admin settings"""
-    setting = db.query(models.AdminSetting).filter(models.AdminSetting.key == "allowed_email_domains").first()
-    if not setting or not setting.value:
-        return ["example.com"]  # Default if not configured
-
-    # Split by newlines and commas, then strip whitespace
-    domains = []
-    for line in setting.value.splitlines():
-        for domain in line.split(','):
-            domain = domain.strip()
-            if domain:  # Only add non-empty domains
-                domains.append(domain)
-
-    return domains
+    # Split by newlines and commas; default if not configured
+    return settings_cache.get_list(db, "allowed_email_domains", default=["example.com"])
 
 def is_email_allowed(email: str, db: Session) -> bool:
     """Check if email domain is in allowed domains list"""
@@ -153,7 +145,7 @@ def register_user(db: Session, user_data: schemas.UserRegister) -> models.User:
             raise HTTPException(status_code=400, detail="Email already registered")
 
         # Create the user with inactive status and use email as username
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = hash_password_pooled(user_data.password)
         db_user = models.User(
             email=user_data.email,
             username=user_data.email,  # Set username equal to email
@@ -261,6 +253,7 @@ def verify_email(db: Session, verification: schemas.EmailVerification) -> bool:
             # Record verification timestamp
             db_user.verified_at = datetime.utcnow()
             db.commit()
+            principal_cache.invalidate_user(db_user.id)
             logger.info(f"User activated successfully: {db_user.email} (ID: {db_user.id})")
         except Exception as e:
             db.rollback()
@@ -355,9 +348,10 @@ def reset_password(db: Session, reset: schemas.PasswordReset) -> bool:
         # Update the password
         try:
             old_hash = db_user.hashed_password  # Save for logging purposes
-            db_user.hashed_password = get_password_hash(reset.new_password)
+            db_user.hashed_password = hash_password_pooled(reset.new_password)
             db_user.password_changed_at = datetime.utcnow()
             db.commit()
+            principal_cache.invalidate_user(db_user.id)
             logger.info(f"Password updated successfully for user: {db_user.email} (ID: {db_user.id})")
         except Exception as e:
             db.rollback()
@@ -464,11 +458,14 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate) -> O
         db_user.is_active = user_update.is_active
 
     if user_update.password:
-        db_user.hashed_password = get_password_hash(user_update.password)
+        db_user.hashed_password = hash_password_pooled(user_update.password)
 
     db.commit()
     db.refresh(db_user)
 
+    # Role, active flag and identity may have changed - drop cached principals
+    principal_cache.invalidate_user(user_id)
+
     # Log the update
     log_user_action(db, user_id, "UPDATE", "User", user_id, "User profile updated")
 
@@ -519,25 +516,32 @@ def log_user_action(db: Session,
                     entity_type: str,
                     entity_id: Optional[int],
                     details: str):
-    """Create an audit log entry for user actions"""
-    log_entry = models.AuditLog(
-        user_id=user_id,
-        action=action,
-        entity_type=entity_type,
-        entity_id=entity_id,
-        details=details
-    )
-    db.add(log_entry)
-    db.commit()
+    """
+    Create an audit log entry for user actions
+
+    The entry is handed to the background audit writer when it is running,
+    so the caller's request does not pay for an extra commit. Otherwise it is
+    written synchronously.
+    """
+    entry = {
+        "user_id": user_id,
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "details": details
+    }
+    if not audit_writer.enqueue(entry):
+        db.add(models.AuditLog(**entry))
+        db.commit()
 
     # Log to application logs as well
     user_info = f"User ID: {user_id}" if user_id else "Anonymous"
     entity_info = f"{entity_type} ID: {entity_id}" if entity_id else entity_type
     logger.info(f"Audit: {action} - {user_info} - {entity_info} - {details}")
 
-def get_audit_logs(db: Session, skip: int = 0, limit: int = 100) -> List[models.AuditLog]:
-    """Get audit logs with pagination"""
-    return db.query(models.AuditLog).order_by(models.AuditLog.created_at.desc()).offset(skip).limit(limit).all()
+def get_audit_logs(db: Session, skip: int = 0, limit: int = 100, **filters) -> List[models.AuditLog]:
+    """Get audit logs with pagination, newest first (see audit_storage.query_audit_logs for filters)"""
+    return audit_storage.query_audit_logs(db, skip=skip, limit=limit, **filters)
 
 def is_admin(user: schemas.User) -> bool:
     """Check if user is an admin"""
@@ -569,6 +573,7 @@ def update_admin_setting(db: Session, setting: schemas.AdminSettingUpdate, key:
         old_value = None
         db.add(db_setting)
 
+    mark_changed(db)
     db.commit()
     db.refresh(db_setting)
 
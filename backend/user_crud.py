@@ -5,6 +5,8 @@ from typing import List, Optional
 import models
 import schemas
 import auth
+import audit_storage
+from settings_cache import settings_cache, mark_changed
 
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
@@ -19,7 +21,7 @@ def get_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.User).offset(skip).limit(limit).all()
 
 def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = auth.get_password_hash(user.password)
+    hashed_password = auth.hash_password_pooled(user.password)
     db_user = models.User(
         username=user.username,
         email=user.email,
@@ -152,8 +154,7 @@ def get_admin_setting(db: Session, key: str):
 
 def get_admin_setting_value(db: Session, key: str, default_value: str = None):
     """Get the value of an admin setting, or return default if not found"""
-    setting = get_admin_setting(db, key)
-    return setting.value if setting else default_value
+    return settings_cache.get(db, key, default_value)
 
 def update_admin_setting(db: Session, setting: schemas.AdminSettingUpdate, key: str, user_id: int):
     """Update an admin setting or create it if it doesn't exist"""
@@ -171,6 +172,7 @@ def update_admin_setting(db: Session, setting: schemas.AdminSettingUpdate, key:
         )
         db.add(db_setting)
 
+    mark_changed(db)
     db.commit()
     db.refresh(db_setting)
 
@@ -180,6 +182,6 @@ def update_admin_setting(db: Session, setting: schemas.AdminSettingUpdate, key:
 
     return db_setting
 
-def get_audit_logs(db: Session, skip: int = 0, limit: int = 100):
+def get_audit_logs(db: Session, skip: int = 0, limit: int = 100, **filters):
     """Get audit logs ordered by most recent first"""
-    return db.query(models.AuditLog).order_by(models.AuditLog.created_at.desc()).offset(skip).limit(limit).all()
+    return audit_storage.query_audit_logs(db, skip=skip, limit=limit, **filters)
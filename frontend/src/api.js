@@ -281,7 +281,7 @@ const api = {
     return response.json();
   },
   
-  uploadData: async (file, dataType, sheetName = null, dryRun = false) => {
+  uploadData: async (file, dataType, sheetName = null, dryRun = false, force = false) => {
     const formData = new FormData();
     formData.append('file', file);
     formData.append('data_type', dataType);
@@ -289,6 +289,7 @@ const api = {
       formData.append('sheet_name', sheetName);
     }
     formData.append('dry_run', dryRun);
+    formData.append('force', force);
     
     const response = await fetch(`${API_URL}/admin/upload-data`, {
       method: 'POST',
@@ -587,6 +588,15 @@ const api = {
     const response = await fetch(`${API_URL}/dependencies`);
     return response.json();
   },
+
+  // Precomputed dependency map layout; level is 'squad', 'tribe' or 'area'
+  getDependencyLayout: async (level = 'squad') => {
+    const response = await fetch(`${API_URL}/dependency-graph/layout?level=${level}`);
+    if (!response.ok) {
+      throw new Error('Failed to load dependency layout');
+    }
+    return response.json();
+  },
   
   createDependency: async (dependencyData) => {
     const { dependent_squad_id, dependency_squad_id, ...dependencyDetails } = dependencyData;
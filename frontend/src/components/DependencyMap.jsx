@@ -3,10 +3,29 @@ import { useTheme } from '../context/ThemeContext';
 import api from '../api';
 import * as d3 from 'd3';
 
+// Colour and dash pattern per interaction mode
+const INTERACTION_COLOURS = {
+  collaboration: '#9C5FFF', // Purple
+  facilitating: '#48BB78', // Green
+  x_as_a_service: '#3182CE' // Blue
+};
+
+const INTERACTION_DASHES = {
+  collaboration: '3,3',
+  facilitating: '6,3',
+  x_as_a_service: null // Solid line
+};
+
+// Detail page of a node at each level of detail
+const DETAIL_PATHS = {
+  squad: 'squads',
+  tribe: 'tribes',
+  area: 'areas'
+};
+
 const DependencyMap = () => {
   const { darkMode } = useTheme();
-  const [dependencies, setDependencies] = useState([]);
-  const [squads, setSquads] = useState([]);
+  const [layout, setLayout] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const svgRef = useRef(null);
@@ -14,177 +33,155 @@ const DependencyMap = () => {
   const [tooltipContent, setTooltipContent] = useState({ x: 0, y: 0, content: '', visible: false });
   
   // Filter options
-  // Removed selectedDependencyType state
+  const [level, setLevel] = useState('squad');
   const [selectedInteractionMode, setSelectedInteractionMode] = useState('all');
   const [searchTerm, setSearchTerm] = useState('');
   
+  // Positions are computed on the server, clustered by tribe and area
   useEffect(() => {
     const fetchData = async () => {
+      setLoading(true);
       try {
-        const [deps, allSquads] = await Promise.all([
-          api.getAllDependencies(),
-          api.getSquads()
-        ]);
-        
-        setDependencies(deps);
-        setSquads(allSquads);
+        const data = await api.getDependencyLayout(level);
+        setLayout(data);
+        setError(null);
         setLoading(false);
       } catch (err) {
-        console.error('Error fetching dependency data:', err);
+        console.error('Error fetching dependency layout:', err);
         setError('Failed to load dependency data');
         setLoading(false);
       }
     };
     
     fetchData();
-  }, []);
+  }, [level]);
   
   // Create the visualisation whenever data changes
   useEffect(() => {
-    if (loading || squads.length === 0 || dependencies.length === 0) return;
+    if (loading || !layout || layout.nodes.id.length === 0) return;
+    
+    // Turn the columnar payload into node and link objects
+    const { nodes: columns, edges, interaction_modes: interactionModes } = layout;
+    const allNodes = columns.id.map((id, i) => ({
+      id,
+      name: columns.name[i] || '',
+      x: columns.x[i],
+      y: columns.y[i],
+      radius: columns.radius[i],
+      group: layout.level === 'area' ? columns.area_id[i] : columns.tribe_id[i], // Colour by tribe (or area)
+      size: columns.size[i],
+      internal: columns.internal[i],
+      incoming: 0,
+      outgoing: 0
+    }));
+    
+    const allLinks = edges.source.map((source, i) => ({
+      source: allNodes[source],
+      target: allNodes[edges.target[i]],
+      weight: edges.weight[i],
+      interaction: edges.interaction_mode ? interactionModes[edges.interaction_mode[i]] : null
+    }));
     
-    // Filter dependencies based on selected interaction mode
-    const filteredDependencies = dependencies.filter(dep => {
-      // Filter by interaction mode
-      if (selectedInteractionMode !== 'all' && dep.interaction_mode !== selectedInteractionMode) {
+    // Filter dependencies based on selected interaction mode (individual dependencies only)
+    const filteredLinks = allLinks.filter(link => {
+      if (link.interaction && selectedInteractionMode !== 'all' && link.interaction !== selectedInteractionMode) {
         return false;
       }
-      
       return true;
     });
     
-    // Filter squads based on search term
-    const filteredSquads = squads.filter(squad => {
-      if (!searchTerm) return true;
-      return squad.name.toLowerCase().includes(searchTerm.toLowerCase());
-    });
-    
-    // Find all squad IDs involved in dependencies
-    const squadIdsInDependencies = new Set();
-    filteredDependencies.forEach(dep => {
-      squadIdsInDependencies.add(dep.dependent_squad_id);
-      squadIdsInDependencies.add(dep.dependency_squad_id);
+    // If searching, only include nodes matching the search
+    const matchesSearch = node => !searchTerm || node.name.toLowerCase().includes(searchTerm.toLowerCase());
+    const nodes = allNodes.filter(matchesSearch);
+    const links = filteredLinks.filter(link => matchesSearch(link.source) && matchesSearch(link.target));
+    links.forEach(link => {
+      link.source.outgoing += link.weight;
+      link.target.incoming += link.weight;
     });
     
-    // If searching, only include squads matching the search
-    // Otherwise, include all squads involved in dependencies
-    const relevantSquads = searchTerm
-      ? filteredSquads
-      : squads.filter(squad => squadIdsInDependencies.has(squad.id));
-    
-    // Create nodes for each squad
-    const nodes = relevantSquads.map(squad => ({
-      id: squad.id,
-      name: squad.name,
-      group: squad.tribe_id // Use tribe_id for coloring
-    }));
-    
-    // Create links from dependencies
-    const links = filteredDependencies
-      .filter(dep => {
-        // Only include links where both squads are in the filtered set
-        const dependentSquadExists = relevantSquads.some(s => s.id === dep.dependent_squad_id);
-        const dependencySquadExists = relevantSquads.some(s => s.id === dep.dependency_squad_id);
-        return dependentSquadExists && dependencySquadExists;
-      })
-      .map(dep => ({
-        source: dep.dependent_squad_id,
-        target: dep.dependency_squad_id,
-        type: dep.dependency_type,
-        interaction: dep.interaction_mode
-      }));
-    
     // Clear previous visualisation
     const svg = d3.select(svgRef.current);
     svg.selectAll('*').remove();
     
-    // Set up dimensions
+    // Set up dimensions; the view box covers the whole precomputed layout
     const width = 800;
     const height = 600;
+    const [minX, minY, maxX, maxY] = layout.bounds;
+    const margin = 20;
     
-    // Create the force simulation
-    const simulation = d3.forceSimulation(nodes)
-      .force('link', d3.forceLink(links).id(d => d.id).distance(100))
-      .force('charge', d3.forceManyBody().strength(-300))
-      .force('center', d3.forceCenter(width / 2, height / 2))
-      .force('collision', d3.forceCollide().radius(40));
-    
-    // Create SVG container
     svg
       .attr('width', width)
       .attr('height', height)
-      .attr('viewBox', [0, 0, width, height])
+      .attr('viewBox', [minX - margin, minY - margin, maxX - minX + 2 * margin, maxY - minY + 2 * margin])
       .attr('style', 'max-width: 100%; height: auto;')
       .attr('class', darkMode ? 'bg-dark-tertiary' : 'bg-white');
     
     // Define arrow marker for links - for interaction modes
     svg.append('defs').selectAll('marker')
-      .data(['collaboration', 'x_as_a_service', 'facilitating'])
+      .data([...Object.keys(INTERACTION_COLOURS), 'aggregate'])
       .enter().append('marker')
       .attr('id', d => `arrow-${d}`)
       .attr('viewBox', '0 -5 10 10')
-      .attr('refX', 25)
+      .attr('refX', 10)
       .attr('refY', 0)
       .attr('markerWidth', 6)
       .attr('markerHeight', 6)
       .attr('orient', 'auto')
       .append('path')
-      .attr('fill', d => {
-        // Set color based on interaction mode
-        if (d === 'collaboration') {
-          return '#9C5FFF'; // Purple
-        } else if (d === 'facilitating') {
-          return '#48BB78'; // Green
-        } else {
-          return '#3182CE'; // Blue for x_as_a_service
-        }
-      })
+      .attr('fill', d => INTERACTION_COLOURS[d] || '#718096')
       .attr('d', 'M0,-5L10,0L0,5');
     
-    // Create links with combined styles for type and interaction mode
-    const link = svg.append('g')
+    // Everything is drawn in one group so the map can be zoomed and panned
+    const container = svg.append('g');
+    svg.call(d3.zoom()
+      .scaleExtent([0.1, 20])
+      .on('zoom', event => container.attr('transform', event.transform)));
+    
+    // Links end at the edge of the target circle so the arrows stay visible
+    const linkEnd = (d, coordinate) => {
+      const dx = d.target.x - d.source.x;
+      const dy = d.target.y - d.source.y;
+      const length = Math.sqrt(dx * dx + dy * dy) || 1;
+      const offset = coordinate === 'x' ? dx : dy;
+      return d.target[coordinate] - (offset / length) * d.target.radius;
+    };
+    
+    // Create links with combined styles for interaction mode and weight
+    const link = container.append('g')
       .selectAll('line')
       .data(links)
       .enter().append('line')
-      .attr('stroke', d => {
-        // Set color based on interaction mode
-        if (d.interaction === 'collaboration') {
-          return '#9C5FFF'; // Purple
-        } else if (d.interaction === 'facilitating') {
-          return '#48BB78'; // Green
-        } else {
-          return '#3182CE'; // Blue for x_as_a_service
-        }
-      })
-      .attr('stroke-width', 2)
-      .attr('stroke-dasharray', d => {
-        // Modify pattern based on interaction mode
-        if (d.interaction === 'collaboration') {
-          return '3,3';
-        } else if (d.interaction === 'facilitating') {
-          return '6,3';
-        }
-        return null; // x_as_a_service - solid line
-      })
-      .attr('marker-end', d => `url(#arrow-${d.interaction})`);
+      .attr('stroke', d => INTERACTION_COLOURS[d.interaction] || '#718096')
+      .attr('stroke-opacity', d => (d.interaction ? 1 : 0.6))
+      .attr('stroke-width', d => 2 * Math.sqrt(d.weight))
+      .attr('stroke-dasharray', d => INTERACTION_DASHES[d.interaction] || null)
+      .attr('marker-end', d => `url(#arrow-${d.interaction || 'aggregate'})`);
+    
+    const positionLinks = () => {
+      link
+        .attr('x1', d => d.source.x)
+        .attr('y1', d => d.source.y)
+        .attr('x2', d => linkEnd(d, 'x'))
+        .attr('y2', d => linkEnd(d, 'y'));
+    };
     
     // Create color scale for nodes based on tribe
     const color = d3.scaleOrdinal(d3.schemeCategory10);
     
     // Create nodes
-    const node = svg.append('g')
+    const node = container.append('g')
       .selectAll('g')
       .data(nodes)
       .enter().append('g')
+      .attr('transform', d => `translate(${d.x},${d.y})`)
       .call(d3.drag()
-        .on('start', dragstarted)
-        .on('drag', dragged)
-        .on('end', dragended));
+        .on('drag', dragged));
     
     // Add circles to each node
     node.append('circle')
-      .attr('r', 20)
+      .attr('r', d => d.radius)
       .attr('fill', d => color(d.group))
+      .attr('fill-opacity', layout.level === 'squad' ? 1 : 0.8)
       .attr('stroke', '#fff')
       .attr('stroke-width', 1.5);
     
@@ -194,25 +191,26 @@ const DependencyMap = () => {
       .attr('dy', '.35em')
       .attr('fill', '#fff') // White text is good for both dark and light modes with colored backgrounds
       .attr('font-weight', 'bold') // Make text bolder for better visibility
-      .text(d => d.name.substring(0, 3))
+      .attr('font-size', d => (layout.level === 'squad' ? 12 : Math.max(12, d.radius / 5)))
+      .text(d => (layout.level === 'squad' ? d.name.substring(0, 3) : d.name))
       .append('title')
       .text(d => d.name);
     
     // Add hover interaction
     node.on('mouseover', function(event, d) {
-      // Count incoming and outgoing dependencies
-      const incoming = links.filter(link => link.target.id === d.id).length;
-      const outgoing = links.filter(link => link.source.id === d.id).length;
+      const details = layout.level === 'squad'
+        ? ''
+        : `<div>Squads: ${d.size}</div><div>Internal dependencies: ${d.internal}</div>`;
       
       // Show tooltip
-      // Using tooltipRef directly without assigning to a variable
       setTooltipContent({
         x: event.pageX,
         y: event.pageY,
         content: `
           <div><strong>${d.name}</strong></div>
-          <div>Incoming: ${incoming}</div>
-          <div>Outgoing: ${outgoing}</div>
+          ${details}
+          <div>Incoming: ${d.incoming}</div>
+          <div>Outgoing: ${d.outgoing}</div>
         `,
         visible: true
       });
@@ -221,42 +219,25 @@ const DependencyMap = () => {
       setTooltipContent(prev => ({ ...prev, visible: false }));
     })
     .on('click', function(event, d) {
-      // Navigate to squad detail page on click
-      window.location.href = `/squads/${d.id}`;
-    });
-    
-    // Update positions on each simulation tick
-    simulation.on('tick', () => {
-      link
-        .attr('x1', d => d.source.x)
-        .attr('y1', d => d.source.y)
-        .attr('x2', d => d.target.x)
-        .attr('y2', d => d.target.y);
-        
-      node.attr('transform', d => `translate(${d.x},${d.y})`);
+      // Navigate to the squad, tribe or area detail page on click
+      if (event.defaultPrevented || d.id === null) return;
+      window.location.href = `/${DETAIL_PATHS[layout.level]}/${d.id}`;
     });
     
-    // Drag functions for interactive nodes
-    function dragstarted(event) {
-      if (!event.active) simulation.alphaTarget(0.3).restart();
-      event.subject.fx = event.subject.x;
-      event.subject.fy = event.subject.y;
-    }
-    
-    function dragged(event) {
-      event.subject.fx = event.x;
-      event.subject.fy = event.y;
-    }
+    positionLinks();
     
-    function dragended(event) {
-      if (!event.active) simulation.alphaTarget(0);
-      event.subject.fx = null;
-      event.subject.fy = null;
+    // Drag nodes to reposition them; only the links of the dragged node move
+    function dragged(event, d) {
+      d.x = event.x;
+      d.y = event.y;
+      d3.select(this).attr('transform', `translate(${d.x},${d.y})`);
+      link.filter(l => l.source === d || l.target === d)
+        .attr('x1', l => l.source.x)
+        .attr('y1', l => l.source.y)
+        .attr('x2', l => linkEnd(l, 'x'))
+        .attr('y2', l => linkEnd(l, 'y'));
     }
-    
-    // Stop simulation when component unmounts
-    return () => simulation.stop();
-  }, [loading, squads, dependencies, selectedInteractionMode, searchTerm, darkMode]);
+  }, [loading, layout, selectedInteractionMode, searchTerm, darkMode]);
   
   if (loading) {
     return <div className="flex justify-center items-center h-96">Loading dependency map...</div>;
@@ -266,7 +247,7 @@ const DependencyMap = () => {
     return <div className="text-red-600 p-4 text-center">{error}</div>;
   }
   
-  if (dependencies.length === 0) {
+  if (!layout || layout.nodes.id.length === 0) {
     return <div className="p-4 bg-yellow-100 rounded-lg">No dependencies found in the system.</div>;
   }
   
@@ -279,6 +260,19 @@ const DependencyMap = () => {
       <div className="flex flex-col md:flex-row gap-4 mb-6">
         {/* Removed dependency type filter */}
         
+        <div className="flex-1">
+          <label className={`block text-sm font-medium ${darkMode ? 'text-dark-primary' : 'text-gray-700'} mb-1`}>Level of Detail</label>
+          <select 
+            className={`w-full border ${darkMode ? 'border-dark-border bg-dark-tertiary text-dark-primary' : 'border-gray-300 bg-white text-gray-800'} rounded-md p-2`}
+            value={level}
+            onChange={(e) => setLevel(e.target.value)}
+          >
+            <option value="squad">Squads</option>
+            <option value="tribe">Tribes</option>
+            <option value="area">Areas</option>
+          </select>
+        </div>
+        
         <div className="flex-1">
           <label className={`block text-sm font-medium ${darkMode ? 'text-dark-primary' : 'text-gray-700'} mb-1`}>Filter by Interaction Mode</label>
           <select 
@@ -311,7 +305,7 @@ const DependencyMap = () => {
         </div>
         
         <div className={`text-xs ${darkMode ? 'text-gray-400' : 'text-gray-500'} mt-4`}>
-          <p>Drag nodes to reposition. Click on a node to view squad details.</p>
+          <p>Scroll to zoom and drag the background to pan. Drag nodes to reposition. Click on a node to view its details.</p>
         </div>
       </div>
       
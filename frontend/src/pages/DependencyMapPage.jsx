@@ -10,8 +10,9 @@ const DependencyMapPage = () => {
       <p className={`${darkMode ? 'text-dark-secondary' : 'text-gray-600'} mb-6`}>
         This visualisation shows dependencies between squads based on Team Topologies concepts. 
         The interaction modes (Collaboration, X-as-a-Service, Facilitating) are represented by 
-        different line patterns and colours. Drag nodes to rearrange the 
-        visualisation, and click on a node to view more details about that squad.
+        different line patterns and colours. Squads are grouped by tribe and area; switch 
+        the level of detail to see dependencies between tribes or areas. Drag nodes to 
+        rearrange the visualisation, and click on a node to view more details.
       </p>
       
       <DependencyMap />